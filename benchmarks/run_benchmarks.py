@@ -0,0 +1,150 @@
+"""
+Runs the benchmarks of suite.py, and compares their timings with a baseline.
+Usage, from the root of the repository:
+    python -m benchmarks.run_benchmarks --save baseline.json
+    python -m benchmarks.run_benchmarks --compare baseline.json --max-slowdown 1.25
+The first command stores the timings in a JSON baseline, the second one fails (with exit code 1) if any benchmark is
+slower than in the baseline by more than the given factor. Baselines depend on the machine, so they should be compared
+only with timings taken on the same one. A regular expression passed with --filter selects the benchmarks to run.
+"""
+import argparse
+import json
+import platform
+import re
+import sys
+import timeit
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import scipy
+
+from benchmarks.suite import BENCHMARKS
+
+DEFAULT_REPEAT = 5
+DEFAULT_MIN_DURATION = 0.2  # Minimum duration of each repetition, in seconds
+DEFAULT_MAX_SLOWDOWN = 1.25
+
+
+def time_benchmark(
+    name: str,
+    repeat: int = DEFAULT_REPEAT,
+    min_duration: float = DEFAULT_MIN_DURATION,
+    number: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Times a benchmark: the function is called number times in each of repeat repetitions, and the time per call is the
+    minimum over the repetitions, which is the least affected by the noise of the machine. By default, number is chosen
+    so that each repetition lasts at least min_duration.
+    """
+    function = BENCHMARKS[name]()
+    function()  # Warm-up, e.g. to fill the caches of the precomputed data
+    timer = timeit.Timer(function)
+    if number is None:
+        number = 1
+        while True:
+            duration = timer.timeit(number)
+            if duration >= min_duration:
+                break
+            number = max(number * 2, int(number * min_duration / max(duration, 1e-9)))
+    durations = timer.repeat(repeat=repeat, number=number)
+    return {
+        "seconds": min(durations) / number,
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def run_benchmarks(
+    pattern: str = "",
+    repeat: int = DEFAULT_REPEAT,
+    min_duration: float = DEFAULT_MIN_DURATION,
+    number: Optional[int] = None,
+    verbose: bool = True,
+) -> Dict[str, Any]:
+    """
+    Times the benchmarks whose name matches the regular expression pattern.
+    :return: The results, i.e. a dictionary with the timings of the benchmarks, by name, and a description of the
+    machine and of the versions of the libraries.
+    """
+    timings = {}
+    for name in BENCHMARKS:
+        if not re.search(pattern, name):
+            continue
+        timings[name] = time_benchmark(
+            name, repeat=repeat, min_duration=min_duration, number=number
+        )
+        if verbose:
+            print(f"{name:<55} {timings[name]['seconds'] * 1e3:12.3f} ms")
+    return {
+        "machine": {
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "scipy": scipy.__version__,
+        },
+        "timings": timings,
+    }
+
+
+def compare_results(
+    results: Dict[str, Any],
+    baseline: Dict[str, Any],
+    max_slowdown: float = DEFAULT_MAX_SLOWDOWN,
+) -> List[Tuple[str, float, float, float, bool]]:
+    """
+    Compares the timings of the benchmarks in both results and baseline.
+    :return: For each of them, its name, the time per call in the baseline and in the results, their ratio, and whether
+    the ratio exceeds max_slowdown.
+    """
+    comparisons = []
+    for name, timing in results["timings"].items():
+        if name not in baseline["timings"]:
+            continue
+        baseline_seconds = baseline["timings"][name]["seconds"]
+        ratio = timing["seconds"] / baseline_seconds
+        comparisons.append(
+            (name, baseline_seconds, timing["seconds"], ratio, ratio > max_slowdown)
+        )
+    return comparisons
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--filter", default="", help="regular expression on names")
+    parser.add_argument("--save", help="path of the JSON file storing the results")
+    parser.add_argument("--compare", help="path of the JSON baseline")
+    parser.add_argument("--max-slowdown", type=float, default=DEFAULT_MAX_SLOWDOWN)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--min-duration", type=float, default=DEFAULT_MIN_DURATION)
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        pattern=args.filter, repeat=args.repeat, min_duration=args.min_duration
+    )
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if not args.compare:
+        return 0
+    with open(args.compare) as f:
+        baseline = json.load(f)
+    comparisons = compare_results(results, baseline, args.max_slowdown)
+    print()
+    for name, baseline_seconds, seconds, ratio, regressed in comparisons:
+        print(
+            f"{name:<55} {baseline_seconds * 1e3:12.3f} ms -> {seconds * 1e3:12.3f} ms"
+            f"  x{ratio:.2f}{'  SLOWER' if regressed else ''}"
+        )
+    n_regressions = sum(regressed for *_, regressed in comparisons)
+    if n_regressions:
+        print(
+            f"\n{n_regressions} benchmarks are slower than the baseline by more than x{args.max_slowdown}."
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
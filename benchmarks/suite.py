@@ -0,0 +1,325 @@
+"""
+Benchmarks of the hot paths of the model: the time evolution with each engine, at several grid resolutions, numbers of
+severities and numbers of iterations, the batch engine on sweeps of scenarios, the calendar-time evolution over a year,
+the Monte Carlo simulation of the branching process, and the model blocks, the construction of StepData objects and the
+quadratures in isolation.
+Each benchmark is registered in BENCHMARKS by name, as a setup function returning the function to time: the setup
+(building scenarios, sampling the inputs, ...) is not timed.
+"""
+from functools import partial
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from bsp_epidemic_suppression_model.math_utilities.functions_utils import (
+    DeltaMeasure,
+    RealRange,
+    integrate,
+)
+from bsp_epidemic_suppression_model.model_utilities.epidemic_data import (
+    FS,
+    k,
+    lambda_,
+)
+from bsp_epidemic_suppression_model.model_utilities.scenario import Scenario
+from bsp_epidemic_suppression_model.model_utilities.scenario_spec import (
+    GammaDelay,
+    InfectiousnessComponent,
+    WeibullProfile,
+)
+from bsp_epidemic_suppression_model.algorithm.model_blocks import (
+    compute_FA_from_FAs_and_previous_step_data,
+    compute_FT_from_FA_and_DeltaAT,
+    compute_beta_and_R_components_from_FT,
+)
+from bsp_epidemic_suppression_model.algorithm.grid_model_blocks import (
+    compute_beta_and_R_components_from_FT_values,
+)
+from bsp_epidemic_suppression_model.algorithm.step_data import StepData
+from bsp_epidemic_suppression_model.algorithm.time_evolution_main_function import (
+    compute_time_evolution,
+)
+from bsp_epidemic_suppression_model.algorithm.time_evolution_batch_function import (
+    compute_time_evolution_batch,
+)
+from bsp_epidemic_suppression_model.algorithm.calendar_time_evolution import (
+    compute_calendar_time_evolution,
+)
+from bsp_epidemic_suppression_model.algorithm.monte_carlo import (
+    simulate_branching_process,
+)
+
+BENCHMARKS: Dict[str, Callable[[], Callable[[], Any]]] = {}
+
+STEPS = (0.1, 0.05, 0.02)  # Grid resolutions
+N_SEVERITIES = (2, 4, 8, 24)
+N_ITERATIONS = (4, 8, 16)
+BATCH_SIZES = (16, 64)
+
+
+def make_benchmark_scenario(
+    n_severities: int = 2, continuous_delays: bool = False, papp: float = 0.6
+) -> Scenario:
+    """
+    Scenario with n_severities equally likely severities, whose components of R0 and probabilities of notification
+    after symptoms grow with the severity.
+    """
+    gs = range(n_severities)  # Values of severity G
+    R0_gs = [2 * (g + 1) / (n_severities + 1) for g in gs]  # Their average is 1
+    generation_time = WeibullProfile(k=k, lambda_=lambda_)
+    return Scenario(
+        p_gs=[1 / n_severities for _ in gs],
+        beta0_gs=[
+            InfectiousnessComponent(R0_component=R0_g, profile=generation_time)
+            for R0_g in R0_gs
+        ],
+        t_0=0,
+        ssapp=[0.8 * g / max(n_severities - 1, 1) for g in gs],
+        ssnoapp=[0.2 * g / max(n_severities - 1, 1) for g in gs],
+        scapp=0.8,
+        scnoapp=0.2,
+        xi=0.9,
+        papp=lambda t: papp,
+        p_DeltaATapp=GammaDelay(alpha=4, beta=2)
+        if continuous_delays
+        else DeltaMeasure(position=2),
+        p_DeltaATnoapp=GammaDelay(alpha=8, beta=2)
+        if continuous_delays
+        else DeltaMeasure(position=4),
+    )
+
+
+def _register(name: str, setup: Callable[[], Callable[[], Any]]) -> None:
+    if name in BENCHMARKS:
+        raise ValueError(f"Duplicate benchmark {name!r}.")
+    BENCHMARKS[name] = setup
+
+
+# Time evolution
+
+
+def setup_time_evolution(
+    engine: str,
+    quadrature: str,
+    step: float = 0.1,
+    n_severities: int = 2,
+    n_iterations: int = 8,
+    continuous_delays: bool = False,
+) -> Callable[[], Any]:
+    scenario = make_benchmark_scenario(
+        n_severities=n_severities, continuous_delays=continuous_delays
+    )
+    real_range = RealRange(0, 30, step)
+    return lambda: compute_time_evolution(
+        scenario=scenario,
+        real_range=real_range,
+        n_iterations=n_iterations,
+        verbose=False,
+        engine=engine,
+        quadrature=quadrature,
+    )
+
+
+for engine, quadrature in (
+    ("closures", "quad"),
+    ("closures", "trapezoid"),
+    ("grid", "trapezoid"),
+):
+    for step in STEPS:
+        if quadrature == "quad" and step != STEPS[0]:
+            continue  # The adaptive quadrature does not depend on the grid much
+        _register(
+            f"time_evolution.{engine}.{quadrature}.step={step}",
+            partial(setup_time_evolution, engine, quadrature, step=step),
+        )
+
+for n_severities in N_SEVERITIES:
+    _register(
+        f"time_evolution.grid.n_severities={n_severities}",
+        partial(setup_time_evolution, "grid", "trapezoid", n_severities=n_severities),
+    )
+
+for n_iterations in N_ITERATIONS:
+    _register(
+        f"time_evolution.grid.n_iterations={n_iterations}",
+        partial(setup_time_evolution, "grid", "trapezoid", n_iterations=n_iterations),
+    )
+
+_register(
+    "time_evolution.grid.continuous_delays",
+    partial(setup_time_evolution, "grid", "trapezoid", continuous_delays=True),
+)
+
+
+# Batch engine
+
+
+def setup_batch(batch_size: int, n_iterations: int = 8) -> Callable[[], Any]:
+    scenarios = [
+        make_benchmark_scenario(papp=papp) for papp in np.linspace(0, 1, batch_size)
+    ]
+    real_range = RealRange(0, 30, 0.1)
+    return lambda: compute_time_evolution_batch(
+        scenarios=scenarios, real_range=real_range, n_iterations=n_iterations
+    )
+
+
+for batch_size in BATCH_SIZES:
+    _register(f"batch.batch_size={batch_size}", partial(setup_batch, batch_size))
+
+
+# Calendar time
+
+
+def setup_calendar_time(n_times: int) -> Callable[[], Any]:
+    scenario = make_benchmark_scenario()
+    real_range = RealRange(0, 30, 0.1)
+    return lambda: compute_calendar_time_evolution(
+        scenario=scenario, real_range=real_range, n_times=n_times
+    )
+
+
+_register("calendar_time.n_times=365", partial(setup_calendar_time, 365))
+
+
+# Monte Carlo
+
+
+def setup_monte_carlo(n_individuals: int) -> Callable[[], Any]:
+    scenario = make_benchmark_scenario()
+    real_range = RealRange(0, 30, 0.1)
+    return lambda: simulate_branching_process(
+        scenario=scenario,
+        real_range=real_range,
+        n_generations=6,
+        n_individuals=n_individuals,
+        seed=0,
+    )
+
+
+_register("monte_carlo.n_individuals=100000", partial(setup_monte_carlo, 100000))
+
+
+# Model blocks
+
+
+def _make_FA_gs(n_severities: int = 2) -> List[Callable[[float], float]]:
+    return [
+        lambda tau, g=g: (g + 1) / (n_severities + 1) * FS(tau)
+        for g in range(n_severities)
+    ]
+
+
+def setup_compute_FA() -> Callable[[], Any]:
+    real_range = RealRange(0, 30, 0.1)
+    x_values = np.asarray(real_range.x_values)
+    tildeFT = lambda tau: 0.5 * FS(tau - 2)
+
+    def compute_FA():
+        FAapp_ti_gs, FAnoapp_ti_gs = compute_FA_from_FAs_and_previous_step_data(
+            FAsapp_ti_gs=_make_FA_gs(),
+            FAsnoapp_ti_gs=_make_FA_gs(),
+            tildepapp_tim1=0.5,
+            tildeFTapp_tim1=tildeFT,
+            tildeFTnoapp_tim1=tildeFT,
+            EtauC_tim1=4.8,
+            scapp=0.8,
+            scnoapp=0.2,
+        )
+        return [FA_ti_g(x_values) for FA_ti_g in FAapp_ti_gs + FAnoapp_ti_gs]
+
+    return compute_FA
+
+
+def setup_compute_FT(continuous_delays: bool) -> Callable[[], Any]:
+    real_range = RealRange(0, 30, 0.1)
+    x_values = np.asarray(real_range.x_values)
+    p_DeltaAT = GammaDelay(alpha=4, beta=2) if continuous_delays else DeltaMeasure(2)
+
+    def compute_FT():
+        FTapp_ti_gs, FTnoapp_ti_gs = compute_FT_from_FA_and_DeltaAT(
+            FAapp_ti_gs=_make_FA_gs(),
+            FAnoapp_ti_gs=_make_FA_gs(),
+            p_DeltaATapp=p_DeltaAT,
+            p_DeltaATnoapp=p_DeltaAT,
+            real_range=real_range,
+        )
+        return [FT_ti_g(x_values) for FT_ti_g in FTapp_ti_gs + FTnoapp_ti_gs]
+
+    return compute_FT
+
+
+def setup_compute_beta_and_R(quadrature: str) -> Callable[[], Any]:
+    scenario = make_benchmark_scenario()
+    beta0_gs = [
+        lambda tau, beta0_g=beta0_g: beta0_g(0, tau) for beta0_g in scenario.beta0_gs
+    ]
+    return lambda: compute_beta_and_R_components_from_FT(
+        FTapp_ti_gs=_make_FA_gs(),
+        FTnoapp_ti_gs=_make_FA_gs(),
+        beta0_ti_gs=beta0_gs,
+        xi=0.9,
+        tau_max=30,
+        quadrature=quadrature,
+        step=0.1,
+    )
+
+
+def setup_compute_beta_and_R_values() -> Callable[[], Any]:
+    scenario = make_benchmark_scenario()
+    real_range = RealRange(0, 30, 0.1)
+    x_values = np.asarray(real_range.x_values)
+    FT_gs_values = [FA_g(x_values) for FA_g in _make_FA_gs()]
+    beta0_gs_values = [beta0_g(0, x_values) for beta0_g in scenario.beta0_gs]
+    return lambda: compute_beta_and_R_components_from_FT_values(
+        FTapp_ti_gs=FT_gs_values,
+        FTnoapp_ti_gs=FT_gs_values,
+        beta0_ti_gs=beta0_gs_values,
+        xi=0.9,
+        real_range=real_range,
+    )
+
+
+_register("model_blocks.compute_FA", setup_compute_FA)
+_register("model_blocks.compute_FT.dirac", partial(setup_compute_FT, False))
+_register("model_blocks.compute_FT.continuous", partial(setup_compute_FT, True))
+for quadrature in ("quad", "trapezoid", "gauss_legendre"):
+    _register(
+        f"model_blocks.compute_beta_and_R.{quadrature}",
+        partial(setup_compute_beta_and_R, quadrature),
+    )
+_register("grid_model_blocks.compute_beta_and_R", setup_compute_beta_and_R_values)
+
+
+# StepData and quadratures
+
+
+def setup_step_data() -> Callable[[], Any]:
+    real_range = RealRange(0, 30, 0.1)
+    tildeFT = lambda tau: 0.5 * FS(tau - 2)
+    return lambda: StepData(
+        real_range=real_range,
+        t=0,
+        papp=0.6,
+        tildepapp=0.5,
+        tildepgs=[0.05, 0.95],
+        EtauC=4.8,
+        FT_infty=0.5,
+        FTapp_infty=0.6,
+        FTnoapp_infty=0.4,
+        tildeFTapp=tildeFT,
+        tildeFTnoapp=tildeFT,
+        R=0.8,
+        Rapp=0.7,
+        Rnoapp=0.9,
+    )
+
+
+def setup_integrate(quadrature: str) -> Callable[[], Any]:
+    f = lambda tau: tau * FS(tau) * np.exp(-tau / 4)
+    return lambda: integrate(f, 0, 30, quadrature=quadrature, step=0.1)
+
+
+_register("step_data.from_callables", setup_step_data)
+for quadrature in ("quad", "trapezoid", "simpson", "gauss_legendre"):
+    _register(f"integrate.{quadrature}", partial(setup_integrate, quadrature))
@@ -0,0 +1,249 @@
+"""
+Calendar-time version of the time evolution: instead of advancing by generations (t_i = t_{i-1} + E(tau^C)), the
+absolute time is discretized on a regular grid t_k = t_0 + k * dt (e.g. daily), and the infected individuals are
+divided into cohorts, one per time of infection t_k. This gives the reproduction number R_t of each cohort, and the
+incidence, i.e. the number of infections per unit time, projected with the renewal equation
+    I(t_k) = sum_j I(t_k - u_j) * beta_{t_k - u_j}(u_j) * dt + imported infections,
+where u_j = j * dt are the lags between the infections of the source and of the recipient, and beta_s is the suppressed
+infectiousness of the cohort infected at s.
+Each cohort is computed like a step of the grid engine (with the same model blocks), whose previous step is the mixture
+of the cohorts infected at t_k - u_j, weighted by their contributions to the incidence at t_k above: the recipient's
+notification due to contact tracing at tau is the source's at tau + u_j, instead of tau + E(tau^C) of the previous
+generation. The infectiousness kernels are supported on [0, tau_max], i.e. on a few dozens of lags, so the renewal
+equation is solved directly, accumulating their contributions, like the short kernels of convolve_values.
+"""
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import numpy as np
+
+from bsp_epidemic_suppression_model.math_utilities.functions_utils import (
+    Range,
+    evaluate_from_list,
+    integrate_values,
+)
+from bsp_epidemic_suppression_model.model_utilities.precomputed_epidemic_data import (
+    PrecomputedEpidemicData,
+    get_precomputed_epidemic_data,
+)
+from bsp_epidemic_suppression_model.model_utilities.scenario import Scenario
+
+from bsp_epidemic_suppression_model.algorithm.model_blocks import (
+    compute_FAs_from_FS,
+    compute_FA_from_FAs_and_previous_step_data,
+    compute_FT_from_FA_and_DeltaAT,
+    degenerate_branches,
+    combine_branches,
+)
+from bsp_epidemic_suppression_model.algorithm.grid_model_blocks import (
+    compute_beta_and_R_from_stacked_FT_values,
+    severity_sum,
+)
+
+
+@dataclass
+class CalendarTimeEvolution:
+    """
+    Result of compute_calendar_time_evolution: the quantities of the cohorts infected at the times t, as arrays with
+    one element per cohort.
+    """
+
+    t: np.ndarray  # Absolute times of infection of the cohorts
+    incidence: np.ndarray  # Infections per unit time
+    R: np.ndarray
+    Rapp: np.ndarray
+    Rnoapp: np.ndarray
+    papp: np.ndarray
+    tildepapp: np.ndarray
+    EtauC: np.ndarray
+
+
+def compute_calendar_time_evolution(
+    scenario: Scenario,
+    real_range: Range,
+    n_times: int,
+    dt: float = 1.0,
+    initial_incidence: float = 1.0,
+    imported_incidence: Optional[Callable[[float], float]] = None,
+    interpolation: str = "linear",
+    quadrature: str = "trapezoid",
+    precomputed: Optional[PrecomputedEpidemicData] = None,
+    skip_degenerate_branches: bool = False,
+) -> CalendarTimeEvolution:
+    """
+    Computes the time evolution of the scenario in calendar time (see the docstring of the module), for the cohorts
+    infected at t_0, t_0 + dt, ..., t_0 + (n_times - 1) * dt. The first cohort has no sources, like the first step of
+    compute_time_evolution.
+    :param scenario: the Scenario object defining the input data of the model.
+    :param real_range: a RealRange (or a NonUniformRange) object specifying the upper integration bound and the real
+    numbers on which the functions and densities are sampled.
+    :param n_times: the number of cohorts, e.g. 365 for a year with daily cohorts.
+    :param dt: the time between consecutive cohorts, e.g. 1 for daily cohorts if the times are in days.
+    :param initial_incidence: the incidence of the first cohort.
+    :param imported_incidence: if given, the incidence of the infections at each absolute time coming from outside
+    the population (which have no traceable sources), added to the one given by the renewal equation.
+    :param interpolation: how the functions sampled on real_range are evaluated at shifted points ("floor" or
+    "linear").
+    :param quadrature: the quadrature rule used for the integrals over real_range ("trapezoid" or "simpson").
+    :param precomputed: the samples over real_range of FS and of the scenario's beta0_gs (see iter_time_evolution).
+    :param skip_degenerate_branches: whether to skip the branch (app or no-app) with vanishing weight in each cohort
+    (see iter_time_evolution).
+    :return: The CalendarTimeEvolution object.
+    """
+    precomputed = get_precomputed_epidemic_data(
+        scenario.beta0_gs, real_range, precomputed
+    )
+    tau_max = real_range.x_max
+    x_values = precomputed.x_values
+    n_points = len(x_values)
+
+    # The severities are stacked along the first axis, as in iter_time_evolution_on_grid
+    p_gs = np.array(scenario.p_gs, dtype=float)
+    ssapp = np.array(scenario.ssapp, dtype=float)[:, np.newaxis]
+    ssnoapp = np.array(scenario.ssnoapp, dtype=float)[:, np.newaxis]
+    (FAsapp_t,), (FAsnoapp_t,) = compute_FAs_from_FS(
+        ssapp=[ssapp], ssnoapp=[ssnoapp], FS=precomputed.FS
+    )
+
+    # Lags between the infections of a source and of its recipients. For each lag, the source's distributions are
+    # evaluated at the shifted points x + lag, interpolating between the samples with indices shift_indices and
+    # shift_indices + 1 (with weights 1 - shift_weights and shift_weights), found once interpolating the indices
+    lags = dt * np.arange(1, int(tau_max / dt) + 1)
+    shift_positions = evaluate_from_list(
+        np.arange(n_points, dtype=float),
+        real_range,
+        x_values + lags[:, np.newaxis],
+        interpolation,
+    )
+    shift_indices = np.minimum(shift_positions.astype(int), n_points - 2)
+    shift_weights = shift_positions - shift_indices
+
+    t_values = scenario.t_0 + dt * np.arange(n_times)
+    incidence = np.zeros(n_times)
+    R, Rapp, Rnoapp, papp, tildepapp, EtauC = (np.zeros(n_times) for _ in range(6))
+    # Source-based distributions of each cohort, and its suppressed infectiousness at the lags
+    tildeFTapp_values = np.zeros((n_times, n_points))
+    tildeFTnoapp_values = np.zeros((n_times, n_points))
+    beta_at_lags = np.zeros((n_times, len(lags)))
+
+    for k, t_k in enumerate(t_values):
+        # Contributions of the previous cohorts to the incidence, by lag
+        lag_indices = np.arange(min(k, len(lags)))
+        source_indices = k - 1 - lag_indices
+        contributions = (
+            incidence[source_indices] * beta_at_lags[source_indices, lag_indices] * dt
+        )
+        incidence[k] = (
+            contributions.sum()
+            + (initial_incidence if k == 0 else 0.0)
+            + (imported_incidence(t_k) if imported_incidence is not None else 0.0)
+        )
+
+        # The sources of the cohort: the mixture of the previous cohorts, each shifted by its lag. The weights sum to
+        # the fraction of the cohort's infections having a source in the population (i.e. not imported), which
+        # rescales the source distributions
+        if incidence[k] > 0 and contributions.any():
+            weights = contributions / incidence[k]
+            app_weights = weights * tildepapp[source_indices]
+            noapp_weights = weights * (1 - tildepapp[source_indices])
+            rows = source_indices[:, np.newaxis]
+            indices = shift_indices[lag_indices]
+            next_weights = shift_weights[lag_indices]
+            shifted = lambda values: (
+                values[rows, indices] * (1 - next_weights)
+                + values[rows, indices + 1] * next_weights
+            )
+            source_tildepapp = app_weights.sum() / weights.sum()
+            source_tildeFTapp_values = (
+                app_weights @ shifted(tildeFTapp_values) / source_tildepapp
+                if source_tildepapp > 0
+                else np.zeros(n_points)
+            )
+            source_tildeFTnoapp_values = (
+                noapp_weights @ shifted(tildeFTnoapp_values) / (1 - source_tildepapp)
+                if source_tildepapp < 1
+                else np.zeros(n_points)
+            )
+            (FAapp_t,), (FAnoapp_t,) = compute_FA_from_FAs_and_previous_step_data(
+                FAsapp_ti_gs=[FAsapp_t],
+                FAsnoapp_ti_gs=[FAsnoapp_t],
+                tildepapp_tim1=source_tildepapp,
+                tildeFTapp_tim1=lambda tau: evaluate_from_list(
+                    source_tildeFTapp_values, real_range, tau, interpolation
+                ),
+                tildeFTnoapp_tim1=lambda tau: evaluate_from_list(
+                    source_tildeFTnoapp_values, real_range, tau, interpolation
+                ),
+                EtauC_tim1=0.0,  # The lags are in the shifts
+                scapp=scenario.scapp,
+                scnoapp=scenario.scnoapp,
+            )
+        else:
+            FAapp_t, FAnoapp_t = FAsapp_t, FAsnoapp_t
+
+        papp_t = scenario.papp(t_k)
+        skip_app, skip_noapp = (
+            degenerate_branches(papp_t) if skip_degenerate_branches else (False, False)
+        )
+
+        # F^T, beta and R of the cohort, as in iter_time_evolution_on_grid
+        FTapp_t_gs, FTnoapp_t_gs = compute_FT_from_FA_and_DeltaAT(
+            FAapp_ti_gs=None if skip_app else [FAapp_t],
+            FAnoapp_ti_gs=None if skip_noapp else [FAnoapp_t],
+            p_DeltaATapp=scenario.p_DeltaATapp,
+            p_DeltaATnoapp=scenario.p_DeltaATnoapp,
+            real_range=real_range,
+        )
+        FTapp_t = None if skip_app else FTapp_t_gs[0]
+        FTnoapp_t = None if skip_noapp else FTnoapp_t_gs[0]
+        FTapp_t_values = None if skip_app else FTapp_t(x_values)
+        FTnoapp_t_values = None if skip_noapp else FTnoapp_t(x_values)
+
+        (
+            betaapp_t_gs_values,
+            betanoapp_t_gs_values,
+            Rapp_t_gs,
+            Rnoapp_t_gs,
+        ) = compute_beta_and_R_from_stacked_FT_values(
+            FTapp_ti_values=FTapp_t_values,
+            FTnoapp_ti_values=FTnoapp_t_values,
+            beta0_ti_values=np.stack(precomputed.beta0_ti_gs_values(t_k)),
+            xi=scenario.xi,
+            real_range=real_range,
+            quadrature=quadrature,
+        )
+        beta_t_values = combine_branches(
+            papp_t,
+            None if skip_app else severity_sum(p_gs, betaapp_t_gs_values),
+            None if skip_noapp else severity_sum(p_gs, betanoapp_t_gs_values),
+        )
+        Rapp[k] = severity_sum(p_gs, Rapp_t_gs)
+        Rnoapp[k] = severity_sum(p_gs, Rnoapp_t_gs)
+        R_t_gs = combine_branches(papp_t, Rapp_t_gs, Rnoapp_t_gs)
+        R[k] = combine_branches(papp_t, Rapp[k], Rnoapp[k])
+        papp[k] = papp_t
+        beta_at_lags[k] = evaluate_from_list(
+            beta_t_values, real_range, lags, interpolation
+        )
+
+        # Source-based probabilities and distributions, for the cohorts infected by this one
+        EtauC[k] = (
+            integrate_values(x_values * beta_t_values, real_range, quadrature) / R[k]
+        )
+        tildepapp[k] = 0.0 if skip_app else papp_t * Rapp[k] / R[k]
+        tildep_t_gs = p_gs * R_t_gs / R[k]
+        if not skip_app:
+            tildeFTapp_values[k] = severity_sum(tildep_t_gs, FTapp_t_values)
+        if not skip_noapp:
+            tildeFTnoapp_values[k] = severity_sum(tildep_t_gs, FTnoapp_t_values)
+
+    return CalendarTimeEvolution(
+        t=t_values,
+        incidence=incidence,
+        R=R,
+        Rapp=Rapp,
+        Rnoapp=Rnoapp,
+        papp=papp,
+        tildepapp=tildepapp,
+        EtauC=EtauC,
+    )
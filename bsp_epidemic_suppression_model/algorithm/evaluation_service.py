@@ -0,0 +1,388 @@
+"""
+Asynchronous service evaluating scenarios on demand, e.g. for the interactive what-if queries of a dashboard.
+A query is a ScenarioSpec, and its answer an Evaluation, i.e. R and the effectiveness at the last step of the time
+evolution. The service is used from an asyncio event loop (await service.evaluate(spec)), and:
+- serves the scenarios evaluated recently from an in-memory LRU cache, addressed by the content hash of the specs;
+- deduplicates concurrent identical queries, which wait for the same evaluation;
+- coalesces the queries arriving within batch_window seconds (or until max_batch_size of them are waiting) into one
+  evaluation with the batch engine (see compute_time_evolution_batch), run in a pool of workers so that the event loop
+  is never blocked.
+The service can be exposed to a local dashboard by a small HTTP server (see serve_http), accepting specs in JSON format
+(see scenario_spec.py):
+    python -m bsp_epidemic_suppression_model.algorithm.evaluation_service --port 8080
+    curl -X POST --data @spec.json http://127.0.0.1:8080/evaluate
+"""
+import argparse
+import asyncio
+import json
+import math
+from collections import OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from bsp_epidemic_suppression_model.math_utilities.functions_utils import (
+    Range,
+    RealRange,
+)
+from bsp_epidemic_suppression_model.model_utilities.scenario import ScenarioError
+from bsp_epidemic_suppression_model.model_utilities.scenario_spec import (
+    DiracDelay,
+    ScenarioSpec,
+)
+from bsp_epidemic_suppression_model.algorithm.model_blocks import effectiveness_from_R
+from bsp_epidemic_suppression_model.algorithm.time_evolution_main_function import (
+    compute_time_evolution,
+)
+from bsp_epidemic_suppression_model.algorithm.time_evolution_batch_function import (
+    compute_time_evolution_batch,
+)
+
+DEFAULT_BATCH_WINDOW = 0.002  # Seconds
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_CACHE_SIZE = 4096
+
+
+@dataclass
+class Evaluation:
+    """
+    Result of the evaluation of a scenario.
+    """
+
+    spec_hash: str  # The content hash of the ScenarioSpec
+    R_infty: float  # R at the last step
+    Eff_infty: float  # Effectiveness at the last step
+    steps: List[Dict[str, float]]  # The summaries of the StepData objects
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns the evaluation as a dictionary of JSON-serializable values, where NaN (e.g. the reproduction number of
+        a skipped branch) is None.
+        """
+        return _replace_nan(asdict(self))
+
+
+def _replace_nan(value):
+    if isinstance(value, dict):
+        return {k: _replace_nan(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_replace_nan(v) for v in value]
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def _batch_group(spec: ScenarioSpec) -> Tuple[int, bool, bool]:
+    """
+    Returns the key of the group of the specs that can be evolved together by compute_time_evolution_batch, i.e. with
+    the same number of severities, and the same kind (DeltaMeasures or continuous) of notification-to-test delays.
+    """
+    return (
+        len(spec.p_gs),
+        isinstance(spec.DeltaATapp, DiracDelay),
+        isinstance(spec.DeltaATnoapp, DiracDelay),
+    )
+
+
+def evaluate_specs(
+    specs: List[ScenarioSpec],
+    real_range: Range,
+    n_iterations: int,
+    engine: str = "batch",
+) -> List[Evaluation]:
+    """
+    Evaluates the given scenarios, all together with compute_time_evolution_batch if engine="batch" (then they must
+    belong to the same batch group), or one by one with the given engine of compute_time_evolution otherwise. This is
+    executed in the workers of EvaluationService, and is picklable, so that they can be processes.
+    """
+    scenarios = [spec.to_scenario() for spec in specs]
+    if engine == "batch":
+        step_data_lists = compute_time_evolution_batch(
+            scenarios=scenarios, real_range=real_range, n_iterations=n_iterations
+        )
+    else:
+        step_data_lists = [
+            compute_time_evolution(
+                scenario=scenario,
+                real_range=real_range,
+                n_iterations=n_iterations,
+                verbose=False,
+                engine=engine,
+            )
+            for scenario in scenarios
+        ]
+    return [
+        Evaluation(
+            spec_hash=spec.content_hash(),
+            R_infty=step_data_list[-1].R,
+            Eff_infty=effectiveness_from_R(step_data_list[-1].R),
+            steps=[step_data.summary() for step_data in step_data_list],
+        )
+        for spec, step_data_list in zip(specs, step_data_lists)
+    ]
+
+
+class EvaluationService:
+    """
+    Evaluates ScenarioSpecs asynchronously, with caching, deduplication and batching of the queries (see above). It
+    must be used from a single event loop.
+    :param real_range: the range of the time evolutions.
+    :param n_iterations: the number of iterations of the time evolutions.
+    :param engine: "batch" to evaluate the queries coalesced together with compute_time_evolution_batch, or an engine
+    of compute_time_evolution ("grid" or "closures") to evaluate them one by one.
+    :param executor: the pool of workers running the evaluations. By default, a pool of threads owned by the service,
+    and shut down by close. A ProcessPoolExecutor can be given instead, since the specs are picklable.
+    :param batch_window: the time (in seconds) a query waits for others to be coalesced with.
+    :param max_batch_size: the number of waiting queries that triggers an evaluation before the end of the window.
+    :param cache_size: the number of evaluations kept in the LRU cache.
+    """
+
+    def __init__(
+        self,
+        real_range: Range,
+        n_iterations: int = 8,
+        engine: str = "batch",
+        executor: Optional[Executor] = None,
+        batch_window: float = DEFAULT_BATCH_WINDOW,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+    ):
+        self.real_range = real_range
+        self.n_iterations = n_iterations
+        self.engine = engine
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor()
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.cache_size = cache_size
+
+        self._cache: "OrderedDict[str, Evaluation]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}  # Evaluations being computed
+        self._queue: List[Tuple[str, ScenarioSpec]] = []  # Queries not yet batched
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+        self.hits = 0  # Queries served from the cache
+        self.deduplicated = 0  # Queries waiting for an identical one
+        self.misses = 0  # Queries evaluated
+        self.n_batches = 0  # Evaluations run in the workers
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "deduplicated": self.deduplicated,
+            "misses": self.misses,
+            "n_batches": self.n_batches,
+            "cache_size": len(self._cache),
+        }
+
+    async def evaluate(self, spec: ScenarioSpec) -> Evaluation:
+        """
+        Returns the Evaluation of the scenario described by spec. Cancelling the query does not cancel the evaluation,
+        which may be shared with other queries.
+        """
+        key = spec.content_hash()
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return self._cache[key]
+
+        future = self._pending.get(key)
+        if future is not None:
+            self.deduplicated += 1
+            return await asyncio.shield(future)
+
+        loop = asyncio.get_running_loop()
+        future = self._pending[key] = loop.create_future()
+        self._queue.append((key, spec))
+        self.misses += 1
+        if len(self._queue) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        """
+        Starts the evaluation of the queued queries, in one batch per batch group.
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        queue, self._queue = self._queue, []
+        groups: Dict[Tuple[int, bool, bool], List[Tuple[str, ScenarioSpec]]] = {}
+        for key, spec in queue:
+            groups.setdefault(_batch_group(spec), []).append((key, spec))
+        for items in groups.values():
+            task = asyncio.ensure_future(self._run_batch(items))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, items: List[Tuple[str, ScenarioSpec]]) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            evaluations = await loop.run_in_executor(
+                self._executor,
+                evaluate_specs,
+                [spec for _, spec in items],
+                self.real_range,
+                self.n_iterations,
+                self.engine,
+            )
+        except Exception as e:
+            if len(items) > 1:
+                # Evaluates the queries one by one, so that only the invalid ones fail
+                await asyncio.gather(*(self._run_batch([item]) for item in items))
+                return
+            key = items[0][0]
+            self._pending.pop(key).set_exception(e)
+            return
+        finally:
+            self.n_batches += 1
+
+        for (key, _), evaluation in zip(items, evaluations):
+            self._cache[key] = evaluation
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            self._pending.pop(key).set_result(evaluation)
+
+    async def close(self) -> None:
+        """
+        Evaluates the queued queries, waits for all the evaluations, and shuts down the workers if they are owned by
+        the service.
+        """
+        if self._queue:
+            self._flush()
+        while self._tasks:
+            await asyncio.gather(*self._tasks)
+        if self._owns_executor:
+            self._executor.shutdown()
+
+    async def __aenter__(self) -> "EvaluationService":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+
+# HTTP front end
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    500: "Internal Server Error",
+}
+
+
+async def _route(
+    service: EvaluationService, method: str, path: str, body: bytes
+) -> Tuple[int, Any]:
+    if path == "/evaluate":
+        if method != "POST":
+            return 405, {"error": "Use POST, with a ScenarioSpec in JSON format."}
+        try:
+            spec = ScenarioSpec.from_json(body.decode())
+            evaluation = await service.evaluate(spec)
+        except (ScenarioError, ValueError, KeyError, TypeError) as e:
+            return 400, {"error": str(e)}
+        return 200, evaluation.to_dict()
+    if path == "/stats":
+        if method != "GET":
+            return 405, {"error": "Use GET."}
+        return 200, service.stats
+    return 404, {"error": f"Unknown path {path!r}."}
+
+
+async def _handle_http_connection(
+    service: EvaluationService,
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+) -> None:
+    """
+    Serves a single HTTP/1.1 request on a connection, then closes it. Unexpected errors of the evaluation are answered
+    with status 500.
+    """
+    try:
+        try:
+            request_line = (await reader.readline()).decode("latin-1")
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1")
+                if line in ("\r\n", "\n", ""):
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            method, path, _ = request_line.split()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+        except (ValueError, asyncio.IncompleteReadError):
+            status, response = 400, {"error": "Malformed HTTP request."}
+        else:
+            try:
+                status, response = await _route(service, method, path, body)
+            except asyncio.CancelledError:  # An Exception up to Python 3.7
+                raise
+            except Exception as e:
+                status, response = 500, {"error": f"{type(e).__name__}: {e}"}
+
+        payload = json.dumps(response).encode()
+        writer.write(
+            (
+                f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+                "Content-Type: application/json\r\n"
+                "Access-Control-Allow-Origin: *\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                "Connection: close\r\n\r\n"
+            ).encode()
+            + payload
+        )
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def serve_http(
+    service: EvaluationService, host: str = "127.0.0.1", port: int = 8080
+) -> asyncio.AbstractServer:
+    """
+    Starts a local HTTP server in front of the service, and returns it (see asyncio.start_server). It answers to:
+    - POST /evaluate, whose body is a ScenarioSpec in JSON format, with the Evaluation in JSON format (see
+      Evaluation.to_dict), with status 400 if the spec is not valid, or with status 500 if the evaluation fails;
+    - GET /stats, with the stats of the service.
+    """
+    return await asyncio.start_server(
+        lambda reader, writer: _handle_http_connection(service, reader, writer),
+        host=host,
+        port=port,
+    )
+
+
+async def _serve_forever(args: argparse.Namespace) -> None:
+    async with EvaluationService(
+        real_range=RealRange(0, args.tau_max, args.step),
+        n_iterations=args.n_iterations,
+    ) as service:
+        server = await serve_http(service, host=args.host, port=args.port)
+        print(f"Serving on http://{args.host}:{args.port}")
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--tau-max", type=float, default=30)
+    parser.add_argument("--step", type=float, default=0.05)
+    parser.add_argument("--n-iterations", type=int, default=8)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve_forever(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Counterparts of the blocks in model_blocks.py acting on functions sampled over a RealRange, i.e. on NumPy arrays of
+values, rather than on callables.
+All the arrays can have leading (batch) axes, the last axis running over the range: the scalar parameters must then
+broadcast against them. The "stacked" blocks take the components of all the severities stacked along the first axis of
+the arrays, instead of a list of them.
+"""
+import math
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from bsp_epidemic_suppression_model.math_utilities.functions_utils import (
+    Range,
+    RealRange,
+    integrate_values,
+)
+from bsp_epidemic_suppression_model.algorithm.model_blocks import combine_branches
+
+
+def suppressed_beta_values_from_test_cdf_values(
+    beta0_component_values: np.ndarray, FT_component_values: np.ndarray, xi: float,
+) -> np.ndarray:
+    """
+    Given the samples of a component of the default infectiousness beta^0 and of the corresponding component of the
+    CDF F^T for the test results time, calculates the samples of the component of the suppressed infectiousness.
+    """
+    return beta0_component_values * (1 - FT_component_values * xi)
+
+
+def compute_beta_and_R_components_from_FT_values(
+    FTapp_ti_gs: Optional[List[np.ndarray]],
+    FTnoapp_ti_gs: Optional[List[np.ndarray]],
+    beta0_ti_gs: List[np.ndarray],
+    xi: float,
+    real_range: RealRange,
+    quadrature: str = "trapezoid",
+) -> Tuple[
+    Optional[List[np.ndarray]], Optional[List[np.ndarray]], List[float], List[float]
+]:
+    """
+    Computes the app and no-app components of the suppressed infectiousness beta and the suppressed effective
+    reproduction number R, given the samples over real_range of the CDFs F^T and of the default infectiousness.
+    :param FTapp_ti_gs: the list of sampled test results times improper CDFs (one per severity component), for people
+    with the app.
+    :param FTnoapp_ti_gs: the list of sampled test results times improper CDFs (one per severity component), for people
+    without the app.
+    :param beta0_ti_gs: the list of sampled default infectiousness distributions (one per severity component).
+    :param xi: the probability of self-isolation given a positive test result.
+    :param real_range: the range over which the functions are sampled, and integrated.
+    :param quadrature: the quadrature rule used for the integrals, see integrate_values.
+    The samples of F^T of a skipped branch (see degenerate_branches) are None: the ones of beta returned for it are None
+    as well, and the components of R are NaN.
+    """
+    gs = range(len(beta0_ti_gs))  # Values of severity G
+
+    def compute_branch(
+        FT_ti_gs: Optional[List[np.ndarray]],
+    ) -> Tuple[Optional[List[np.ndarray]], List[float]]:
+        if FT_ti_gs is None:  # Skipped branch
+            return None, [math.nan for _ in gs]
+        beta_ti_gs = [
+            suppressed_beta_values_from_test_cdf_values(
+                beta0_component_values=beta0_ti_gs[g],
+                FT_component_values=FT_ti_gs[g],
+                xi=xi,
+            )
+            for g in gs
+        ]
+        R_ti_gs = [
+            integrate_values(beta_ti_g, real_range, quadrature)
+            for beta_ti_g in beta_ti_gs
+        ]
+        return beta_ti_gs, R_ti_gs
+
+    betaapp_ti_gs, Rapp_ti_gs = compute_branch(FTapp_ti_gs)
+    betanoapp_ti_gs, Rnoapp_ti_gs = compute_branch(FTnoapp_ti_gs)
+
+    return betaapp_ti_gs, betanoapp_ti_gs, Rapp_ti_gs, Rnoapp_ti_gs
+
+
+def severity_sum(weights_gs: np.ndarray, values_gs: np.ndarray) -> np.ndarray:
+    """
+    Returns the sum over the severities of values_gs (stacked along the first axis, e.g. the samples of the components of
+    beta, or the components of R) weighted by weights_gs (e.g. p_gs or tildep_gs). It is the vectorized counterpart of
+    sum(weights_gs[g] * values_gs[g] for g in gs), accumulating the rows in the same order, so with the same rounding.
+    """
+    weights_gs = np.reshape(weights_gs, (-1,) + (1,) * (np.ndim(values_gs) - 1))
+    return (weights_gs * values_gs).sum(axis=0)
+
+
+def unstack_severities(
+    F_ti: Callable[[np.ndarray], np.ndarray], n_severities: int
+) -> List[Callable[[np.ndarray], np.ndarray]]:
+    """
+    Splits a function of tau whose values have one row per severity (e.g. the F^A or F^T computed by the blocks of
+    model_blocks.py with parameters stacked along the first axis) into its components, one function per severity.
+    """
+    return [
+        lambda tau, g=g: np.reshape(F_ti(tau)[g], np.shape(tau))
+        for g in range(n_severities)
+    ]
+
+
+def compute_beta_and_R_from_stacked_FT_values(
+    FTapp_ti_values: Optional[np.ndarray],
+    FTnoapp_ti_values: Optional[np.ndarray],
+    beta0_ti_values: np.ndarray,
+    xi: float,
+    real_range: Range,
+    quadrature: str = "trapezoid",
+) -> Tuple[Optional[np.ndarray], Optional[np.ndarray], np.ndarray, np.ndarray]:
+    """
+    Version of compute_beta_and_R_components_from_FT_values where the samples of all the severities are stacked along
+    the first axis of the arrays, rather than listed, so that each block is a single NumPy operation for all of them.
+    The components of R are returned as arrays, with one element per severity (NaN for a skipped branch, whose samples
+    of F^T are None).
+    """
+
+    def compute_branch(
+        FT_ti_values: Optional[np.ndarray],
+    ) -> Tuple[Optional[np.ndarray], np.ndarray]:
+        if FT_ti_values is None:  # Skipped branch
+            return None, np.full(len(beta0_ti_values), np.nan)
+        beta_ti_values = suppressed_beta_values_from_test_cdf_values(
+            beta0_component_values=beta0_ti_values,
+            FT_component_values=FT_ti_values,
+            xi=xi,
+        )
+        return beta_ti_values, integrate_values(beta_ti_values, real_range, quadrature)
+
+    betaapp_ti_values, Rapp_ti_gs = compute_branch(FTapp_ti_values)
+    betanoapp_ti_values, Rnoapp_ti_gs = compute_branch(FTnoapp_ti_values)
+
+    return betaapp_ti_values, betanoapp_ti_values, Rapp_ti_gs, Rnoapp_ti_gs
+
+
+def compute_stacked_limits(
+    Fapp_ti: Optional[Callable[[float], np.ndarray]],
+    Fnoapp_ti: Optional[Callable[[float], np.ndarray]],
+    p_gs: np.ndarray,
+    papp_ti: float,
+    tau_max: float,
+) -> Tuple[np.ndarray, np.ndarray, float, float, float]:
+    """
+    Counterpart of compute_limits for an improper CDF whose values have one row per severity (see unstack_severities):
+    each branch is evaluated once at tau_max, and the components of the limits are returned as arrays.
+    :return: Fapp_ti_gs_infty, Fnoapp_ti_gs_infty, Fapp_ti_infty, Fnoapp_ti_infty, F_ti_infty.
+    """
+
+    def branch_limits(
+        F_ti: Optional[Callable[[float], np.ndarray]]
+    ) -> Tuple[np.ndarray, float]:
+        if F_ti is None:  # Skipped branch
+            return np.full(len(p_gs), np.nan), math.nan
+        F_ti_gs_infty = np.reshape(F_ti(tau_max), len(p_gs))
+        return F_ti_gs_infty, float(severity_sum(p_gs, F_ti_gs_infty))
+
+    Fapp_ti_gs_infty, Fapp_ti_infty = branch_limits(Fapp_ti)
+    Fnoapp_ti_gs_infty, Fnoapp_ti_infty = branch_limits(Fnoapp_ti)
+    F_ti_infty = combine_branches(papp_ti, Fapp_ti_infty, Fnoapp_ti_infty)
+
+    return (
+        Fapp_ti_gs_infty,
+        Fnoapp_ti_gs_infty,
+        Fapp_ti_infty,
+        Fnoapp_ti_infty,
+        F_ti_infty,
+    )
@@ -0,0 +1,192 @@
+"""
+Inverse problems on the model: finding the value of a parameter of a scenario (e.g. the fraction of app adopters papp,
+or the probability ssapp[1] of notification after symptoms) giving a target reproduction number or effectiveness, e.g.
+the minimal intervention bringing R below 1.
+The target is found by Brent's method (scipy.optimize.brentq) on the reproduction number as a function of the
+parameter, within a bracket where it crosses the target, so that a handful of evaluations of the model are needed
+instead of a scan over a list of values. Each evaluation computes the limit R_∞ of the time evolution with the
+stationary step solver, starting from the stationary step of the closest value evaluated before (a warm start), and
+sharing the scenario-invariant precomputed data.
+"""
+import dataclasses
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from scipy import optimize
+
+from bsp_epidemic_suppression_model.math_utilities.functions_utils import (
+    DeltaMeasure,
+    RealRange,
+)
+from bsp_epidemic_suppression_model.model_utilities.epidemic_data import R0
+from bsp_epidemic_suppression_model.model_utilities.precomputed_epidemic_data import (
+    get_precomputed_epidemic_data,
+)
+from bsp_epidemic_suppression_model.model_utilities.scenario import Scenario
+
+from bsp_epidemic_suppression_model.algorithm.model_blocks import effectiveness_from_R
+from bsp_epidemic_suppression_model.algorithm.sensitivities import (
+    sensitivity_parameters,
+)
+from bsp_epidemic_suppression_model.algorithm.stationary_step import (
+    compute_stationary_step_data,
+)
+from bsp_epidemic_suppression_model.algorithm.step_data import StepData
+from bsp_epidemic_suppression_model.algorithm.time_evolution_grid_function import (
+    compute_time_evolution_on_grid,
+)
+
+
+def scenario_with_parameters(scenario: Scenario, values: Dict[str, float]) -> Scenario:
+    """
+    Returns a copy of the scenario where the given parameters take the given values. The parameters are named as in
+    sensitivity_parameters: "papp" makes the fraction of app adopters constant, and "DeltaATapp" and "DeltaATnoapp"
+    are the positions of the notification-to-test delays, which must be DeltaMeasures.
+    """
+    available_parameters = sensitivity_parameters(scenario)
+    changes = {}
+    for name, value in values.items():
+        if name not in available_parameters:
+            raise ValueError(
+                f"Unknown parameter {name!r}, must be among {available_parameters}."
+            )
+        if name.startswith("ss"):  # A component, e.g. ssapp[1]
+            field_name, g = name[:-1].split("[")
+            g = int(g)
+            components = list(changes.get(field_name, getattr(scenario, field_name)))
+            components[g] = value
+            changes[field_name] = components
+        elif name == "papp":
+            changes["papp"] = lambda t, value=value: value
+        elif name.startswith("DeltaAT"):
+            field_name = "p_" + name
+            changes[field_name] = DeltaMeasure(
+                position=value, height=getattr(scenario, field_name).height
+            )
+        else:
+            changes[name] = value
+    return dataclasses.replace(scenario, **changes)
+
+
+@dataclass
+class InverseSolution:
+    """
+    Result of solve_for_target: the value of the parameters reaching the target, the reproduction number there, and
+    the number of evaluations of the model (i.e. of stationary steps or time evolutions) that were computed.
+    """
+
+    parameters: List[str]
+    value: float
+    R: float
+    n_evaluations: int
+    step_data: StepData  # The stationary step, or the last step of the time evolution
+
+    @property
+    def Eff(self) -> float:
+        return effectiveness_from_R(self.R)
+
+
+def solve_for_target(
+    scenario: Scenario,
+    parameters: Union[str, Sequence[str]],
+    bracket: Tuple[float, float],
+    real_range: RealRange,
+    target_R: Optional[float] = None,
+    target_Eff: Optional[float] = None,
+    n_iterations: Optional[int] = None,
+    xtol: float = 1e-4,
+    max_evaluations: int = 50,
+    interpolation: str = "linear",
+    quadrature: str = "trapezoid",
+) -> InverseSolution:
+    """
+    Finds the value of the free parameters, within bracket, for which the reproduction number of the scenario equals
+    target_R (or the effectiveness equals target_Eff).
+    :param scenario: the base Scenario object, whose other parameters are kept fixed.
+    :param parameters: the name of the free parameter (see scenario_with_parameters), or a list of names of
+    parameters that are set to the same value (e.g. ["ssapp[1]", "ssnoapp[1]"]).
+    :param bracket: the interval (a, b) of values of the parameters, such that the reproduction number crosses the
+    target between a and b: a ValueError is raised otherwise.
+    :param real_range: a RealRange object specifying the upper integration bound and the real numbers on which the
+    functions and densities are sampled.
+    :param target_R: the target reproduction number.
+    :param target_Eff: the target effectiveness (see effectiveness_from_R), if target_R is not given.
+    :param n_iterations: if None, the reproduction number is the limit R_∞ of the time evolution, computed with the
+    stationary step solver, for which the scenario must not depend on time (see compute_stationary_step_data).
+    Otherwise, it is the one of the last step of the time evolution with n_iterations steps (see
+    compute_time_evolution_on_grid), which cannot be warm-started.
+    :param xtol: the tolerance on the value of the parameters.
+    :param max_evaluations: the maximum number of evaluations of the model.
+    :param interpolation: see compute_time_evolution_on_grid. The linear interpolation makes the reproduction number a
+    continuous function of the parameters, while with the floor interpolation it has small jumps.
+    :param quadrature: see compute_time_evolution_on_grid.
+    :return: The InverseSolution object.
+    """
+    if (target_R is None) == (target_Eff is None):
+        raise ValueError("Exactly one between target_R and target_Eff must be given.")
+    if target_R is None:
+        target_R = R0 * (1 - target_Eff)  # Inverse of effectiveness_from_R
+    parameters = [parameters] if isinstance(parameters, str) else list(parameters)
+    precomputed = get_precomputed_epidemic_data(scenario.beta0_gs, real_range)
+
+    evaluations: Dict[float, StepData] = {}
+
+    def evaluate(value: float) -> StepData:
+        if value in evaluations:
+            return evaluations[value]
+        if len(evaluations) >= max_evaluations:
+            raise RuntimeError(
+                f"The target was not reached within {max_evaluations} evaluations."
+            )
+        value_scenario = scenario_with_parameters(
+            scenario, {name: value for name in parameters}
+        )
+        if n_iterations is None:
+            closest_value = min(evaluations, key=lambda v: abs(v - value), default=None)
+            step_data = compute_stationary_step_data(
+                value_scenario,
+                real_range,
+                interpolation=interpolation,
+                quadrature=quadrature,
+                initial_step_data=(
+                    None if closest_value is None else evaluations[closest_value]
+                ),
+                precomputed=precomputed,
+            )
+        else:
+            step_data = compute_time_evolution_on_grid(
+                value_scenario,
+                real_range,
+                n_iterations=n_iterations,
+                verbose=False,
+                interpolation=interpolation,
+                quadrature=quadrature,
+                precomputed=precomputed,
+            )[-1]
+        evaluations[value] = step_data
+        return step_data
+
+    def solution(value: float) -> InverseSolution:
+        step_data = evaluate(value)
+        return InverseSolution(
+            parameters=parameters,
+            value=value,
+            R=step_data.R,
+            n_evaluations=len(evaluations),
+            step_data=step_data,
+        )
+
+    residual = lambda value: evaluate(value).R - target_R
+    a, b = bracket
+    residual_a, residual_b = residual(a), residual(b)
+    if residual_a == 0:
+        return solution(a)
+    if residual_b == 0:
+        return solution(b)
+    if (residual_a > 0) == (residual_b > 0):
+        raise ValueError(
+            f"The target R={target_R} is not crossed within the bracket {bracket}, where R goes from "
+            f"{residual_a + target_R} to {residual_b + target_R}."
+        )
+    value = optimize.brentq(residual, a, b, xtol=xtol, maxiter=max_evaluations)
+    return solution(value)
@@ -1,15 +1,39 @@
-from typing import Tuple, List, Callable
+import math
+from typing import Tuple, List, Callable, Optional
 
-from bsp_epidemic_suppression_model.model_utilities.epidemic_data import R0
+from bsp_epidemic_suppression_model.model_utilities.epidemic_data import R0, FS
 from bsp_epidemic_suppression_model.math_utilities.functions_utils import (
     convolve,
     ImproperProbabilityDensity,
+    Range,
     ProbabilityCumulativeFunction,
     ImproperProbabilityCumulativeFunction,
     integrate,
 )
 
 
+def compute_FAs_from_FS(
+    ssapp: List[float], ssnoapp: List[float], FS: ProbabilityCumulativeFunction = FS
+) -> Tuple[
+    List[ImproperProbabilityCumulativeFunction],
+    List[ImproperProbabilityCumulativeFunction],
+]:
+    """
+    Computes the components of the CDF F^{A,s} of the time of notification due to symptoms, which are the CDF FS of the
+    time of symptoms onset, rescaled by the probabilities of notification after symptoms.
+    :param ssapp: the probabilities of notification after symptoms, given severity, for people with the app.
+    :param ssnoapp: the probabilities of notification after symptoms, given severity, for people without the app.
+    :param FS: the CDF of the time of symptoms onset, e.g. the method FS of a PrecomputedEpidemicData object.
+    :return: FAsapp_ti_gs, FAsnoapp_ti_gs.
+    """
+    gs = range(len(ssapp))  # Values of severity G
+
+    FAsapp_ti_gs = [lambda tau, g=g: ssapp[g] * FS(tau) for g in gs]
+    FAsnoapp_ti_gs = [lambda tau, g=g: ssnoapp[g] * FS(tau) for g in gs]
+
+    return FAsapp_ti_gs, FAsnoapp_ti_gs
+
+
 def compute_FA_from_FAs_and_previous_step_data(
     FAsapp_ti_gs: List[ImproperProbabilityCumulativeFunction],
     FAsnoapp_ti_gs: List[ImproperProbabilityCumulativeFunction],
@@ -92,25 +116,34 @@ def compute_FA_from_FAs_and_previous_step_data(
 
 
 def compute_FT_from_FA_and_DeltaAT(
-    FAapp_ti_gs: List[ImproperProbabilityCumulativeFunction],
-    FAnoapp_ti_gs: List[ImproperProbabilityCumulativeFunction],
+    FAapp_ti_gs: Optional[List[ImproperProbabilityCumulativeFunction]],
+    FAnoapp_ti_gs: Optional[List[ImproperProbabilityCumulativeFunction]],
     p_DeltaATapp: ImproperProbabilityDensity,
     p_DeltaATnoapp: ImproperProbabilityDensity,
+    real_range: Optional[Range] = None,
 ) -> Tuple[
-    List[ImproperProbabilityCumulativeFunction],
-    List[ImproperProbabilityCumulativeFunction],
+    Optional[List[ImproperProbabilityCumulativeFunction]],
+    Optional[List[ImproperProbabilityCumulativeFunction]],
 ]:
     """Implements the formula giving each component of the test time CDF F^T as a convolution of the respective
-    components of the notification time CDF F^A and the notification-to-test distribution Delta^{A -> T}."""
-    gs = range(len(FAapp_ti_gs))  # Values of severity G
-
-    FTapp_ti_gs = []
-    FTnoapp_ti_gs = []
-    for g in gs:
-        FTapp_ti_g = convolve(f=FAapp_ti_gs[g], delta=p_DeltaATapp)
-        FTapp_ti_gs.append(FTapp_ti_g)
-        FTnoapp_ti_g = convolve(f=FAnoapp_ti_gs[g], delta=p_DeltaATnoapp)
-        FTnoapp_ti_gs.append(FTnoapp_ti_g)
+    components of the notification time CDF F^A and the notification-to-test distribution Delta^{A -> T}.
+    The range real_range is needed only if Delta^{A -> T} is not a DeltaMeasure, for the convolution of the sampled
+    functions (see convolve). The components of a skipped branch (see degenerate_branches) are None, and so are the
+    ones returned for it."""
+
+    def convolve_branch(
+        FA_ti_gs: Optional[List[ImproperProbabilityCumulativeFunction]],
+        p_DeltaAT: ImproperProbabilityDensity,
+    ) -> Optional[List[ImproperProbabilityCumulativeFunction]]:
+        if FA_ti_gs is None:  # Skipped branch
+            return None
+        return [
+            convolve(f=FA_ti_g, delta=p_DeltaAT, real_range=real_range)
+            for FA_ti_g in FA_ti_gs
+        ]
+
+    FTapp_ti_gs = convolve_branch(FAapp_ti_gs, p_DeltaATapp)
+    FTnoapp_ti_gs = convolve_branch(FAnoapp_ti_gs, p_DeltaATnoapp)
 
     return FTapp_ti_gs, FTnoapp_ti_gs
 
@@ -129,14 +162,17 @@ def suppressed_beta_from_test_cdf(
 
 
 def compute_beta_and_R_components_from_FT(
-    FTapp_ti_gs: List[ImproperProbabilityCumulativeFunction],
-    FTnoapp_ti_gs: List[ImproperProbabilityCumulativeFunction],
+    FTapp_ti_gs: Optional[List[ImproperProbabilityCumulativeFunction]],
+    FTnoapp_ti_gs: Optional[List[ImproperProbabilityCumulativeFunction]],
     beta0_ti_gs: List[Callable[[float], float]],
     xi: float,
     tau_max: float,
+    quadrature: str = "quad",
+    step: Optional[float] = None,
+    real_range: Optional[Range] = None,
 ) -> Tuple[
-    List[Callable[[float], float]],
-    List[Callable[[float], float]],
+    Optional[List[Callable[[float], float]]],
+    Optional[List[Callable[[float], float]]],
     List[float],
     List[float],
 ]:
@@ -150,29 +186,66 @@ def compute_beta_and_R_components_from_FT(
     :param beta0_ti_gs: the list of default infectiousness distributions (one per severity component).
     :param xi: the probability of self-isolation given a positive test result.
     :param tau_max: maximum relative time when doing numerical integrations.
+    :param quadrature: the quadrature rule used for the integrals, see integrate.
+    :param step: the step of the composite quadrature rules.
+    :param real_range: if given, the range from 0 to tau_max whose points are used by the composite quadrature rules
+    instead of the step, e.g. a NonUniformRange.
+    The components of F^T of a skipped branch (see degenerate_branches) are None: the ones of beta returned for it are
+    None as well, and the ones of R are NaN.
     """
-    gs = range(len(FTapp_ti_gs))  # Values of severity G
+    gs = range(len(beta0_ti_gs))  # Values of severity G
+
+    def compute_branch(
+        FT_ti_gs: Optional[List[ImproperProbabilityCumulativeFunction]],
+    ) -> Tuple[Optional[List[Callable[[float], float]]], List[float]]:
+        if FT_ti_gs is None:  # Skipped branch
+            return None, [math.nan for _ in gs]
+        beta_ti_gs = [
+            suppressed_beta_from_test_cdf(
+                beta0_component=beta0_ti_gs[g], FT_component=FT_ti_gs[g], xi=xi
+            )
+            for g in gs
+        ]
+        R_ti_gs = [
+            integrate(
+                f=beta_ti_g,
+                a=0,
+                b=tau_max,
+                quadrature=quadrature,
+                step=step,
+                real_range=real_range,
+            )
+            for beta_ti_g in beta_ti_gs
+        ]
+        return beta_ti_gs, R_ti_gs
+
+    betaapp_ti_gs, Rapp_ti_gs = compute_branch(FTapp_ti_gs)
+    betanoapp_ti_gs, Rnoapp_ti_gs = compute_branch(FTnoapp_ti_gs)
 
-    betaapp_ti_gs = []
-    betanoapp_ti_gs = []
-    Rapp_ti_gs = []
-    Rnoapp_ti_gs = []
-    for g in gs:
-        rapp_ti_g = suppressed_beta_from_test_cdf(
-            beta0_component=beta0_ti_gs[g], FT_component=FTapp_ti_gs[g], xi=xi
-        )
-        betaapp_ti_gs.append(rapp_ti_g)
-        rnoapp_ti_g = suppressed_beta_from_test_cdf(
-            beta0_component=beta0_ti_gs[g], FT_component=FTnoapp_ti_gs[g], xi=xi
-        )
-        betanoapp_ti_gs.append(rnoapp_ti_g)
+    return betaapp_ti_gs, betanoapp_ti_gs, Rapp_ti_gs, Rnoapp_ti_gs
 
-        Rapp_ti_g = integrate(f=rapp_ti_g, a=0, b=tau_max)
-        Rapp_ti_gs.append(Rapp_ti_g)
-        Rnoapp_ti_g = integrate(f=rnoapp_ti_g, a=0, b=tau_max)
-        Rnoapp_ti_gs.append(Rnoapp_ti_g)
 
-    return betaapp_ti_gs, betanoapp_ti_gs, Rapp_ti_gs, Rnoapp_ti_gs
+def degenerate_branches(papp_ti: float) -> Tuple[bool, bool]:
+    """
+    Tells whether the app and the no-app branches of a step are degenerate, i.e. have vanishing weight papp_ti or
+    1 - papp_ti (e.g. in the homogeneous scenario, where papp=0). Such a branch does not contribute to the step, nor to
+    the following ones, so the engines can skip it: its components of F^T and beta are then None, its components of R
+    and its limits NaN, and its tildeFT vanishes.
+    """
+    return papp_ti == 0, papp_ti == 1
+
+
+def combine_branches(papp_ti: float, app_value, noapp_value):
+    """
+    Returns the mixture papp_ti * app_value + (1 - papp_ti) * noapp_value of the values of a quantity (e.g. R, or the
+    samples of beta) for people with and without the app. A branch with vanishing weight is ignored, so that its value
+    can be NaN or None (see degenerate_branches); the result is the same as the one of the mixture otherwise.
+    """
+    if papp_ti == 0:
+        return noapp_value
+    if papp_ti == 1:
+        return app_value
+    return papp_ti * app_value + (1 - papp_ti) * noapp_value
 
 
 def effectiveness_from_R(R: float) -> float:
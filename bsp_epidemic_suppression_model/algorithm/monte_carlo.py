@@ -0,0 +1,305 @@
+"""
+Monte Carlo simulation of the branching process described by a scenario, to validate the model against a stochastic
+ground truth: unlike the time evolution formulae (see compute_FA_from_FAs_and_previous_step_data), it does not replace
+the contagion time tau^C of each pair of source and recipient by its expected value, nor average the testing times of
+the sources over their severities and app usage.
+Each generation is a population of individuals, sampled with vectorized NumPy operations: their severity (from p_gs),
+their app usage (from papp at their time of infection), their symptoms onset (from the incubation period distribution
+of FS), their notification after symptoms (with probability ssapp or ssnoapp) or by contact tracing from their source
+(with probability scapp or scnoapp, at the testing time of the source), and their testing time (after the
+notification-to-test delay). The first generation has no sources, like the first step of the time evolution.
+The reproduction number of a generation is the average number of infections caused by its individuals, where each one
+infects as in beta0_g before being tested, and as in (1 - xi) * beta0_g after. The individuals of the next generation
+are drawn from these infections, choosing the source in proportion to its expected number of infections and the
+contagion time from its suppressed infectiousness, so that the number of individuals per generation stays fixed: each
+generation is a sample of the individuals infected at a step of the time evolution.
+The individuals are simulated in independent batches, with their own random streams derived from a single seed, which
+can be distributed over a pool of processes: the results do not depend on the number of processes.
+"""
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+from scipy import stats
+
+from bsp_epidemic_suppression_model.math_utilities.functions_utils import (
+    DeltaMeasure,
+    ImproperProbabilityDensity,
+    Range,
+    array_from_f,
+)
+from bsp_epidemic_suppression_model.model_utilities.epidemic_data import (
+    incubation_mu,
+    incubation_sigma,
+)
+from bsp_epidemic_suppression_model.model_utilities.precomputed_epidemic_data import (
+    get_precomputed_epidemic_data,
+)
+from bsp_epidemic_suppression_model.model_utilities.scenario import Scenario
+
+DEFAULT_BATCH_SIZE = 10 ** 6
+
+# Sums over the individuals of a generation accumulated by each batch, i.e. the columns of the arrays returned by
+# _simulate_batch
+_SUMS = (
+    "n",  # Number of individuals
+    "t",  # Absolute times of infection
+    "R",  # Expected numbers of infections
+    "R2",  # Their squares
+    "n_app",  # Number of individuals with the app
+    "Rapp",  # Expected numbers of infections of the individuals with the app
+    "n_tested",  # Number of individuals tested within tau_max
+    "tauC",  # Expected contagion times, weighted by the expected numbers of infections
+)
+
+
+@dataclass
+class MonteCarloGeneration:
+    """
+    Estimates of the quantities of a generation of the simulated branching process, corresponding to the ones of a
+    StepData object. R_low and R_high are the bounds of the confidence interval for R.
+    """
+
+    n_individuals: int
+    t: float  # Average absolute time of infection
+    R: float
+    R_stderr: float
+    R_low: float
+    R_high: float
+    Rapp: float  # nan if no individual has the app
+    Rnoapp: float  # nan if all individuals have the app
+    papp: float  # Fraction of individuals having the app
+    tildepapp: float  # Probability that a source has the app
+    FT_infty: float  # Fraction of individuals tested within tau_max
+    EtauC: float
+
+
+def _cumulative_integral(f_values: np.ndarray, x_values: np.ndarray) -> np.ndarray:
+    """
+    Integrals with the trapezoid rule of the samples f_values from the first point to each point x_values.
+    """
+    return np.concatenate(
+        [[0.0], np.cumsum(np.diff(x_values) * (f_values[1:] + f_values[:-1]) / 2)]
+    )
+
+
+def _sample_delays(
+    p_DeltaAT: ImproperProbabilityDensity,
+    x_values: np.ndarray,
+    rng: np.random.Generator,
+    size: int,
+) -> np.ndarray:
+    """
+    Samples notification-to-test delays from the improper density p_DeltaAT, or infinity (i.e. no test) with the
+    missing probability. A continuous density is sampled by inverting its integral over the range.
+    """
+    u = rng.random(size)
+    if isinstance(p_DeltaAT, DeltaMeasure):
+        return np.where(u < p_DeltaAT.height, p_DeltaAT.position, np.inf)
+    cumulative = _cumulative_integral(array_from_f(p_DeltaAT, x_values), x_values)
+    return np.where(u < cumulative[-1], np.interp(u, cumulative, x_values), np.inf)
+
+
+def _simulate_batch(
+    scenario: Scenario,
+    real_range: Range,
+    n_generations: int,
+    n_individuals: int,
+    seed: np.random.SeedSequence,
+) -> np.ndarray:
+    """
+    Simulates n_generations generations of n_individuals individuals, returning the sums over each generation (see
+    _SUMS) as an array of shape (n_generations, len(_SUMS)).
+    """
+    rng = np.random.default_rng(seed)
+    precomputed = get_precomputed_epidemic_data(scenario.beta0_gs, real_range)
+    x_values = precomputed.x_values
+    xi = scenario.xi
+    gs = range(len(scenario.p_gs))  # Values of severity G
+
+    # Integrals of beta0_g and of tau * beta0_g up to each point of the range
+    beta0_cumulatives = np.stack(
+        [
+            _cumulative_integral(beta0_g_values, x_values)
+            for beta0_g_values in precomputed.beta0_gs_values
+        ]
+    )
+    tau_beta0_cumulatives = np.stack(
+        [
+            _cumulative_integral(x_values * beta0_g_values, x_values)
+            for beta0_g_values in precomputed.beta0_gs_values
+        ]
+    )
+    R0_gs = beta0_cumulatives[:, -1]
+    first_moments = tau_beta0_cumulatives[:, -1]
+    ssapp = np.array(scenario.ssapp, dtype=float)
+    ssnoapp = np.array(scenario.ssnoapp, dtype=float)
+
+    sums = np.zeros((n_generations, len(_SUMS)))
+    t = np.full(n_individuals, float(scenario.t_0))
+    source_app = source_T = tauC = None
+    for i in range(n_generations):
+        severity = rng.choice(len(gs), size=n_individuals, p=scenario.p_gs)
+        app = rng.random(n_individuals) < array_from_f(scenario.papp, t)
+
+        # Notification after symptoms, at their onset
+        tauS = np.exp(
+            incubation_mu + incubation_sigma * rng.standard_normal(n_individuals)
+        )
+        ss = np.where(app, ssapp[severity], ssnoapp[severity])
+        tauA = np.where(rng.random(n_individuals) < ss, tauS, np.inf)
+
+        # Notification by contact tracing, when the source is tested (or at the infection, if the source was tested
+        # before it)
+        if source_T is not None:
+            sc = np.where(app & source_app, scenario.scapp, scenario.scnoapp)
+            tauAc = np.where(
+                rng.random(n_individuals) < sc, np.maximum(source_T - tauC, 0), np.inf
+            )
+            tauA = np.minimum(tauA, tauAc)
+
+        T = tauA + np.where(
+            app,
+            _sample_delays(scenario.p_DeltaATapp, x_values, rng, n_individuals),
+            _sample_delays(scenario.p_DeltaATnoapp, x_values, rng, n_individuals),
+        )
+
+        # Expected numbers of infections and contagion times, given the testing times
+        before_T = np.empty(n_individuals)  # Integral of beta0_g up to T
+        tau_before_T = np.empty(n_individuals)  # Integral of tau * beta0_g up to T
+        for g in gs:
+            is_g = severity == g
+            before_T[is_g] = np.interp(T[is_g], x_values, beta0_cumulatives[g])
+            tau_before_T[is_g] = np.interp(T[is_g], x_values, tau_beta0_cumulatives[g])
+        R = before_T + (1 - xi) * (R0_gs[severity] - before_T)
+        tau_R = tau_before_T + (1 - xi) * (first_moments[severity] - tau_before_T)
+
+        sums[i] = (
+            n_individuals,
+            t.sum(),
+            R.sum(),
+            (R ** 2).sum(),
+            app.sum(),
+            R[app].sum(),
+            (T <= real_range.x_max).sum(),
+            tau_R.sum(),
+        )
+        if i == n_generations - 1:
+            break
+
+        # The next generation: the sources are chosen in proportion to their expected numbers of infections, and the
+        # contagion times are sampled inverting the integral of the suppressed infectiousness, which is the one of
+        # beta0_g up to T, and (1 - xi) times it after T
+        sources = np.searchsorted(
+            np.cumsum(R), rng.random(n_individuals) * R.sum(), side="right"
+        )
+        sources = np.minimum(sources, n_individuals - 1)
+        u = rng.random(n_individuals) * R[sources]
+        source_before_T = before_T[sources]
+        after_T = u > source_before_T
+        target = u.copy()
+        if xi < 1:
+            target[after_T] = source_before_T[after_T] + (
+                u[after_T] - source_before_T[after_T]
+            ) / (1 - xi)
+        tauC = np.empty(n_individuals)
+        source_severity = severity[sources]
+        for g in gs:
+            is_g = source_severity == g
+            tauC[is_g] = np.interp(target[is_g], beta0_cumulatives[g], x_values)
+        t = t[sources] + tauC
+        source_app = app[sources]
+        source_T = T[sources]
+    return sums
+
+
+def _generation_from_sums(sums: np.ndarray, confidence: float) -> MonteCarloGeneration:
+    n, t, R, R2, n_app, Rapp, n_tested, tauC = sums
+    n = int(n)
+    mean_R = R / n
+    # The standard error neglects the correlations between individuals infected by the same source
+    R_stderr = np.sqrt(max(R2 / n - mean_R ** 2, 0) / max(n - 1, 1))
+    z = stats.norm.ppf((1 + confidence) / 2)
+    return MonteCarloGeneration(
+        n_individuals=n,
+        t=t / n,
+        R=mean_R,
+        R_stderr=R_stderr,
+        R_low=mean_R - z * R_stderr,
+        R_high=mean_R + z * R_stderr,
+        Rapp=Rapp / n_app if n_app > 0 else np.nan,
+        Rnoapp=(R - Rapp) / (n - n_app) if n_app < n else np.nan,
+        papp=n_app / n,
+        tildepapp=Rapp / R if R > 0 else np.nan,
+        FT_infty=n_tested / n,
+        EtauC=tauC / R if R > 0 else np.nan,
+    )
+
+
+def simulate_branching_process(
+    scenario: Scenario,
+    real_range: Range,
+    n_generations: int,
+    n_individuals: int,
+    seed: Optional[int] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_workers: Optional[int] = 1,
+    confidence: float = 0.95,
+) -> List[MonteCarloGeneration]:
+    """
+    Simulates the branching process of the scenario (see the docstring of the module) for n_generations generations,
+    and returns the estimates of the quantities of each generation, to be compared with the ones of the steps of
+    compute_time_evolution.
+    :param scenario: the Scenario object defining the input data of the model. Its beta0_gs must not depend on the
+    absolute time t.
+    :param real_range: a RealRange (or a NonUniformRange) object: the infectiousness is sampled over it, so that the
+    infections happen within [0, tau_max], like in the model.
+    :param n_generations: the number of generations.
+    :param n_individuals: the number of individuals per generation.
+    :param seed: the seed of the random streams of the batches.
+    :param batch_size: the maximum number of individuals simulated together, which bounds the memory used (about 200
+    bytes per individual).
+    :param max_workers: the number of worker processes among which the batches are distributed (None for the number
+    of CPUs). If larger than 1, the scenario must be picklable, e.g. compiled from a ScenarioSpec.
+    :param confidence: the confidence level of the intervals [R_low, R_high].
+    :return: The list of MonteCarloGeneration objects, one per generation.
+    """
+    if min(n_generations, n_individuals, batch_size) < 1:
+        raise ValueError(
+            "The numbers of generations and of individuals, and the batch size, must be at least 1."
+        )
+    precomputed = get_precomputed_epidemic_data(scenario.beta0_gs, real_range)
+    if precomputed.time_dependent_beta0:
+        raise ValueError("The simulation requires beta0_gs not depending on t.")
+    n_batches = -(-n_individuals // batch_size)
+    batch_sizes = [
+        n_individuals // n_batches + (1 if b < n_individuals % n_batches else 0)
+        for b in range(n_batches)
+    ]
+    batch_args = (
+        [scenario] * n_batches,
+        [real_range] * n_batches,
+        [n_generations] * n_batches,
+        batch_sizes,
+        np.random.SeedSequence(seed).spawn(n_batches),
+    )
+
+    if max_workers == 1 or n_batches == 1:
+        batch_sums = list(map(_simulate_batch, *batch_args))
+    else:
+        try:
+            pickle.dumps(scenario)
+        except (pickle.PicklingError, AttributeError, TypeError) as e:
+            raise ValueError(
+                "The scenario must be picklable to be simulated over several processes, e.g. compiled from a "
+                "ScenarioSpec."
+            ) from e
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            batch_sums = list(executor.map(_simulate_batch, *batch_args))
+
+    sums = np.sum(batch_sums, axis=0)
+    return [
+        _generation_from_sums(generation_sums, confidence) for generation_sums in sums
+    ]
@@ -0,0 +1,193 @@
+"""
+Runner distributing the time evolutions of a parameter sweep over a pool of processes.
+Since the scenarios contain arbitrary callables (e.g. lambdas for papp and beta0_gs), which cannot be pickled, they are
+not sent to the workers: each worker receives the parameters of its runs, and builds the scenarios itself by means of
+a scenario factory, that must be a function defined at the top level of a module. The factory can also return
+ScenarioSpecs, which are compiled into scenarios by the workers.
+"""
+import itertools
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from bsp_epidemic_suppression_model.math_utilities.functions_utils import RealRange
+from bsp_epidemic_suppression_model.model_utilities.scenario import Scenario
+from bsp_epidemic_suppression_model.model_utilities.scenario_spec import ScenarioSpec
+from bsp_epidemic_suppression_model.algorithm.model_blocks import effectiveness_from_R
+from bsp_epidemic_suppression_model.algorithm.results_store import ResultsStore
+from bsp_epidemic_suppression_model.algorithm.time_evolution_main_function import (
+    ENGINES,
+    compute_time_evolution,
+)
+from bsp_epidemic_suppression_model.algorithm.time_evolution_batch_function import (
+    compute_time_evolution_batch,
+)
+
+SWEEP_ENGINES = ENGINES + ("batch",)
+
+
+@dataclass
+class SweepRecord:
+    """
+    Result of one run of a parameter sweep.
+    """
+
+    params: Dict[str, Any]  # The parameters passed to the scenario factory
+    R_infty: float  # R at the last step
+    Eff_infty: float  # Effectiveness at the last step
+    steps: List[Dict[str, float]]  # The summaries of the StepData objects of the run
+
+
+def make_parameter_combinations(
+    parameter_grid: Dict[str, List[Any]]
+) -> List[Dict[str, Any]]:
+    """
+    Returns all the combinations of the values in parameter_grid, as dictionaries. The order is deterministic: the last
+    parameter varies fastest, like in nested loops.
+    """
+    names = list(parameter_grid)
+    return [
+        dict(zip(names, values))
+        for values in itertools.product(*(parameter_grid[name] for name in names))
+    ]
+
+
+def _run_chunk(
+    scenario_factory: Callable[..., Union[Scenario, ScenarioSpec]],
+    params_chunk: List[Dict[str, Any]],
+    real_range: RealRange,
+    n_iterations: int,
+    engine: str,
+    results_directory: Optional[str] = None,
+    first_run_index: int = 0,
+) -> List[SweepRecord]:
+    """
+    Computes the time evolutions of a chunk of runs, and writes them to the results store in results_directory (if
+    given), in the slots starting from first_run_index. This is executed in the worker processes.
+    """
+    scenarios = [scenario_factory(**params) for params in params_chunk]
+    scenarios = [
+        scenario.to_scenario() if isinstance(scenario, ScenarioSpec) else scenario
+        for scenario in scenarios
+    ]
+
+    if engine == "batch":
+        step_data_lists = compute_time_evolution_batch(
+            scenarios=scenarios, real_range=real_range, n_iterations=n_iterations
+        )
+    else:
+        step_data_lists = [
+            compute_time_evolution(
+                scenario=scenario,
+                real_range=real_range,
+                n_iterations=n_iterations,
+                verbose=False,
+                engine=engine,
+            )
+            for scenario in scenarios
+        ]
+
+    if results_directory is not None:
+        results_store = ResultsStore(results_directory, mode="r+")
+        for run_index, step_data_list in enumerate(step_data_lists, first_run_index):
+            results_store.write_run(run_index, step_data_list)
+        results_store.flush()
+
+    return [
+        SweepRecord(
+            params=params,
+            R_infty=step_data_list[-1].R,
+            Eff_infty=effectiveness_from_R(step_data_list[-1].R),
+            steps=[step_data.summary() for step_data in step_data_list],
+        )
+        for params, step_data_list in zip(params_chunk, step_data_lists)
+    ]
+
+
+def _iter_chunk_records(
+    chunk_args: Tuple[Sequence[Any], ...], max_workers: Optional[int]
+) -> Iterator[SweepRecord]:
+    """
+    Runs _run_chunk on the arguments of each chunk, in the current process if max_workers is 1, and yields the records
+    in the order of the chunks.
+    """
+    if max_workers == 1:
+        for records in map(_run_chunk, *chunk_args):
+            yield from records
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for records in executor.map(_run_chunk, *chunk_args):
+            yield from records
+
+
+def run_parameter_sweep(
+    parameter_grid: Dict[str, List[Any]],
+    scenario_factory: Callable[..., Union[Scenario, ScenarioSpec]],
+    real_range: RealRange,
+    n_iterations: int = 8,
+    engine: str = "grid",
+    max_workers: Optional[int] = None,
+    chunk_size: int = 16,
+    results_directory: Optional[str] = None,
+    store_grids: bool = False,
+) -> Iterator[SweepRecord]:
+    """
+    Runs the time evolution for every combination of the parameters in parameter_grid, distributing the runs over a
+    pool of processes, and yields the results in the order given by make_parameter_combinations, as soon as they are
+    available.
+    :param parameter_grid: dictionary associating to the name of each parameter the list of its values.
+    :param scenario_factory: function returning a Scenario or a ScenarioSpec, given the parameters of a run as keyword
+    arguments. It must be picklable, i.e. defined at the top level of a module.
+    :param real_range: a RealRange object specifying the upper integration bound and the real numbers on which the
+    functions and densities are sampled.
+    :param n_iterations: the number of iterations of each run.
+    :param engine: the engine of compute_time_evolution ("closures" or "grid"), or "batch" to evolve each chunk of runs
+    with compute_time_evolution_batch.
+    :param max_workers: the number of worker processes (by default, the number of CPUs). If 1, the runs are executed in
+    the current process.
+    :param chunk_size: the number of runs sent to a worker at a time.
+    :param results_directory: if given, the directory of a new ResultsStore where the workers write all the steps of
+    the runs, in the order of make_parameter_combinations, as soon as they are computed (see results_store.py).
+    :param store_grids: whether the results store also holds the samples of tildeFTapp and tildeFTnoapp.
+    The arguments are checked, and the results store is created, when the function is called, before iterating over
+    the records.
+    """
+    if engine not in SWEEP_ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}, must be one of {SWEEP_ENGINES}.")
+    try:
+        pickle.dumps(scenario_factory)
+    except (pickle.PicklingError, AttributeError, TypeError) as e:
+        raise ValueError(
+            "The scenario factory must be picklable, i.e. a function defined at the top level of a module."
+        ) from e
+
+    params_list = make_parameter_combinations(parameter_grid)
+    params_chunks = [
+        params_list[start : start + chunk_size]
+        for start in range(0, len(params_list), chunk_size)
+    ]
+    if results_directory is not None:
+        if not params_list:
+            raise ValueError("The parameter grid has no combinations to store.")
+        scenario = scenario_factory(**params_list[0])
+        ResultsStore.create(
+            results_directory,
+            n_runs=len(params_list),
+            n_steps=n_iterations,
+            n_severities=len(scenario.p_gs),
+            real_range=real_range,
+            store_grids=store_grids,
+            parameter_grid=parameter_grid,
+        )
+    chunk_args = (
+        [scenario_factory] * len(params_chunks),
+        params_chunks,
+        [real_range] * len(params_chunks),
+        [n_iterations] * len(params_chunks),
+        [engine] * len(params_chunks),
+        [results_directory] * len(params_chunks),
+        range(0, len(params_list), chunk_size),
+    )
+    return _iter_chunk_records(chunk_args, max_workers)
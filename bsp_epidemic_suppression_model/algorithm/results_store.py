@@ -0,0 +1,217 @@
+"""
+On-disk store of the results of many time evolutions (e.g. the runs of a parameter sweep), too large to be kept in
+memory. The scalar data of each step (see SCALAR_FIELDS), tildepgs and, optionally, the samples of tildeFTapp and
+tildeFTnoapp, are written into fixed-width NumPy arrays, memory-mapped from one .npy file per column, and described by
+a small JSON manifest. Each run has a fixed slot (e.g. its index in the sweep), so that several processes can write
+different runs at the same time without coordination, and the columns are read back without copies, as memory-mapped
+arrays.
+Layout of the directory:
+- manifest.json: the shape of the store, the range of the grids, and optionally the parameter grid of the sweep;
+- <field>.npy for each of the SCALAR_FIELDS, with shape (n_runs, n_steps);
+- tildepgs.npy, with shape (n_runs, n_steps, n_severities);
+- tildeFTapp_values.npy and tildeFTnoapp_values.npy, if the grids are stored, with shape (n_runs, n_steps, n_points);
+- n_steps_written.npy, with shape (n_runs,): the number of steps written for each run, 0 if it has not been written.
+The scalars of the steps that are not written (e.g. after the convergence of a run) are NaN.
+"""
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from bsp_epidemic_suppression_model.math_utilities.functions_utils import (
+    RealRange,
+    check_uniform_range,
+)
+from bsp_epidemic_suppression_model.algorithm.step_data import (
+    SCALAR_FIELDS,
+    StepData,
+    step_data_list_from_arrays,
+    step_data_list_to_arrays,
+)
+
+MANIFEST_NAME = "manifest.json"
+GRID_FIELDS = ("tildeFTapp_values", "tildeFTnoapp_values")
+
+
+class ResultsStore:
+    """
+    Store of the StepData objects of n_runs time evolutions of at most n_steps steps, in a directory created by
+    ResultsStore.create. It is opened read-only by default (mode="r"), or for writing runs with mode="r+".
+    """
+
+    def __init__(self, directory: str, mode: str = "r"):
+        if mode not in ("r", "r+"):
+            raise ValueError(f"Unknown mode {mode!r}, must be 'r' or 'r+'.")
+        self.directory = directory
+        self.mode = mode
+        with open(os.path.join(directory, MANIFEST_NAME)) as f:
+            self.manifest: Dict[str, Any] = json.load(f)
+        self._columns: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def create(
+        cls,
+        directory: str,
+        n_runs: int,
+        n_steps: int,
+        n_severities: int,
+        real_range: RealRange,
+        store_grids: bool = False,
+        grids_dtype: str = "float64",
+        parameter_grid: Optional[Dict[str, List[Any]]] = None,
+    ) -> "ResultsStore":
+        """
+        Creates a store in directory (which must not contain one already), allocating all its columns on disk, and
+        returns it opened for writing.
+        :param n_runs: the number of runs, i.e. of slots.
+        :param n_steps: the maximum number of steps of each run.
+        :param n_severities: the number of severities of the scenarios, i.e. the length of tildepgs.
+        :param real_range: the range over which tildeFTapp and tildeFTnoapp are sampled. It must be a RealRange, which is
+        stored as its bounds and step.
+        :param store_grids: whether to store the samples of tildeFTapp and tildeFTnoapp.
+        :param grids_dtype: the type of the stored samples, e.g. "float32" to halve their size.
+        :param parameter_grid: if given, the parameter grid of the sweep, whose combinations (see
+        make_parameter_combinations) correspond to the runs in order.
+        """
+        check_uniform_range(real_range, "The results store")
+        os.makedirs(directory, exist_ok=True)
+        manifest_path = os.path.join(directory, MANIFEST_NAME)
+        if os.path.exists(manifest_path):
+            raise FileExistsError(f"There is already a results store in {directory}.")
+
+        n_points = len(real_range.x_values)
+        shapes = {name: (n_runs, n_steps) for name in SCALAR_FIELDS}
+        shapes["tildepgs"] = (n_runs, n_steps, n_severities)
+        dtypes = {name: "float64" for name in shapes}
+        if store_grids:
+            for name in GRID_FIELDS:
+                shapes[name] = (n_runs, n_steps, n_points)
+                dtypes[name] = grids_dtype
+        for name, shape in shapes.items():
+            column = np.lib.format.open_memmap(
+                os.path.join(directory, f"{name}.npy"),
+                mode="w+",
+                dtype=dtypes[name],
+                shape=shape,
+            )
+            if name not in GRID_FIELDS:  # The grids are large, and left unset
+                column[...] = np.nan
+            column.flush()
+            del column
+        np.lib.format.open_memmap(
+            os.path.join(directory, "n_steps_written.npy"),
+            mode="w+",
+            dtype="int32",
+            shape=(n_runs,),
+        ).flush()
+
+        manifest = {
+            "n_runs": n_runs,
+            "n_steps": n_steps,
+            "n_severities": n_severities,
+            "n_points": n_points,
+            "real_range": [real_range.x_min, real_range.x_max, real_range.step],
+            "fields": list(shapes),
+            "store_grids": store_grids,
+            "parameter_grid": parameter_grid,
+        }
+        temporary_path = f"{manifest_path}.{os.getpid()}.tmp"
+        with open(temporary_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temporary_path, manifest_path)  # The store exists once complete
+        return cls(directory, mode="r+")
+
+    @property
+    def n_runs(self) -> int:
+        return self.manifest["n_runs"]
+
+    @property
+    def n_steps(self) -> int:
+        return self.manifest["n_steps"]
+
+    @property
+    def fields(self) -> List[str]:
+        return self.manifest["fields"]
+
+    @property
+    def real_range(self) -> RealRange:
+        x_min, x_max, step = self.manifest["real_range"]
+        return RealRange(x_min=x_min, x_max=x_max, step=step)
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Returns the memory-mapped array of a column (one of fields, or "n_steps_written"), whose first axis runs over
+        the runs. It is read-only unless the store is opened for writing.
+        """
+        if name not in self._columns:
+            if name not in self.fields and name != "n_steps_written":
+                raise KeyError(
+                    f"Unknown column {name!r}, must be one of {self.fields}."
+                )
+            self._columns[name] = np.load(
+                os.path.join(self.directory, f"{name}.npy"), mmap_mode=self.mode
+            )
+        return self._columns[name]
+
+    def write_run(self, run_index: int, step_data_list: List[StepData]) -> None:
+        """
+        Writes the StepData objects of a run in its slot. The writes are visible to the other processes mapping the
+        store as soon as they are done, and the number of steps written is updated last, so that they never see a
+        partially written run as written; they are saved to disk by flush, or when the process ends.
+        """
+        if self.mode != "r+":
+            raise ValueError("The results store is opened read-only.")
+        if len(step_data_list) > self.n_steps:
+            raise ValueError(
+                f"The run has {len(step_data_list)} steps, the store at most {self.n_steps}."
+            )
+        n = len(step_data_list)
+        arrays = step_data_list_to_arrays(step_data_list)
+        for name in self.fields:
+            column = self.column(name)
+            column[run_index, :n] = arrays[name]
+            if name not in GRID_FIELDS:
+                column[run_index, n:] = np.nan
+        self.column("n_steps_written")[run_index] = n
+
+    def flush(self) -> None:
+        """
+        Saves to disk the runs written so far.
+        """
+        for column in self._columns.values():
+            if isinstance(column, np.memmap) and self.mode == "r+":
+                column.flush()
+
+    def written_runs(self) -> np.ndarray:
+        """
+        Returns the indices of the runs that have been written.
+        """
+        return np.flatnonzero(self.column("n_steps_written"))
+
+    def read_run(self, run_index: int, interpolation: str = "floor") -> List[StepData]:
+        """
+        Reads back the StepData objects of a run, which requires the grids to be stored.
+        """
+        if not self.manifest["store_grids"]:
+            raise ValueError("The grids of tildeFTapp and tildeFTnoapp are not stored.")
+        n = int(self.column("n_steps_written")[run_index])
+        arrays = {
+            name: np.asarray(self.column(name)[run_index, :n], dtype=float)
+            for name in self.fields
+        }
+        return step_data_list_from_arrays(arrays, self.real_range, interpolation)
+
+    def params(self, run_index: int) -> Dict[str, Any]:
+        """
+        Returns the parameters of a run, if the store was created with the parameter grid of the sweep.
+        """
+        parameter_grid = self.manifest["parameter_grid"]
+        if parameter_grid is None:
+            raise ValueError("The results store has no parameter grid.")
+        # The combinations are in the order of make_parameter_combinations, where the last parameter varies fastest
+        params = {}
+        for name in reversed(list(parameter_grid)):
+            run_index, value_index = divmod(run_index, len(parameter_grid[name]))
+            params[name] = parameter_grid[name][value_index]
+        return {name: params[name] for name in parameter_grid}
@@ -0,0 +1,428 @@
+"""
+Forward-mode sensitivities of the time evolution: the derivatives of R_i (and of the effectiveness) at each step with
+respect to the scalar parameters of the scenario, computed in a single pass of the grid engine, instead of running the
+time evolution twice per parameter with finite differences.
+Each quantity of the step is propagated together with its tangents, i.e. its derivatives with respect to all the
+parameters, stacked along an additional first axis of the arrays: e.g. the samples of F^T, with shape
+(n_severities, n_points), come with tangents with shape (n_parameters, n_severities, n_points). Every block of the
+step is linear in the tangents, so they are propagated with the same NumPy operations as the values, applied to arrays
+with one more axis.
+The parameters are the ones listed by sensitivity_parameters: the components of ssapp and ssnoapp (named e.g.
+"ssapp[1]"), scapp, scnoapp, xi, papp (meaning a uniform shift of the function papp(t)), and the positions of
+the notification-to-test delays DeltaATapp and DeltaATnoapp, if they are DeltaMeasures.
+The functions sampled over the range are evaluated at the next step interpolating linearly between the samples, and
+their derivatives with respect to tau are the slopes of the interpolation (see evaluate_slope_from_list): the
+derivatives are then the exact ones of the discretized model (away from the points of the range), which is not the case
+for the floor interpolation, whose samples are piecewise constant.
+"""
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from bsp_epidemic_suppression_model.math_utilities.functions_utils import (
+    DeltaMeasure,
+    Range,
+    convolve_values,
+    evaluate_from_list,
+    evaluate_slope_from_list,
+    integrate_values,
+)
+from bsp_epidemic_suppression_model.model_utilities.epidemic_data import R0, fS
+from bsp_epidemic_suppression_model.model_utilities.precomputed_epidemic_data import (
+    PrecomputedEpidemicData,
+    get_precomputed_epidemic_data,
+)
+from bsp_epidemic_suppression_model.model_utilities.scenario import Scenario
+
+from bsp_epidemic_suppression_model.algorithm.model_blocks import combine_branches
+from bsp_epidemic_suppression_model.algorithm.grid_model_blocks import (
+    severity_sum,
+    suppressed_beta_values_from_test_cdf_values,
+)
+from bsp_epidemic_suppression_model.algorithm.step_data import StepData
+
+# Step of the central differences giving the derivatives with respect to the absolute time t of papp and, if they
+# depend on t, of beta0_gs
+TIME_DERIVATIVE_STEP = 1e-4
+
+
+def sensitivity_parameters(scenario: Scenario) -> List[str]:
+    """
+    Returns the names of the scalar parameters of the scenario with respect to which the sensitivities can be computed.
+    """
+    gs = range(scenario.n_severities)
+    return (
+        [f"ssapp[{g}]" for g in gs]
+        + [f"ssnoapp[{g}]" for g in gs]
+        + ["scapp", "scnoapp", "xi", "papp"]
+        + [
+            name
+            for name, p_DeltaAT in (
+                ("DeltaATapp", scenario.p_DeltaATapp),
+                ("DeltaATnoapp", scenario.p_DeltaATnoapp),
+            )
+            if isinstance(p_DeltaAT, DeltaMeasure)
+        ]
+    )
+
+
+@dataclass
+class Sensitivities:
+    """
+    Result of compute_time_evolution_sensitivities: the StepData objects of the time evolution, and the derivatives of
+    some of their quantities with respect to the parameters, as arrays with one row per step and one column per
+    parameter.
+    """
+
+    parameters: List[str]
+    step_data_list: List[StepData]
+    R_jacobian: np.ndarray
+    EtauC_jacobian: np.ndarray
+    tildepapp_jacobian: np.ndarray
+
+    @property
+    def Eff_jacobian(self) -> np.ndarray:
+        """
+        Derivatives of the effectiveness (see effectiveness_from_R) at each step with respect to the parameters.
+        """
+        return -self.R_jacobian / R0
+
+    def ranked_parameters(self, step: int = -1) -> List[Tuple[str, float]]:
+        """
+        Returns the pairs (parameter, derivative of the effectiveness at the given step), sorted by decreasing absolute
+        value of the derivative, i.e. from the most to the least effective lever.
+        """
+        derivatives = self.Eff_jacobian[step].tolist()
+        return sorted(zip(self.parameters, derivatives), key=lambda pair: -abs(pair[1]))
+
+
+def _time_derivative(f: Callable[[float], np.ndarray], t: float) -> np.ndarray:
+    h = TIME_DERIVATIVE_STEP
+    return (np.asarray(f(t + h)) - np.asarray(f(t - h))) / (2 * h)
+
+
+def _tangent_severity_sum(weights_gs: np.ndarray, tangents: np.ndarray) -> np.ndarray:
+    """
+    Counterpart of severity_sum for the tangents of values stacked along the severities, whose second axis runs over
+    the severities.
+    """
+    return severity_sum(weights_gs, np.moveaxis(tangents, 1, 0))
+
+
+def compute_time_evolution_sensitivities(
+    scenario: Scenario,
+    real_range: Range,
+    n_iterations: int = 6,
+    parameters: Optional[Sequence[str]] = None,
+    quadrature: str = "trapezoid",
+    precomputed: Optional[PrecomputedEpidemicData] = None,
+) -> Sensitivities:
+    """
+    Computes the time evolution of the scenario like compute_time_evolution_on_grid with linear interpolation, together
+    with the derivatives of R, E(tau^C) and tildepapp at each step with respect to the parameters (see the docstring of
+    the module). Both the app and the no-app branches are computed, also when one of them has vanishing weight, since
+    the derivatives with respect to papp depend on both.
+    :param scenario: the Scenario object defining the input data of the model.
+    :param real_range: a RealRange (or a NonUniformRange) object specifying the upper integration bound and the real
+    numbers on which the functions and densities are sampled.
+    :param n_iterations: the number of iterations.
+    :param parameters: the names of the parameters (see sensitivity_parameters), by default all of them.
+    :param quadrature: the quadrature rule used for the integrals over real_range ("trapezoid" or "simpson").
+    :param precomputed: the samples over real_range of FS and of the scenario's beta0_gs (see iter_time_evolution).
+    :return: The Sensitivities object.
+    """
+    available_parameters = sensitivity_parameters(scenario)
+    if parameters is None:
+        parameters = available_parameters
+    unknown_parameters = [
+        name for name in parameters if name not in available_parameters
+    ]
+    if unknown_parameters:
+        raise ValueError(
+            f"Unknown parameters {unknown_parameters}, must be among {available_parameters}."
+        )
+    parameters = list(parameters)
+    n_parameters = len(parameters)
+
+    def seed(name: str) -> np.ndarray:
+        """Tangent of a parameter, i.e. its derivatives with respect to all the parameters."""
+        tangent = np.zeros(n_parameters)
+        if name in parameters:
+            tangent[parameters.index(name)] = 1.0
+        return tangent
+
+    precomputed = get_precomputed_epidemic_data(
+        scenario.beta0_gs, real_range, precomputed
+    )
+    tau_max = real_range.x_max
+    x_values = precomputed.x_values
+    gs = range(scenario.n_severities)
+
+    # Values stacked along the severities, and tangents with an additional first axis running over the parameters
+    p_gs = np.array(scenario.p_gs, dtype=float)
+    ssapp = np.array(scenario.ssapp, dtype=float)[:, np.newaxis]
+    ssnoapp = np.array(scenario.ssnoapp, dtype=float)[:, np.newaxis]
+    dssapp = np.stack([seed(f"ssapp[{g}]") for g in gs], axis=1)[..., np.newaxis]
+    dssnoapp = np.stack([seed(f"ssnoapp[{g}]") for g in gs], axis=1)[..., np.newaxis]
+    scapp, dscapp = scenario.scapp, seed("scapp")[:, np.newaxis]
+    scnoapp, dscnoapp = scenario.scnoapp, seed("scnoapp")[:, np.newaxis]
+    xi, dxi = scenario.xi, seed("xi")[:, np.newaxis, np.newaxis]
+
+    # State of the previous step: t, E(tau^C), tildepapp, and the CDFs of the notification time of the source F^N
+    t_i, dt_i = scenario.t_0, np.zeros(n_parameters)
+    previous_state = None
+
+    step_data_list = []
+    R_jacobian, EtauC_jacobian, tildepapp_jacobian = [], [], []
+
+    for _ in range(n_iterations):
+
+        def compute_FA(
+            ss: np.ndarray, dss: np.ndarray, FN_index: int, tau, dtau: np.ndarray
+        ) -> Tuple[np.ndarray, np.ndarray]:
+            """
+            Computes the samples of F^A at the points tau (depending on the parameters through their tangents dtau),
+            with their tangents.
+            """
+            FS_values = precomputed.FS(tau)
+            FAs_values = ss * FS_values
+            dFAs_values = dss * FS_values
+            if dtau.any():
+                dtau_values = dtau[:, np.newaxis, np.newaxis]
+                dFAs_values = dFAs_values + ss * fS(tau) * dtau_values
+            if previous_state is None:
+                return FAs_values, dFAs_values
+            EtauC_tim1, dEtauC_tim1, FN_values, dFN_values = previous_state
+            shifted_tau = tau + EtauC_tim1
+            FAc_values = evaluate_from_list(
+                FN_values[FN_index], real_range, shifted_tau, interpolation="linear"
+            )
+            # The points where F^N is evaluated depend on the parameters as well
+            dshifted_tau = (dtau + dEtauC_tim1)[:, np.newaxis]
+            dFAc_values = (
+                evaluate_from_list(
+                    dFN_values[:, FN_index],
+                    real_range,
+                    shifted_tau,
+                    interpolation="linear",
+                )
+                + evaluate_slope_from_list(FN_values[FN_index], real_range, shifted_tau)
+                * dshifted_tau
+            )[:, np.newaxis]
+            FA_values = FAs_values + FAc_values - FAs_values * FAc_values
+            dFA_values = dFAs_values * (1 - FAc_values) + dFAc_values * (1 - FAs_values)
+            return FA_values, dFA_values
+
+        def compute_FT(
+            ss: np.ndarray,
+            dss: np.ndarray,
+            FN_index: int,
+            p_DeltaAT,
+            DeltaAT_name: str,
+        ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+            """
+            Computes the samples of F^T, as the convolution of F^A and the notification-to-test delay, with their
+            tangents, and the components of its limit (its values at tau_max).
+            """
+            if isinstance(p_DeltaAT, DeltaMeasure):
+                dposition = seed(DeltaAT_name)
+                FA_values, dFA_values = compute_FA(
+                    ss, dss, FN_index, x_values - p_DeltaAT.position, -dposition
+                )
+                FA_infty_gs, _ = compute_FA(
+                    ss,
+                    dss,
+                    FN_index,
+                    np.array([tau_max - p_DeltaAT.position]),
+                    -dposition,
+                )
+                return (
+                    p_DeltaAT.height * FA_values,
+                    p_DeltaAT.height * dFA_values,
+                    p_DeltaAT.height * FA_infty_gs,
+                )
+            FA_values, dFA_values = compute_FA(
+                ss, dss, FN_index, x_values, np.zeros(n_parameters)
+            )
+            FT_values = convolve_values(FA_values, p_DeltaAT, real_range)
+            return (
+                FT_values,
+                convolve_values(dFA_values, p_DeltaAT, real_range),
+                evaluate_from_list(
+                    FT_values, real_range, tau_max, interpolation="linear"
+                ),
+            )
+
+        FTapp_values, dFTapp_values, FTapp_infty_gs = compute_FT(
+            ssapp, dssapp, 0, scenario.p_DeltaATapp, "DeltaATapp"
+        )
+        FTnoapp_values, dFTnoapp_values, FTnoapp_infty_gs = compute_FT(
+            ssnoapp, dssnoapp, 1, scenario.p_DeltaATnoapp, "DeltaATnoapp"
+        )
+
+        # beta and R, per branch
+        beta0_values = np.stack(precomputed.beta0_ti_gs_values(t_i))
+        dbeta0_values = None
+        if precomputed.time_dependent_beta0:
+            dbeta0_values = (
+                _time_derivative(
+                    lambda t: np.stack(precomputed.beta0_ti_gs_values(t)), t_i
+                )
+                * dt_i[:, np.newaxis, np.newaxis]
+            )
+
+        def compute_beta_and_R(
+            FT_values: np.ndarray, dFT_values: np.ndarray
+        ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+            beta_values = suppressed_beta_values_from_test_cdf_values(
+                beta0_component_values=beta0_values,
+                FT_component_values=FT_values,
+                xi=xi,
+            )
+            dbeta_values = -beta0_values * (dFT_values * xi + FT_values * dxi)
+            if dbeta0_values is not None:
+                dbeta_values = dbeta_values + dbeta0_values * (1 - FT_values * xi)
+            return (
+                beta_values,
+                dbeta_values,
+                integrate_values(beta_values, real_range, quadrature),
+                integrate_values(dbeta_values, real_range, quadrature),
+            )
+
+        betaapp_gs, dbetaapp_gs, Rapp_gs, dRapp_gs = compute_beta_and_R(
+            FTapp_values, dFTapp_values
+        )
+        betanoapp_gs, dbetanoapp_gs, Rnoapp_gs, dRnoapp_gs = compute_beta_and_R(
+            FTnoapp_values, dFTnoapp_values
+        )
+
+        # Aggregates over the severities and the branches
+        papp_ti = scenario.papp(t_i)
+        dpapp_ti = seed("papp") + _time_derivative(scenario.papp, t_i) * dt_i
+
+        def combine(app_value, noapp_value, dapp_value, dnoapp_value):
+            """Mixture of the branches (see combine_branches), with its tangents."""
+            dpapp = np.reshape(dpapp_ti, (-1,) + (1,) * np.ndim(app_value))
+            return (
+                combine_branches(papp_ti, app_value, noapp_value),
+                dpapp * (app_value - noapp_value)
+                + papp_ti * dapp_value
+                + (1 - papp_ti) * dnoapp_value,
+            )
+
+        Rapp_ti = float(severity_sum(p_gs, Rapp_gs))
+        Rnoapp_ti = float(severity_sum(p_gs, Rnoapp_gs))
+        dRapp_ti = _tangent_severity_sum(p_gs, dRapp_gs)
+        dRnoapp_ti = _tangent_severity_sum(p_gs, dRnoapp_gs)
+        R_ti, dR_ti = combine(Rapp_ti, Rnoapp_ti, dRapp_ti, dRnoapp_ti)
+        R_ti_gs, dR_ti_gs = combine(Rapp_gs, Rnoapp_gs, dRapp_gs, dRnoapp_gs)
+        beta_values, dbeta_values = combine(
+            severity_sum(p_gs, betaapp_gs),
+            severity_sum(p_gs, betanoapp_gs),
+            _tangent_severity_sum(p_gs, dbetaapp_gs),
+            _tangent_severity_sum(p_gs, dbetanoapp_gs),
+        )
+
+        # Source-based probabilities and distributions
+        EtauC_ti = (
+            integrate_values(x_values * beta_values, real_range, quadrature) / R_ti
+        )
+        dEtauC_ti = (
+            integrate_values(x_values * dbeta_values, real_range, quadrature)
+            - EtauC_ti * dR_ti
+        ) / R_ti
+        tildepapp_ti = papp_ti * Rapp_ti / R_ti
+        dtildepapp_ti = (
+            dpapp_ti * Rapp_ti + papp_ti * dRapp_ti - tildepapp_ti * dR_ti
+        ) / R_ti
+        tildep_ti_gs = p_gs * R_ti_gs / R_ti
+        dtildep_ti_gs = (p_gs * dR_ti_gs - np.outer(dR_ti, tildep_ti_gs)) / R_ti
+
+        def source_based_FT(
+            FT_values: np.ndarray, dFT_values: np.ndarray
+        ) -> Tuple[np.ndarray, np.ndarray]:
+            return (
+                severity_sum(tildep_ti_gs, FT_values),
+                _tangent_severity_sum(tildep_ti_gs, dFT_values)
+                + (dtildep_ti_gs[..., np.newaxis] * FT_values).sum(axis=1),
+            )
+
+        tildeFTapp_values, dtildeFTapp_values = source_based_FT(
+            FTapp_values, dFTapp_values
+        )
+        tildeFTnoapp_values, dtildeFTnoapp_values = source_based_FT(
+            FTnoapp_values, dFTnoapp_values
+        )
+
+        FTapp_ti_infty = float(severity_sum(p_gs, np.reshape(FTapp_infty_gs, -1)))
+        FTnoapp_ti_infty = float(severity_sum(p_gs, np.reshape(FTnoapp_infty_gs, -1)))
+        step_data_list.append(
+            StepData(
+                real_range=real_range,
+                t=t_i,
+                papp=papp_ti,
+                tildepapp=tildepapp_ti,
+                tildepgs=tildep_ti_gs.tolist(),
+                EtauC=EtauC_ti,
+                FT_infty=combine_branches(papp_ti, FTapp_ti_infty, FTnoapp_ti_infty),
+                FTapp_infty=FTapp_ti_infty,
+                FTnoapp_infty=FTnoapp_ti_infty,
+                tildeFTapp=tildeFTapp_values,
+                tildeFTnoapp=tildeFTnoapp_values,
+                R=R_ti,
+                Rapp=Rapp_ti,
+                Rnoapp=Rnoapp_ti,
+                interpolation="linear",
+            )
+        )
+        R_jacobian.append(dR_ti)
+        EtauC_jacobian.append(dEtauC_ti)
+        tildepapp_jacobian.append(dtildepapp_ti)
+
+        # CDFs of the notification time of the source, given that the recipient has or does not have the app (see
+        # compute_FA_from_FAs_and_previous_step_data), for the next step
+        FNapp_values = (
+            scapp * tildepapp_ti * tildeFTapp_values
+            + scnoapp * (1 - tildepapp_ti) * tildeFTnoapp_values
+        )
+        dFNapp_values = (
+            dscapp * tildepapp_ti * tildeFTapp_values
+            + scapp
+            * (
+                dtildepapp_ti[:, np.newaxis] * tildeFTapp_values
+                + tildepapp_ti * dtildeFTapp_values
+            )
+            + dscnoapp * (1 - tildepapp_ti) * tildeFTnoapp_values
+            + scnoapp
+            * (
+                (1 - tildepapp_ti) * dtildeFTnoapp_values
+                - dtildepapp_ti[:, np.newaxis] * tildeFTnoapp_values
+            )
+        )
+        tildeFT_values = (
+            tildepapp_ti * tildeFTapp_values + (1 - tildepapp_ti) * tildeFTnoapp_values
+        )
+        dtildeFT_values = (
+            dtildepapp_ti[:, np.newaxis] * (tildeFTapp_values - tildeFTnoapp_values)
+            + tildepapp_ti * dtildeFTapp_values
+            + (1 - tildepapp_ti) * dtildeFTnoapp_values
+        )
+        FNnoapp_values = scnoapp * tildeFT_values
+        dFNnoapp_values = dscnoapp * tildeFT_values + scnoapp * dtildeFT_values
+
+        previous_state = (
+            EtauC_ti,
+            dEtauC_ti,
+            np.stack([FNapp_values, FNnoapp_values]),
+            np.stack([dFNapp_values, dFNnoapp_values], axis=1),
+        )
+        t_i, dt_i = t_i + EtauC_ti, dt_i + dEtauC_ti
+
+    return Sensitivities(
+        parameters=parameters,
+        step_data_list=step_data_list,
+        R_jacobian=np.array(R_jacobian),
+        EtauC_jacobian=np.array(EtauC_jacobian),
+        tildepapp_jacobian=np.array(tildepapp_jacobian),
+    )
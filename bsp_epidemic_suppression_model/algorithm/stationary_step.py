@@ -0,0 +1,150 @@
+"""
+Solver computing directly the stationary step that the time evolution converges to, when the scenario does not depend
+on time.
+"""
+from typing import List, Optional
+
+import numpy as np
+
+from bsp_epidemic_suppression_model.math_utilities.functions_utils import RealRange
+from bsp_epidemic_suppression_model.model_utilities.precomputed_epidemic_data import (
+    PrecomputedEpidemicData,
+    get_precomputed_epidemic_data,
+)
+from bsp_epidemic_suppression_model.model_utilities.scenario import (
+    Scenario,
+    ScenarioError,
+)
+from bsp_epidemic_suppression_model.algorithm.step_data import StepData
+from bsp_epidemic_suppression_model.algorithm.time_evolution_grid_function import (
+    compute_time_evolution_on_grid,
+)
+
+
+def _state_from_step_data(step_data: StepData) -> np.ndarray:
+    """The quantities of a step that determine the next one, as a single vector."""
+    return np.concatenate(
+        (
+            [step_data.tildepapp, step_data.EtauC],
+            step_data.tildeFTapp_values,
+            step_data.tildeFTnoapp_values,
+        )
+    )
+
+
+def _step_data_from_state(state: np.ndarray, step_data: StepData) -> StepData:
+    """Inverse of _state_from_step_data: the other data are taken from step_data."""
+    n = len(step_data.tildeFTapp_values)
+    return StepData(
+        real_range=step_data.real_range,
+        t=step_data.t,
+        papp=step_data.papp,
+        tildepapp=float(np.clip(state[0], 0, 1)),
+        tildepgs=step_data.tildepgs,
+        EtauC=float(max(state[1], 0)),
+        FT_infty=step_data.FT_infty,
+        FTapp_infty=step_data.FTapp_infty,
+        FTnoapp_infty=step_data.FTnoapp_infty,
+        tildeFTapp=np.clip(state[2 : 2 + n], 0, 1),
+        tildeFTnoapp=np.clip(state[2 + n :], 0, 1),
+        R=step_data.R,
+        Rapp=step_data.Rapp,
+        Rnoapp=step_data.Rnoapp,
+        interpolation=step_data.interpolation,
+    )
+
+
+def compute_stationary_step_data(
+    scenario: Scenario,
+    real_range: RealRange,
+    tolerance: float = 1e-8,
+    max_iterations: int = 50,
+    memory: int = 5,
+    interpolation: str = "floor",
+    quadrature: str = "trapezoid",
+    initial_step_data: Optional[StepData] = None,
+    precomputed: Optional[PrecomputedEpidemicData] = None,
+) -> StepData:
+    """
+    Computes the stationary step of the algorithm, i.e. the fixed point of the map giving a step of
+    compute_time_evolution_on_grid from the previous one, which is the limit of the time evolution. The fixed point is
+    found by Anderson-accelerated iteration of the map on the arrays of the samples of tildeFTapp and tildeFTnoapp
+    (together with tildepapp and E(tau^C)), which usually needs far fewer steps than the time evolution.
+    The scenario must not depend on time, i.e. papp and beta0_gs must be constant in t: a ScenarioError is raised if
+    papp is found to change.
+    :param scenario: the Scenario object defining the input data of the mode.
+    :param real_range: a RealRange object specifying the upper integration bound and the real numbers on which the
+    functions and densities are sampled.
+    :param tolerance: the iteration stops when the map changes the state by less than this (in sup norm).
+    :param max_iterations: the maximum number of evaluations of the map.
+    :param memory: the number of previous iterates used by Anderson acceleration.
+    :param interpolation: see compute_time_evolution_on_grid.
+    :param quadrature: see compute_time_evolution_on_grid.
+    :param initial_step_data: if given, the iteration starts from this step instead of the first step of the time
+    evolution, e.g. from the stationary step of a scenario differing slightly from this one (a warm start).
+    :param precomputed: the samples over real_range of FS and of the scenario's beta0_gs (see iter_time_evolution).
+    :return: The StepData object of the stationary step.
+    """
+    papp_0 = scenario.papp(scenario.t_0)
+    precomputed = get_precomputed_epidemic_data(
+        scenario.beta0_gs, real_range, precomputed
+    )
+
+    def step(previous_step_data: Optional[StepData]) -> StepData:
+        (step_data,) = compute_time_evolution_on_grid(
+            scenario=scenario,
+            real_range=real_range,
+            n_iterations=1,
+            verbose=False,
+            initial_step_data=previous_step_data,
+            interpolation=interpolation,
+            quadrature=quadrature,
+            precomputed=precomputed,
+        )
+        if step_data.papp != papp_0:
+            raise ScenarioError(
+                "The stationary step can be computed only if papp does not depend on time."
+            )
+        return step_data
+
+    step_data = step(initial_step_data)
+    state = _state_from_step_data(step_data)
+    states_differences: List[np.ndarray] = []
+    residuals_differences: List[np.ndarray] = []
+    previous_mapped_state = previous_residual = None
+
+    for _ in range(max_iterations):
+        step_data = step(_step_data_from_state(state, step_data))
+        mapped_state = _state_from_step_data(step_data)
+        residual = mapped_state - state
+        if np.max(np.abs(residual)) < tolerance:
+            return step_data
+
+        if previous_residual is not None:
+            residuals_differences.append(residual - previous_residual)
+            states_differences.append(mapped_state - previous_mapped_state)
+            del residuals_differences[:-memory], states_differences[:-memory]
+        previous_mapped_state, previous_residual = mapped_state, residual
+
+        if residuals_differences:
+            # Anderson acceleration: combine the last iterates, so as to minimize the combined residual
+            gammas = np.linalg.lstsq(
+                np.array(residuals_differences).T, residual, rcond=None
+            )[0]
+            state = mapped_state - np.array(states_differences).T @ gammas
+        else:
+            state = mapped_state
+
+    raise RuntimeError(
+        f"The stationary step did not converge within {max_iterations} iterations."
+    )
+
+
+def compute_R_infinity(scenario: Scenario, real_range: RealRange, **kwargs) -> float:
+    """
+    Computes the limit of the effective reproduction number R of the time evolution, for a scenario not depending on
+    time. See compute_stationary_step_data, that takes the same arguments.
+    """
+    return compute_stationary_step_data(
+        scenario=scenario, real_range=real_range, **kwargs
+    ).R
@@ -1,22 +1,54 @@
-from typing import List
+from typing import Dict, List, Optional, Union
+
+import numpy as np
 
 from bsp_epidemic_suppression_model.math_utilities.functions_utils import (
-    RealRange,
+    Range,
     ImproperProbabilityCumulativeFunction,
     list_from_f,
-    f_from_list,
+    evaluate_from_list,
 )
 
 
+def _sampled_values(
+    f: Union[ImproperProbabilityCumulativeFunction, List[float]], real_range: Range
+) -> np.ndarray:
+    """Returns the samples of f over real_range as a contiguous float64 array, sampling f if it is a function."""
+    if callable(f):
+        f = list_from_f(f=f, real_range=real_range)
+    return np.ascontiguousarray(f, dtype=float)
+
+
 class StepData:
     """
     Class containing all the data produced at each step of the algorithm.
-    Some of these data are functions, but are stored in this class as lists of values.
+    Some of these data are functions, but are stored in this class as arrays of values: they can be passed either as
+    functions, that are then sampled over real_range, or directly as their sampled values. They are evaluated by the
+    methods tildeFTapp and tildeFTnoapp, that accept floats or arrays of floats, interpolating the samples as specified
+    by interpolation (see evaluate_from_list).
     """
 
+    __slots__ = (
+        "real_range",
+        "t",
+        "papp",
+        "tildepapp",
+        "tildepgs",
+        "EtauC",
+        "FT_infty",
+        "FTapp_infty",
+        "FTnoapp_infty",
+        "tildeFTapp_values",
+        "tildeFTnoapp_values",
+        "R",
+        "Rapp",
+        "Rnoapp",
+        "interpolation",
+    )
+
     def __init__(
         self,
-        real_range: RealRange,
+        real_range: Range,
         t: float,  # Absolute time of this step
         papp: float,  # Probability that an infected at t has the app
         tildepapp: float,  # Probability that a source infected at t has the app
@@ -27,13 +59,14 @@ class StepData:
         FT_infty: float,  # Probability that an infected at t tests positive
         FTapp_infty: float,  # Probability that an infected at t with the app tests positive
         FTnoapp_infty: float,  # Probability that an infected at t without the app tests positive
-        tildeFTapp: ImproperProbabilityCumulativeFunction,
+        tildeFTapp: Union[ImproperProbabilityCumulativeFunction, List[float]],
         # Distribution of testing time for source infected at t with app
-        tildeFTnoapp: ImproperProbabilityCumulativeFunction,
+        tildeFTnoapp: Union[ImproperProbabilityCumulativeFunction, List[float]],
         # Distribution of testing time for source infected at t with no app
         R: float,
         Rapp: float,
         Rnoapp: float,
+        interpolation: str = "floor",
     ):
         self.real_range = real_range
         self.t = t
@@ -44,18 +77,113 @@ class StepData:
         self.FT_infty = FT_infty
         self.FTapp_infty = FTapp_infty
         self.FTnoapp_infty = FTnoapp_infty
-        self.tildeFTapp_values = list_from_f(f=tildeFTapp, real_range=real_range)
-        self.tildeFTnoapp_values = list_from_f(f=tildeFTnoapp, real_range=real_range)
+        self.tildeFTapp_values = _sampled_values(tildeFTapp, real_range)
+        self.tildeFTnoapp_values = _sampled_values(tildeFTnoapp, real_range)
         self.R = R
         self.Rapp = Rapp
         self.Rnoapp = Rnoapp
+        self.interpolation = interpolation
+
+    def summary(self) -> Dict[str, float]:
+        """
+        Returns the scalar data of the step (i.e. all but the sampled functions), as a dictionary.
+        """
+        return {name: float(getattr(self, name)) for name in SCALAR_FIELDS}
 
     def tildeFTapp(self, tau):
-        return f_from_list(f_values=self.tildeFTapp_values, real_range=self.real_range)(
-            tau
+        return evaluate_from_list(
+            self.tildeFTapp_values, self.real_range, tau, self.interpolation
         )
 
     def tildeFTnoapp(self, tau):
-        return f_from_list(
-            f_values=self.tildeFTnoapp_values, real_range=self.real_range
-        )(tau)
+        return evaluate_from_list(
+            self.tildeFTnoapp_values, self.real_range, tau, self.interpolation
+        )
+
+
+SCALAR_FIELDS = (
+    "t",
+    "papp",
+    "tildepapp",
+    "EtauC",
+    "FT_infty",
+    "FTapp_infty",
+    "FTnoapp_infty",
+    "R",
+    "Rapp",
+    "Rnoapp",
+)
+
+
+def has_converged(
+    previous_step_data: Optional[StepData],
+    step_data: StepData,
+    R_tolerance: Optional[float] = None,
+    tildeFT_tolerance: Optional[float] = None,
+) -> bool:
+    """
+    Tells whether the time evolution has converged at step_data, i.e. whether its R and its functions tildeFTapp and
+    tildeFTnoapp (in sup norm) differ from the ones of the previous step by less than the given tolerances. Tolerances
+    that are None are not checked, and if both are None the evolution is never considered converged.
+    """
+    if previous_step_data is None or (
+        R_tolerance is None and tildeFT_tolerance is None
+    ):
+        return False
+    if R_tolerance is not None:
+        if abs(step_data.R - previous_step_data.R) >= R_tolerance:
+            return False
+    if tildeFT_tolerance is not None:
+        tildeFT_change = max(
+            np.max(
+                np.abs(
+                    step_data.tildeFTapp_values - previous_step_data.tildeFTapp_values
+                )
+            ),
+            np.max(
+                np.abs(
+                    step_data.tildeFTnoapp_values
+                    - previous_step_data.tildeFTnoapp_values
+                )
+            ),
+        )
+        if tildeFT_change >= tildeFT_tolerance:
+            return False
+    return True
+
+
+def step_data_list_to_arrays(step_data_list: List[StepData]) -> Dict[str, np.ndarray]:
+    """
+    Stacks the data of a list of StepData objects into arrays, one per attribute, whose first axis runs over the steps.
+    """
+    arrays = {
+        name: np.array([getattr(step_data, name) for step_data in step_data_list])
+        for name in SCALAR_FIELDS
+    }
+    arrays["tildepgs"] = np.array([step_data.tildepgs for step_data in step_data_list])
+    arrays["tildeFTapp_values"] = np.array(
+        [step_data.tildeFTapp_values for step_data in step_data_list]
+    )
+    arrays["tildeFTnoapp_values"] = np.array(
+        [step_data.tildeFTnoapp_values for step_data in step_data_list]
+    )
+    return arrays
+
+
+def step_data_list_from_arrays(
+    arrays: Dict[str, np.ndarray], real_range: Range, interpolation: str = "floor"
+) -> List[StepData]:
+    """
+    Inverse of step_data_list_to_arrays.
+    """
+    return [
+        StepData(
+            real_range=real_range,
+            **{name: float(arrays[name][i]) for name in SCALAR_FIELDS},
+            tildepgs=arrays["tildepgs"][i].tolist(),
+            tildeFTapp=arrays["tildeFTapp_values"][i],
+            tildeFTnoapp=arrays["tildeFTnoapp_values"][i],
+            interpolation=interpolation,
+        )
+        for i in range(len(arrays["t"]))
+    ]
@@ -0,0 +1,68 @@
+"""
+Sinks consuming the StepData objects yielded by iter_time_evolution one at a time, so that long time evolutions can be
+stored or monitored without keeping all their steps in memory.
+A sink is any function taking a StepData object, e.g. the method append of a list, or a CSVStepDataWriter.
+"""
+import csv
+from typing import Callable, Iterable, List, Optional, Sequence, TextIO, Union
+
+from bsp_epidemic_suppression_model.algorithm.step_data import (
+    StepData,
+    SCALAR_FIELDS,
+)
+
+StepDataSink = Callable[[StepData], None]
+
+
+class CSVStepDataWriter:
+    """
+    Sink writing some scalar attributes (by default, the ones in SCALAR_FIELDS) of each StepData object as a row of a
+    CSV file, with a header row. The components of tildepgs are written in the columns tildepgs_0, tildepgs_1, ... if
+    "tildepgs" is among the fields.
+    It can be used as a context manager, closing the file at the end if it was opened by the writer.
+    """
+
+    def __init__(self, file: Union[str, TextIO], fields: Sequence[str] = SCALAR_FIELDS):
+        self._owns_file = isinstance(file, str)
+        self._file = open(file, "w", newline="") if self._owns_file else file
+        self._fields = list(fields)
+        self._writer: Optional[csv.DictWriter] = None
+
+    def __call__(self, step_data: StepData) -> None:
+        row = {}
+        for field in self._fields:
+            if field == "tildepgs":
+                for g, tildep_g in enumerate(step_data.tildepgs):
+                    row[f"tildepgs_{g}"] = float(tildep_g)
+            else:
+                row[field] = float(getattr(step_data, field))
+        if self._writer is None:
+            self._writer = csv.DictWriter(self._file, fieldnames=list(row))
+            self._writer.writeheader()
+        self._writer.writerow(row)
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._owns_file:
+            self._file.close()
+
+    def __enter__(self) -> "CSVStepDataWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def consume_time_evolution(
+    step_data_iterable: Iterable[StepData], sinks: List[StepDataSink]
+) -> Optional[StepData]:
+    """
+    Passes each StepData object of step_data_iterable (e.g. the iterator returned by iter_time_evolution) to all the
+    sinks, in order, as soon as it is available.
+    :return: The last StepData object, or None if there is none.
+    """
+    step_data = None
+    for step_data in step_data_iterable:
+        for sink in sinks:
+            sink(step_data)
+    return step_data
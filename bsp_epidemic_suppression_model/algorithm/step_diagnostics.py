@@ -0,0 +1,192 @@
+"""
+Diagnostics of the steps of the algorithm, computed only when requested.
+The diagnostics of a step are a record, i.e. a dictionary of plain values that can be printed (see
+format_step_diagnostics), logged or stored. Their level of detail is one of DIAGNOSTICS:
+- "none": nothing is computed;
+- "summary": the quantities already computed by the step (reproduction numbers, probabilities, E(tau^C), ...);
+- "full": in addition, the limits for tau -> ∞ of F^{A_s}, F^A and F^T, which require evaluating them at tau_max.
+"""
+import math
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from bsp_epidemic_suppression_model.math_utilities.functions_utils import (
+    ImproperProbabilityCumulativeFunction,
+    round2,
+    round2_list,
+)
+from bsp_epidemic_suppression_model.model_utilities.scenario import Scenario
+from bsp_epidemic_suppression_model.algorithm.model_blocks import combine_branches
+
+DIAGNOSTICS = ("none", "summary", "full")
+
+
+def compute_limits(
+    Fapp_ti_gs: Optional[List[ImproperProbabilityCumulativeFunction]],
+    Fnoapp_ti_gs: Optional[List[ImproperProbabilityCumulativeFunction]],
+    p_gs: List[float],
+    papp_ti: float,
+    tau_max: float,
+) -> Tuple[List[float], List[float], float, float, float]:
+    """
+    Computes the limits for tau -> ∞ (i.e. the values at tau_max) of the app and no-app components of an improper CDF,
+    and of their aggregates. The limits of a skipped branch (whose components are None, see degenerate_branches) are
+    NaN, and do not enter F_ti_infty.
+    :return: Fapp_ti_gs_infty, Fnoapp_ti_gs_infty, Fapp_ti_infty, Fnoapp_ti_infty, F_ti_infty.
+    """
+    gs = range(len(p_gs))  # Values of severity G
+
+    def branch_limits(F_ti_gs) -> Tuple[List[float], float]:
+        if F_ti_gs is None:  # Skipped branch
+            return [math.nan for _ in gs], math.nan
+        F_ti_gs_infty = [float(F_ti_gs[g](tau_max)) for g in gs]
+        return F_ti_gs_infty, sum(p_gs[g] * F_ti_gs_infty[g] for g in gs)
+
+    Fapp_ti_gs_infty, Fapp_ti_infty = branch_limits(Fapp_ti_gs)
+    Fnoapp_ti_gs_infty, Fnoapp_ti_infty = branch_limits(Fnoapp_ti_gs)
+    F_ti_infty = combine_branches(papp_ti, Fapp_ti_infty, Fnoapp_ti_infty)
+
+    return (
+        Fapp_ti_gs_infty,
+        Fnoapp_ti_gs_infty,
+        Fapp_ti_infty,
+        Fnoapp_ti_infty,
+        F_ti_infty,
+    )
+
+
+def _limits_record(limits: Tuple) -> Dict[str, Any]:
+    Fapp_gs_infty, Fnoapp_gs_infty, Fapp_infty, Fnoapp_infty, F_infty = limits
+    return {
+        "app_gs": Fapp_gs_infty,
+        "noapp_gs": Fnoapp_gs_infty,
+        "app": float(Fapp_infty),
+        "noapp": float(Fnoapp_infty),
+        "total": float(F_infty),
+    }
+
+
+def resolve_diagnostics_level(
+    diagnostics: Optional[str],
+    verbose: bool,
+    diagnostics_sink: Optional[Callable[[Dict[str, Any]], None]],
+) -> str:
+    """
+    Returns the level of the diagnostics to compute: the given one, or by default "full" if the diagnostics are printed
+    or sent to a sink, and "none" otherwise.
+    """
+    if diagnostics is None:
+        return "full" if verbose or diagnostics_sink is not None else "none"
+    if diagnostics not in DIAGNOSTICS:
+        raise ValueError(
+            f"Unknown diagnostics level {diagnostics!r}, must be one of {DIAGNOSTICS}."
+        )
+    return diagnostics
+
+
+def compute_step_diagnostics(
+    diagnostics: str,
+    i: int,
+    t_i: float,
+    scenario: Scenario,
+    tau_max: float,
+    FAsapp_ti_gs: List[ImproperProbabilityCumulativeFunction],
+    FAsnoapp_ti_gs: List[ImproperProbabilityCumulativeFunction],
+    FAapp_ti_gs: List[ImproperProbabilityCumulativeFunction],
+    FAnoapp_ti_gs: List[ImproperProbabilityCumulativeFunction],
+    FTapp_ti_gs: List[ImproperProbabilityCumulativeFunction],
+    FTnoapp_ti_gs: List[ImproperProbabilityCumulativeFunction],
+    Rapp_ti_gs: List[float],
+    Rnoapp_ti_gs: List[float],
+    Rapp_ti: float,
+    Rnoapp_ti: float,
+    R_ti_gs: List[float],
+    R_ti: float,
+    tildepapp_ti: float,
+    tildep_ti_gs: List[float],
+    EtauC_ti: float,
+    FT_ti_infty: float,
+) -> Optional[Dict[str, Any]]:
+    """
+    Returns the record of the diagnostics of the step i of the algorithm, at the given level (see DIAGNOSTICS), or
+    None if the level is "none". The limits of F^{A_s} are omitted at the first step, where they coincide with the ones
+    of F^A.
+    """
+    if diagnostics == "none":
+        return None
+
+    papp_ti = scenario.papp(t_i)
+
+    record = {
+        "step": i,
+        "t": float(t_i),
+        "papp": float(papp_ti),
+        "tildepapp": float(tildepapp_ti),
+        "p_gs": [float(p_g) for p_g in scenario.p_gs],
+        "tildep_gs": [float(tildep_g) for tildep_g in tildep_ti_gs],
+        "Rapp_gs": [float(Rapp_g) for Rapp_g in Rapp_ti_gs],
+        "Rnoapp_gs": [float(Rnoapp_g) for Rnoapp_g in Rnoapp_ti_gs],
+        "Rapp": float(Rapp_ti),
+        "Rnoapp": float(Rnoapp_ti),
+        "R_gs": [float(R_g) for R_g in R_ti_gs],
+        "R": float(R_ti),
+        "EtauC": float(EtauC_ti),
+        "FT_infty": float(FT_ti_infty),
+    }
+
+    if diagnostics == "full":
+        if i != 0:
+            record["FAs_limits"] = _limits_record(
+                compute_limits(
+                    FAsapp_ti_gs, FAsnoapp_ti_gs, scenario.p_gs, papp_ti, tau_max
+                )
+            )
+        record["FA_limits"] = _limits_record(
+            compute_limits(FAapp_ti_gs, FAnoapp_ti_gs, scenario.p_gs, papp_ti, tau_max)
+        )
+        record["FT_limits"] = _limits_record(
+            compute_limits(FTapp_ti_gs, FTnoapp_ti_gs, scenario.p_gs, papp_ti, tau_max)
+        )
+
+    return record
+
+
+def _format_limits(name: str, limits: Dict[str, Any]) -> str:
+    return (
+        f" {name}app_ti_gs(∞)={round2_list(limits['app_gs'])}\n"
+        f" {name}noapp_ti_gs(∞)={round2_list(limits['noapp_gs'])}\n"
+        f" {name}app_ti(∞)={round2(limits['app'])}\n"
+        f" {name}noapp_ti(∞)={round2(limits['noapp'])}\n"
+        f" {name}_ti(∞)={round2(limits['total'])}\n"
+    )
+
+
+def format_step_diagnostics(record: Dict[str, Any]) -> str:
+    """
+    Returns a printable recap of the diagnostics record of a step.
+    """
+    step_recap = f"step {record['step']}, t_i={round2(record['t'])}\n"
+
+    limits_recap = "".join(
+        _format_limits(name, record[f"{name}_limits"])
+        for name in ("FAs", "FA", "FT")
+        if f"{name}_limits" in record
+    )
+
+    R_recap = (
+        f" Rapp_ti_gs={round2_list(record['Rapp_gs'])}\n"
+        f" Rnoapp_ti_gs={round2_list(record['Rnoapp_gs'])}\n"
+        f" Rapp_ti={round2(record['Rapp'])}\n"
+        f" Rnoapp_ti={round2(record['Rnoapp'])}\n"
+        f" R_ti_gs={round2_list(record['R_gs'])}\n"
+        f" R_ti={round2(record['R'])}\n"
+    )
+
+    other_recap = (
+        f" papp_ti={round2(record['papp'])}\n"
+        f" tildepapp_ti={round2(record['tildepapp'])}\n"
+        f" p_gs={round2_list(record['p_gs'])}\n"
+        f" tildep_ti_gs={round2_list(record['tildep_gs'])}\n"
+        f" E(tauC_ti)={round2(record['EtauC'])} \n"
+    )
+
+    return step_recap + limits_recap + R_recap + other_recap
@@ -0,0 +1,305 @@
+from dataclasses import dataclass
+from typing import List, Callable, Optional, Tuple
+
+import numpy as np
+
+from bsp_epidemic_suppression_model.math_utilities.functions_utils import (
+    Range,
+    DeltaMeasure,
+    ImproperProbabilityDensity,
+    array_from_f,
+    evaluate_from_list,
+    integrate_values,
+)
+
+from bsp_epidemic_suppression_model.model_utilities.precomputed_epidemic_data import (
+    get_precomputed_epidemic_data,
+)
+from bsp_epidemic_suppression_model.model_utilities.scenario import (
+    Scenario,
+    ScenarioError,
+)
+
+from bsp_epidemic_suppression_model.algorithm.model_blocks import (
+    compute_FAs_from_FS,
+    compute_FA_from_FAs_and_previous_step_data,
+    compute_FT_from_FA_and_DeltaAT,
+)
+from bsp_epidemic_suppression_model.algorithm.grid_model_blocks import (
+    compute_beta_and_R_components_from_FT_values,
+)
+from bsp_epidemic_suppression_model.algorithm.step_data import (
+    StepData,
+    has_converged,
+)
+
+
+def _column(values) -> np.ndarray:
+    """Arranges a sequence of per-scenario scalars as a column, that broadcasts against the (batch, range) arrays."""
+    return np.asarray(values, dtype=float).reshape(-1, 1)
+
+
+@dataclass(frozen=True)
+class _StackedDensity:
+    """Density whose samples have a batch axis, running over the given densities."""
+
+    densities: Tuple[Callable[[float], float], ...]
+
+    def __call__(self, tau: np.ndarray) -> np.ndarray:
+        return np.array([array_from_f(density, tau) for density in self.densities])
+
+
+def _stack_DeltaAT(p_DeltaATs: list) -> ImproperProbabilityDensity:
+    """
+    Stacks the notification-to-test distributions of several scenarios: DeltaMeasures into a single DeltaMeasure with
+    column position and height, and continuous densities into a density with a batch axis.
+    """
+    if all(isinstance(p_DeltaAT, DeltaMeasure) for p_DeltaAT in p_DeltaATs):
+        return DeltaMeasure(
+            position=_column([p_DeltaAT.position for p_DeltaAT in p_DeltaATs]),
+            height=_column([p_DeltaAT.height for p_DeltaAT in p_DeltaATs]),
+        )
+    if any(isinstance(p_DeltaAT, DeltaMeasure) for p_DeltaAT in p_DeltaATs):
+        raise ScenarioError(
+            "The batch engine cannot mix DeltaMeasure and continuous notification-to-test distributions."
+        )
+    return _StackedDensity(densities=tuple(p_DeltaATs))
+
+
+def _sample_beta0_component(
+    beta0_component: Callable[[float, float], float],
+    t_values: np.ndarray,
+    x_values: np.ndarray,
+) -> np.ndarray:
+    """
+    Samples a component of the default infectiousness (t, tau) -> beta^0_{t,g}(tau) at the absolute times t_values (a
+    column) and at the relative times x_values, calling it once on the whole grid if it supports array arguments.
+    """
+    shape = (len(t_values), len(x_values))
+    try:
+        return np.broadcast_to(
+            np.asarray(beta0_component(t_values, x_values), dtype=float), shape
+        ).copy()
+    except (TypeError, ValueError):
+        return np.array(
+            [
+                array_from_f(lambda tau: beta0_component(t, tau), x_values)
+                for t in t_values[:, 0]
+            ]
+        )
+
+
+def _sample_beta0_gs(
+    scenarios: List[Scenario], t_values: np.ndarray, real_range: Range
+) -> List[np.ndarray]:
+    """
+    Samples the default infectiousness components of all the scenarios, evaluating together the scenarios sharing the
+    same beta0_gs callables, or taking their precomputed samples if they do not depend on t.
+    """
+    n_severities = scenarios[0].n_severities
+    x_values = np.asarray(real_range.x_values)
+    beta0_gs_values = [
+        np.empty((len(scenarios), len(x_values))) for _ in range(n_severities)
+    ]
+
+    groups = {}
+    for b, scenario in enumerate(scenarios):
+        beta0_gs_ids = tuple(id(beta0) for beta0 in scenario.beta0_gs)
+        groups.setdefault(beta0_gs_ids, []).append(b)
+
+    for bs in groups.values():
+        beta0_gs = scenarios[bs[0]].beta0_gs
+        precomputed = get_precomputed_epidemic_data(beta0_gs, real_range)
+        for g in range(n_severities):
+            if precomputed.time_dependent_beta0:
+                beta0_gs_values[g][bs] = _sample_beta0_component(
+                    beta0_gs[g], t_values[bs], x_values
+                )
+            else:
+                beta0_gs_values[g][bs] = precomputed.beta0_gs_values[g]
+
+    return beta0_gs_values
+
+
+def compute_time_evolution_batch(
+    scenarios: List[Scenario],
+    real_range: Range,
+    n_iterations: int = 6,
+    interpolation: str = "floor",
+    quadrature: str = "trapezoid",
+    R_tolerance: Optional[float] = None,
+    tildeFT_tolerance: Optional[float] = None,
+) -> List[List[StepData]]:
+    """
+    Batched version of compute_time_evolution_on_grid: evolves all the given scenarios simultaneously, stacking their
+    scalar parameters (p_gs, ssapp, ssnoapp, scapp, scnoapp, xi, papp, and the positions and heights of Delta^{A -> T})
+    along a batch axis, so that each step is computed with a single set of NumPy operations on (batch, range) arrays.
+    The scenarios must have the same number of severities, and their notification-to-test distributions (for people
+    with, and without, the app) must be either all DeltaMeasures or all continuous densities. Scenarios sharing the
+    same beta0_gs callables have their infectiousness sampled together, or precomputed once if it does not depend on t
+    (see precomputed_epidemic_data.py).
+    :param scenarios: the list of Scenario objects to evolve.
+    :param real_range: a RealRange (or a NonUniformRange) object specifying the upper integration bound and the real
+    numbers on which the functions and densities are sampled.
+    :param n_iterations: the number of iterations.
+    :param interpolation: how the functions sampled on real_range are evaluated at the next step ("floor" or "linear").
+    :param quadrature: the quadrature rule used for the integrals over real_range ("trapezoid" or "simpson").
+    :param R_tolerance: tolerance on the changes of R stopping the iterations (see iter_time_evolution).
+    :param tildeFT_tolerance: tolerance on the changes of tildeFTapp and tildeFTnoapp stopping the iterations (see
+    iter_time_evolution). Each scenario stops as soon as it converges, so the lists can have different lengths: the
+    iterations stop when all the scenarios have converged.
+    :return: For each scenario, the list of its StepData objects, as it would be returned by compute_time_evolution.
+    """
+    if not scenarios:
+        return []
+    if len(set(scenario.n_severities for scenario in scenarios)) > 1:
+        raise ScenarioError("The scenarios must have the same number of severities.")
+
+    # FS is the same for all the scenarios
+    precomputed = get_precomputed_epidemic_data(scenarios[0].beta0_gs, real_range)
+    tau_max = real_range.x_max
+    x_values = precomputed.x_values
+    gs = range(scenarios[0].n_severities)  # Values of severity G
+
+    # Stacked parameters, as columns
+    p_gs = [_column([scenario.p_gs[g] for scenario in scenarios]) for g in gs]
+    ssapp = [_column([scenario.ssapp[g] for scenario in scenarios]) for g in gs]
+    ssnoapp = [_column([scenario.ssnoapp[g] for scenario in scenarios]) for g in gs]
+    scapp = _column([scenario.scapp for scenario in scenarios])
+    scnoapp = _column([scenario.scnoapp for scenario in scenarios])
+    xi = _column([scenario.xi for scenario in scenarios])
+    p_DeltaATapp = _stack_DeltaAT([scenario.p_DeltaATapp for scenario in scenarios])
+    p_DeltaATnoapp = _stack_DeltaAT([scenario.p_DeltaATnoapp for scenario in scenarios])
+
+    step_data_lists: List[List[StepData]] = [[] for _ in scenarios]
+    converged = [False for _ in scenarios]
+
+    for i in range(0, n_iterations):
+        # Compute FAs components
+        FAsapp_ti_gs, FAsnoapp_ti_gs = compute_FAs_from_FS(
+            ssapp=ssapp, ssnoapp=ssnoapp, FS=precomputed.FS
+        )
+
+        # Compute FA components
+        if i == 0:
+            t_i = _column([scenario.t_0 for scenario in scenarios])
+            FAapp_ti_gs = FAsapp_ti_gs
+            FAnoapp_ti_gs = FAsnoapp_ti_gs
+        else:
+            t_i = t_im1 + EtauC_tim1
+            FAapp_ti_gs, FAnoapp_ti_gs = compute_FA_from_FAs_and_previous_step_data(
+                FAsapp_ti_gs=FAsapp_ti_gs,
+                FAsnoapp_ti_gs=FAsnoapp_ti_gs,
+                tildepapp_tim1=tildepapp_tim1,
+                tildeFTapp_tim1=lambda tau, values=tildeFTapp_tim1_values: evaluate_from_list(
+                    values, real_range, tau, interpolation
+                ),
+                tildeFTnoapp_tim1=lambda tau, values=tildeFTnoapp_tim1_values: evaluate_from_list(
+                    values, real_range, tau, interpolation
+                ),
+                EtauC_tim1=EtauC_tim1,
+                scapp=scapp,
+                scnoapp=scnoapp,
+            )
+
+        # Compute FT components, and sample them
+        FTapp_ti_gs, FTnoapp_ti_gs = compute_FT_from_FA_and_DeltaAT(
+            FAapp_ti_gs=FAapp_ti_gs,
+            FAnoapp_ti_gs=FAnoapp_ti_gs,
+            p_DeltaATapp=p_DeltaATapp,
+            p_DeltaATnoapp=p_DeltaATnoapp,
+            real_range=real_range,
+        )
+        FTapp_ti_gs_values = [FTapp_ti_gs[g](x_values) for g in gs]
+        FTnoapp_ti_gs_values = [FTnoapp_ti_gs[g](x_values) for g in gs]
+
+        # Compute beta, R components
+        beta0_ti_gs_values = _sample_beta0_gs(scenarios, t_i, real_range)
+        (
+            betaapp_ti_gs_values,
+            betanoapp_ti_gs_values,
+            Rapp_ti_gs,
+            Rnoapp_ti_gs,
+        ) = compute_beta_and_R_components_from_FT_values(
+            FTapp_ti_gs=FTapp_ti_gs_values,
+            FTnoapp_ti_gs=FTnoapp_ti_gs_values,
+            beta0_ti_gs=beta0_ti_gs_values,
+            xi=xi,
+            real_range=real_range,
+            quadrature=quadrature,
+        )
+        Rapp_ti_gs = [_column(Rapp_ti_g) for Rapp_ti_g in Rapp_ti_gs]
+        Rnoapp_ti_gs = [_column(Rnoapp_ti_g) for Rnoapp_ti_g in Rnoapp_ti_gs]
+
+        # Compute aggregate beta (needed for EtauC), and R
+        papp_ti = _column(
+            [scenario.papp(t) for scenario, t in zip(scenarios, t_i[:, 0])]
+        )
+        betaapp_ti_values = sum(p_gs[g] * betaapp_ti_gs_values[g] for g in gs)
+        betanoapp_ti_values = sum(p_gs[g] * betanoapp_ti_gs_values[g] for g in gs)
+        beta_ti_values = (
+            papp_ti * betaapp_ti_values + (1 - papp_ti) * betanoapp_ti_values
+        )
+
+        Rapp_ti = sum(p_gs[g] * Rapp_ti_gs[g] for g in gs)
+        Rnoapp_ti = sum(p_gs[g] * Rnoapp_ti_gs[g] for g in gs)
+        R_ti_gs = [
+            papp_ti * Rapp_ti_gs[g] + (1 - papp_ti) * Rnoapp_ti_gs[g] for g in gs
+        ]
+        R_ti = papp_ti * Rapp_ti + (1 - papp_ti) * Rnoapp_ti
+
+        # Compute source-based probabilities and distributions
+        EtauC_ti = (
+            _column(integrate_values(x_values * beta_ti_values, real_range, quadrature))
+            / R_ti
+        )
+        tildepapp_ti = papp_ti * Rapp_ti / R_ti
+        tildep_ti_gs = [p_gs[g] * R_ti_gs[g] / R_ti for g in gs]
+        tildeFTapp_ti_values = sum(tildep_ti_gs[g] * FTapp_ti_gs_values[g] for g in gs)
+        tildeFTnoapp_ti_values = sum(
+            tildep_ti_gs[g] * FTnoapp_ti_gs_values[g] for g in gs
+        )
+
+        # Limits
+        FTapp_ti_infty = sum(p_gs[g] * _column(FTapp_ti_gs[g](tau_max)) for g in gs)
+        FTnoapp_ti_infty = sum(p_gs[g] * _column(FTnoapp_ti_gs[g](tau_max)) for g in gs)
+        FT_ti_infty = papp_ti * FTapp_ti_infty + (1 - papp_ti) * FTnoapp_ti_infty
+
+        for b, step_data_list in enumerate(step_data_lists):
+            if converged[b]:
+                continue
+            step_data_list.append(
+                StepData(
+                    real_range=real_range,
+                    t=float(t_i[b, 0]),
+                    papp=float(papp_ti[b, 0]),
+                    tildepapp=float(tildepapp_ti[b, 0]),
+                    tildepgs=[float(tildep_ti_gs[g][b, 0]) for g in gs],
+                    EtauC=float(EtauC_ti[b, 0]),
+                    FT_infty=float(FT_ti_infty[b, 0]),
+                    FTapp_infty=float(FTapp_ti_infty[b, 0]),
+                    FTnoapp_infty=float(FTnoapp_ti_infty[b, 0]),
+                    tildeFTapp=tildeFTapp_ti_values[b],
+                    tildeFTnoapp=tildeFTnoapp_ti_values[b],
+                    R=float(R_ti[b, 0]),
+                    Rapp=float(Rapp_ti[b, 0]),
+                    Rnoapp=float(Rnoapp_ti[b, 0]),
+                    interpolation=interpolation,
+                )
+            )
+            converged[b] = has_converged(
+                previous_step_data=step_data_list[-2] if i > 0 else None,
+                step_data=step_data_list[-1],
+                R_tolerance=R_tolerance,
+                tildeFT_tolerance=tildeFT_tolerance,
+            )
+        if all(converged):
+            break
+
+        t_im1 = t_i
+        EtauC_tim1 = EtauC_ti
+        tildepapp_tim1 = tildepapp_ti
+        tildeFTapp_tim1_values = tildeFTapp_ti_values
+        tildeFTnoapp_tim1_values = tildeFTnoapp_ti_values
+
+    return step_data_lists
@@ -0,0 +1,186 @@
+"""
+Persistent cache of the results of compute_time_evolution, stored as a directory of compressed .npz files.
+The entries are addressed by a hash of the content of the ScenarioSpec, of the RealRange, and of the engine: each entry
+holds the longest evolution computed so far, so that requests for fewer steps are served from it, and requests for more
+steps are computed by resuming the evolution from its last step.
+"""
+import hashlib
+import json
+import os
+import zipfile
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from bsp_epidemic_suppression_model.math_utilities.functions_utils import (
+    RealRange,
+    check_uniform_range,
+)
+from bsp_epidemic_suppression_model.model_utilities.scenario_spec import ScenarioSpec
+from bsp_epidemic_suppression_model.algorithm.step_data import (
+    StepData,
+    step_data_list_from_arrays,
+    step_data_list_to_arrays,
+)
+from bsp_epidemic_suppression_model.algorithm.time_evolution_main_function import (
+    compute_time_evolution,
+)
+
+
+class TimeEvolutionCache:
+    """
+    Content-addressed on-disk cache of time evolutions. The least recently used entries are evicted when the number of
+    entries or their total size exceeds the given limits.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_entries: Optional[int] = None,
+        max_size_bytes: Optional[int] = None,
+    ):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_size_bytes = max_size_bytes
+        self.hits = 0  # Requests served entirely from the cache
+        self.resumes = 0  # Requests computed by resuming a cached evolution
+        self.misses = 0  # Requests computed from scratch
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "resumes": self.resumes, "misses": self.misses}
+
+    @staticmethod
+    def key(spec: ScenarioSpec, real_range: RealRange, engine: str) -> str:
+        """
+        Returns the key of the entry holding the evolutions of the given scenario, computed with the given range and
+        engine. The range must be a RealRange, which is stored as its bounds and step.
+        """
+        check_uniform_range(real_range, "The time evolution cache")
+        content = [
+            spec.content_hash(),
+            [real_range.x_min, real_range.x_max, real_range.step],
+            engine,
+        ]
+        return hashlib.sha256(json.dumps(content).encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def load(self, key: str) -> Optional[List[StepData]]:
+        """
+        Returns the list of StepData objects stored in the entry with the given key, or None if there is no such (valid)
+        entry.
+        """
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                arrays = dict(data)
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            return None
+        os.utime(path)  # Marks the entry as recently used
+        x_min, x_max, step = arrays.pop("real_range")
+        return step_data_list_from_arrays(
+            arrays, RealRange(x_min=x_min, x_max=x_max, step=step)
+        )
+
+    def store(self, key: str, step_data_list: List[StepData]) -> None:
+        """
+        Stores a list of StepData objects in the entry with the given key, then evicts the least recently used entries
+        if needed.
+        """
+        real_range = step_data_list[0].real_range
+        check_uniform_range(real_range, "The time evolution cache")
+        path = self._path(key)
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as f:
+            np.savez_compressed(
+                f,
+                real_range=np.array(
+                    [real_range.x_min, real_range.x_max, real_range.step]
+                ),
+                **step_data_list_to_arrays(step_data_list),
+            )
+        # Atomic, so that readers never see partial files
+        os.replace(temporary_path, path)
+        self.evict(keep=path)
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        """
+        Removes the least recently used entries (but keep) until the limits on the number of entries and on their
+        total size are satisfied.
+        """
+        paths = [
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.endswith(".npz")
+        ]
+        entries = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:  # Removed in the meantime by another process
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        n_entries = len(entries)
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if (self.max_entries is None or n_entries <= self.max_entries) and (
+                self.max_size_bytes is None or total_size <= self.max_size_bytes
+            ):
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            n_entries -= 1
+            total_size -= size
+
+    def clear(self) -> None:
+        """
+        Removes all the entries.
+        """
+        for name in os.listdir(self.directory):
+            if name.endswith(".npz"):
+                os.remove(os.path.join(self.directory, name))
+
+    def compute_time_evolution(
+        self,
+        spec: ScenarioSpec,
+        real_range: RealRange,
+        n_iterations: int = 6,
+        engine: str = "grid",
+    ) -> List[StepData]:
+        """
+        Cached version of compute_time_evolution (with verbose=False), for a scenario given by a ScenarioSpec.
+        If fewer steps than n_iterations are cached, only the missing ones are computed, starting from the last cached
+        step.
+        """
+        key = self.key(spec, real_range, engine)
+        cached_step_data_list = self.load(key) or []
+
+        if len(cached_step_data_list) >= n_iterations:
+            self.hits += 1
+            return cached_step_data_list[:n_iterations]
+
+        if cached_step_data_list:
+            self.resumes += 1
+        else:
+            self.misses += 1
+        step_data_list = cached_step_data_list + compute_time_evolution(
+            scenario=spec.to_scenario(),
+            real_range=real_range,
+            n_iterations=n_iterations - len(cached_step_data_list),
+            verbose=False,
+            engine=engine,
+            initial_step_data=(
+                cached_step_data_list[-1] if cached_step_data_list else None
+            ),
+        )
+        self.store(key, step_data_list)
+        return step_data_list
@@ -0,0 +1,331 @@
+import itertools
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from bsp_epidemic_suppression_model.math_utilities.functions_utils import (
+    Range,
+    integrate_values,
+)
+from bsp_epidemic_suppression_model.math_utilities.profiling import (
+    Profiler,
+    no_stage,
+)
+
+from bsp_epidemic_suppression_model.model_utilities.precomputed_epidemic_data import (
+    PrecomputedEpidemicData,
+    get_precomputed_epidemic_data,
+)
+from bsp_epidemic_suppression_model.model_utilities.scenario import Scenario
+
+from bsp_epidemic_suppression_model.algorithm.model_blocks import (
+    compute_FAs_from_FS,
+    compute_FA_from_FAs_and_previous_step_data,
+    compute_FT_from_FA_and_DeltaAT,
+    degenerate_branches,
+    combine_branches,
+)
+from bsp_epidemic_suppression_model.algorithm.grid_model_blocks import (
+    compute_beta_and_R_from_stacked_FT_values,
+    compute_stacked_limits,
+    severity_sum,
+    unstack_severities,
+)
+from bsp_epidemic_suppression_model.algorithm.step_data import (
+    StepData,
+    has_converged,
+)
+from bsp_epidemic_suppression_model.algorithm.step_diagnostics import (
+    resolve_diagnostics_level,
+    compute_step_diagnostics,
+    format_step_diagnostics,
+)
+
+
+def iter_time_evolution_on_grid(
+    scenario: Scenario,
+    real_range: Range,
+    n_iterations: Optional[int] = None,
+    verbose: bool = False,
+    initial_step_data: Optional[StepData] = None,
+    interpolation: str = "floor",
+    quadrature: str = "trapezoid",
+    diagnostics: Optional[str] = None,
+    diagnostics_sink: Optional[Callable[[Dict[str, Any]], None]] = None,
+    R_tolerance: Optional[float] = None,
+    tildeFT_tolerance: Optional[float] = None,
+    precomputed: Optional[PrecomputedEpidemicData] = None,
+    profiler: Optional[Profiler] = None,
+    skip_degenerate_branches: bool = False,
+) -> Iterator[StepData]:
+    """
+    Grid-native version of iter_time_evolution, yielding the same StepData objects: see
+    compute_time_evolution_on_grid.
+    :param scenario: the Scenario object defining the input data of the mode.
+    :param real_range: a RealRange (or a NonUniformRange) object specifying the upper integration bound and the real
+    numbers on which the functions and densities are sampled.
+    :param n_iterations: the number of iterations, or None to iterate indefinitely (or until convergence).
+    :param verbose: if True, the diagnostics of each step are printed.
+    :param initial_step_data: if given, the evolution is resumed from this step (e.g. the last one of a previously
+    computed list), i.e. the first step computed is the one following it.
+    :param interpolation: how the functions sampled on real_range are evaluated at the next step ("floor" or "linear").
+    :param quadrature: the quadrature rule used for the integrals over real_range ("trapezoid" or "simpson").
+    :param diagnostics: the level of the diagnostics computed at each step (see iter_time_evolution).
+    :param diagnostics_sink: if given, the function receiving the diagnostics record of each step.
+    :param R_tolerance: tolerance on the changes of R stopping the iterations (see iter_time_evolution).
+    :param tildeFT_tolerance: tolerance on the changes of tildeFTapp and tildeFTnoapp stopping the iterations (see
+    iter_time_evolution).
+    :param precomputed: the samples over real_range of FS and of the scenario's beta0_gs (see iter_time_evolution).
+    :param profiler: if given, the Profiler recording the wall time and the integrals computed in each stage of each
+    step (see profiling.py).
+    :param skip_degenerate_branches: whether to skip the branch (app or no-app) with vanishing weight at each step (see
+    iter_time_evolution).
+    :return: An iterator over the StepData objects.
+    """
+    diagnostics = resolve_diagnostics_level(diagnostics, verbose, diagnostics_sink)
+    precomputed = get_precomputed_epidemic_data(
+        scenario.beta0_gs, real_range, precomputed
+    )
+    tau_max = real_range.x_max
+    x_values = precomputed.x_values
+
+    # The severities are stacked along the first axis: the parameters depending on them are columns, so that the model
+    # blocks, applied to lists holding a single stacked component, give functions of tau with one row per severity,
+    # and every quantity of the step is computed for all the severities at once
+    n_severities = scenario.n_severities
+    p_gs = np.array(scenario.p_gs, dtype=float)
+    ssapp = np.array(scenario.ssapp, dtype=float)[:, np.newaxis]
+    ssnoapp = np.array(scenario.ssnoapp, dtype=float)[:, np.newaxis]
+
+    previous_step_data = initial_step_data
+    stage = profiler.stage if profiler is not None else no_stage
+
+    for i in itertools.count() if n_iterations is None else range(n_iterations):
+        # Compute FAs components
+        with stage("FA", i):
+            (FAsapp_ti,), (FAsnoapp_ti,) = compute_FAs_from_FS(
+                ssapp=[ssapp], ssnoapp=[ssnoapp], FS=precomputed.FS
+            )
+
+            # Compute FA components
+            if previous_step_data is None:
+                t_i = scenario.t_0
+                FAapp_ti = FAsapp_ti
+                FAnoapp_ti = FAsnoapp_ti
+            else:
+                t_i = previous_step_data.t + previous_step_data.EtauC
+                (
+                    (FAapp_ti,),
+                    (FAnoapp_ti,),
+                ) = compute_FA_from_FAs_and_previous_step_data(
+                    FAsapp_ti_gs=[FAsapp_ti],
+                    FAsnoapp_ti_gs=[FAsnoapp_ti],
+                    tildepapp_tim1=previous_step_data.tildepapp,
+                    tildeFTapp_tim1=previous_step_data.tildeFTapp,
+                    tildeFTnoapp_tim1=previous_step_data.tildeFTnoapp,
+                    EtauC_tim1=previous_step_data.EtauC,
+                    scapp=scenario.scapp,
+                    scnoapp=scenario.scnoapp,
+                )
+
+            papp_ti = scenario.papp(t_i)
+            skip_app, skip_noapp = (
+                degenerate_branches(papp_ti)
+                if skip_degenerate_branches
+                else (False, False)
+            )
+
+        # Compute FT components, and sample them
+        with stage("FT", i):
+            FTapp_ti_gs, FTnoapp_ti_gs = compute_FT_from_FA_and_DeltaAT(
+                FAapp_ti_gs=None if skip_app else [FAapp_ti],
+                FAnoapp_ti_gs=None if skip_noapp else [FAnoapp_ti],
+                p_DeltaATapp=scenario.p_DeltaATapp,
+                p_DeltaATnoapp=scenario.p_DeltaATnoapp,
+                real_range=real_range,
+            )
+            FTapp_ti = None if skip_app else FTapp_ti_gs[0]
+            FTnoapp_ti = None if skip_noapp else FTnoapp_ti_gs[0]
+            FTapp_ti_values = None if skip_app else FTapp_ti(x_values)
+            FTnoapp_ti_values = None if skip_noapp else FTnoapp_ti(x_values)
+
+        # Compute beta, R components
+        with stage("beta_R", i):
+            beta0_ti_values = np.stack(precomputed.beta0_ti_gs_values(t_i))
+            (
+                betaapp_ti_gs_values,
+                betanoapp_ti_gs_values,
+                Rapp_ti_gs,
+                Rnoapp_ti_gs,
+            ) = compute_beta_and_R_from_stacked_FT_values(
+                FTapp_ti_values=FTapp_ti_values,
+                FTnoapp_ti_values=FTnoapp_ti_values,
+                beta0_ti_values=beta0_ti_values,
+                xi=scenario.xi,
+                real_range=real_range,
+                quadrature=quadrature,
+            )
+
+        # Compute aggregate beta (needed for EtauC), and R
+        with stage("EtauC", i):
+            betaapp_ti_values = (
+                None if skip_app else severity_sum(p_gs, betaapp_ti_gs_values)
+            )
+            betanoapp_ti_values = (
+                None if skip_noapp else severity_sum(p_gs, betanoapp_ti_gs_values)
+            )
+            beta_ti_values = combine_branches(
+                papp_ti, betaapp_ti_values, betanoapp_ti_values
+            )
+
+            Rapp_ti = float(severity_sum(p_gs, Rapp_ti_gs))
+            Rnoapp_ti = float(severity_sum(p_gs, Rnoapp_ti_gs))
+            R_ti_gs = combine_branches(papp_ti, Rapp_ti_gs, Rnoapp_ti_gs)
+            R_ti = combine_branches(papp_ti, Rapp_ti, Rnoapp_ti)
+
+            # Compute source-based probabilities and distributions
+            EtauC_ti = (
+                integrate_values(x_values * beta_ti_values, real_range, quadrature)
+                / R_ti
+            )
+            tildepapp_ti = 0.0 if skip_app else papp_ti * Rapp_ti / R_ti
+            tildep_ti_gs = p_gs * R_ti_gs / R_ti
+            # The tildeFT of a skipped branch has vanishing weight in the next step
+            tildeFTapp_ti_values = (
+                np.zeros_like(x_values)
+                if skip_app
+                else severity_sum(tildep_ti_gs, FTapp_ti_values)
+            )
+            tildeFTnoapp_ti_values = (
+                np.zeros_like(x_values)
+                if skip_noapp
+                else severity_sum(tildep_ti_gs, FTnoapp_ti_values)
+            )
+
+        # Limits
+        with stage("limits", i):
+            (
+                _,
+                _,
+                FTapp_ti_infty,
+                FTnoapp_ti_infty,
+                FT_ti_infty,
+            ) = compute_stacked_limits(
+                Fapp_ti=FTapp_ti,
+                Fnoapp_ti=FTnoapp_ti,
+                p_gs=p_gs,
+                papp_ti=papp_ti,
+                tau_max=tau_max,
+            )
+
+        with stage("step_data", i):
+            current_step_data = StepData(
+                real_range=real_range,
+                t=t_i,
+                papp=papp_ti,
+                tildepapp=tildepapp_ti,
+                tildepgs=tildep_ti_gs.tolist(),
+                EtauC=EtauC_ti,
+                FT_infty=FT_ti_infty,
+                FTapp_infty=FTapp_ti_infty,
+                FTnoapp_infty=FTnoapp_ti_infty,
+                tildeFTapp=tildeFTapp_ti_values,
+                tildeFTnoapp=tildeFTnoapp_ti_values,
+                R=R_ti,
+                Rapp=Rapp_ti,
+                Rnoapp=Rnoapp_ti,
+                interpolation=interpolation,
+            )
+
+        with stage("diagnostics", i):
+            # The diagnostics take the components of each severity
+            unstack = lambda F_ti: (
+                None if F_ti is None else unstack_severities(F_ti, n_severities)
+            )
+            step_diagnostics = compute_step_diagnostics(
+                diagnostics=diagnostics,
+                i=i,
+                t_i=t_i,
+                scenario=scenario,
+                tau_max=tau_max,
+                FAsapp_ti_gs=unstack(FAsapp_ti),
+                FAsnoapp_ti_gs=unstack(FAsnoapp_ti),
+                FAapp_ti_gs=unstack(FAapp_ti),
+                FAnoapp_ti_gs=unstack(FAnoapp_ti),
+                FTapp_ti_gs=unstack(FTapp_ti),
+                FTnoapp_ti_gs=unstack(FTnoapp_ti),
+                Rapp_ti_gs=Rapp_ti_gs.tolist(),
+                Rnoapp_ti_gs=Rnoapp_ti_gs.tolist(),
+                Rapp_ti=Rapp_ti,
+                Rnoapp_ti=Rnoapp_ti,
+                R_ti_gs=R_ti_gs.tolist(),
+                R_ti=R_ti,
+                tildepapp_ti=tildepapp_ti,
+                tildep_ti_gs=tildep_ti_gs.tolist(),
+                EtauC_ti=EtauC_ti,
+                FT_ti_infty=FT_ti_infty,
+            )
+        if step_diagnostics is not None:
+            if diagnostics_sink is not None:
+                diagnostics_sink(step_diagnostics)
+            if verbose:
+                print(format_step_diagnostics(step_diagnostics))
+
+        yield current_step_data
+
+        if has_converged(
+            previous_step_data=previous_step_data,
+            step_data=current_step_data,
+            R_tolerance=R_tolerance,
+            tildeFT_tolerance=tildeFT_tolerance,
+        ):
+            return
+        previous_step_data = current_step_data
+
+
+def compute_time_evolution_on_grid(
+    scenario: Scenario,
+    real_range: Range,
+    n_iterations: int = 6,
+    verbose: bool = True,
+    initial_step_data: Optional[StepData] = None,
+    interpolation: str = "floor",
+    quadrature: str = "trapezoid",
+    diagnostics: Optional[str] = None,
+    diagnostics_sink: Optional[Callable[[Dict[str, Any]], None]] = None,
+    R_tolerance: Optional[float] = None,
+    tildeFT_tolerance: Optional[float] = None,
+    precomputed: Optional[PrecomputedEpidemicData] = None,
+    profiler: Optional[Profiler] = None,
+    skip_degenerate_branches: bool = False,
+) -> List[StepData]:
+    """
+    Grid-native version of compute_time_evolution, returning the same list of StepData objects.
+    Instead of composing callables that are evaluated point by point inside adaptive quadratures, the CDFs F^A and
+    F^T are evaluated once on the whole array of the points of real_range (the model blocks are applied to functions
+    accepting arrays), and from there on every quantity of the step is a NumPy array: the integrals giving R and
+    E(tau^C) are computed with the trapezoidal rule over the samples. The severities are stacked along the first axis
+    of the arrays, so the cost of a step grows slowly with their number, and the aggregates over them are weighted sums
+    along that axis.
+    The results agree with the ones of compute_time_evolution up to the discretization error of real_range.
+    The parameters are the ones of iter_time_evolution_on_grid.
+    :return: The list of StepData objects.
+    """
+    return list(
+        iter_time_evolution_on_grid(
+            scenario=scenario,
+            real_range=real_range,
+            n_iterations=n_iterations,
+            verbose=verbose,
+            initial_step_data=initial_step_data,
+            interpolation=interpolation,
+            quadrature=quadrature,
+            diagnostics=diagnostics,
+            diagnostics_sink=diagnostics_sink,
+            R_tolerance=R_tolerance,
+            tildeFT_tolerance=tildeFT_tolerance,
+            precomputed=precomputed,
+            profiler=profiler,
+            skip_degenerate_branches=skip_degenerate_branches,
+        )
+    )
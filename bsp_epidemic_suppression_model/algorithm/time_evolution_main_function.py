@@ -1,218 +1,367 @@
-from typing import List
+import itertools
+from typing import Any, Callable, Dict, Iterator, List, Optional
 
 from bsp_epidemic_suppression_model.math_utilities.functions_utils import (
-    RealRange,
-    round2,
-    round2_list,
+    NonUniformRange,
+    Range,
+    QUADRATURES,
     integrate,
 )
+from bsp_epidemic_suppression_model.math_utilities.profiling import (
+    Profiler,
+    no_stage,
+)
 
-from bsp_epidemic_suppression_model.model_utilities.epidemic_data import FS
+from bsp_epidemic_suppression_model.model_utilities.precomputed_epidemic_data import (
+    PrecomputedEpidemicData,
+    get_precomputed_epidemic_data,
+)
 from bsp_epidemic_suppression_model.model_utilities.scenario import Scenario
 
 from bsp_epidemic_suppression_model.algorithm.model_blocks import (
+    compute_FAs_from_FS,
     compute_FA_from_FAs_and_previous_step_data,
     compute_FT_from_FA_and_DeltaAT,
     compute_beta_and_R_components_from_FT,
+    degenerate_branches,
+    combine_branches,
+)
+from bsp_epidemic_suppression_model.algorithm.step_data import (
+    StepData,
+    has_converged,
+)
+from bsp_epidemic_suppression_model.algorithm.step_diagnostics import (
+    resolve_diagnostics_level,
+    compute_limits,
+    compute_step_diagnostics,
+    format_step_diagnostics,
+)
+from bsp_epidemic_suppression_model.algorithm.time_evolution_grid_function import (
+    iter_time_evolution_on_grid,
 )
-from bsp_epidemic_suppression_model.algorithm.step_data import StepData
 
+ENGINES = ("closures", "grid")
 
-def compute_time_evolution(
+
+def iter_time_evolution(
     scenario: Scenario,
-    real_range: RealRange,
-    n_iterations: int = 6,
-    verbose: bool = True,
-) -> List[StepData]:
+    real_range: Range,
+    n_iterations: Optional[int] = None,
+    verbose: bool = False,
+    initial_step_data: Optional[StepData] = None,
+    engine: str = "closures",
+    interpolation: str = "floor",
+    quadrature: Optional[str] = None,
+    diagnostics: Optional[str] = None,
+    diagnostics_sink: Optional[Callable[[Dict[str, Any]], None]] = None,
+    R_tolerance: Optional[float] = None,
+    tildeFT_tolerance: Optional[float] = None,
+    precomputed: Optional[PrecomputedEpidemicData] = None,
+    profiler: Optional[Profiler] = None,
+    skip_degenerate_branches: bool = False,
+) -> Iterator[StepData]:
     """
-    Given a Scenario, computes n_iterations steps of the algorithm, filling each time a StepData object and
-    (if verbose=True) printing the relevant quantities computed.
+    Given a Scenario, computes n_iterations steps of the algorithm, yielding each time a StepData object as soon as it
+    is computed and (if verbose=True) printing the relevant quantities computed. Only the last step is kept, as it is
+    needed to compute the next one, so that long time evolutions can be consumed (e.g. by the sinks in
+    step_data_sinks.py) without keeping all the steps in memory.
     :param scenario: the Scenario object defining the input data of the mode.
-    :param real_range: a RealRange object specifying the upper integration bound and the real numbers on which the
-    functions and densities are sampled from one step to the next.
-    :param n_iterations: the number of iterations.
-    :param verbose: if True, the relevant quantities computed at each step are printed.
-    :return: The list of StepData objects.
+    :param real_range: a RealRange (or a NonUniformRange) object specifying the upper integration bound and the real
+    numbers on which the functions and densities are sampled from one step to the next.
+    :param n_iterations: the number of iterations, or None to iterate indefinitely (or until convergence).
+    :param verbose: if True, the diagnostics of each step are printed.
+    :param initial_step_data: if given, the evolution is resumed from this step (e.g. the last one of a previously
+    computed list), i.e. the first step computed is the one following it.
+    :param engine: "closures" to build the functions as compositions of Python callables and integrate them with
+    adaptive quadrature, or "grid" to run the whole step with NumPy arrays sampled on real_range (much faster, see
+    compute_time_evolution_on_grid).
+    :param interpolation: how the functions sampled on real_range are evaluated at the next step, between the sampled
+    points: "floor" (the value at the closest point on the left) or "linear".
+    :param quadrature: the quadrature rule used for the integrals giving R and E(tau^C). The "closures" engine supports
+    all the QUADRATURES of integrate, the default being the adaptive "quad"; the composite rules use the points of
+    real_range. The "grid" engine supports the GRID_QUADRATURES, the default being "trapezoid".
+    :param diagnostics: the level of the diagnostics computed at each step, one of DIAGNOSTICS (see
+    step_diagnostics.py). By default, "full" if verbose=True or diagnostics_sink is given, "none" otherwise.
+    :param diagnostics_sink: if given, the function receiving the diagnostics record of each step.
+    :param R_tolerance: if given (possibly together with tildeFT_tolerance), the iterations stop as soon as R changes
+    by less than R_tolerance from one step to the next: n_iterations is then the maximum number of iterations.
+    :param tildeFT_tolerance: if given, the iterations stop as soon as tildeFTapp and tildeFTnoapp change by less than
+    tildeFT_tolerance (in sup norm) from one step to the next, see has_converged.
+    :param precomputed: the samples over real_range of FS and of the scenario's beta0_gs, see
+    precomputed_epidemic_data.py. By default, they are computed once per beta0_gs and range, and shared by all the steps
+    and the scenarios with the same beta0_gs.
+    :param profiler: if given, the Profiler recording the wall time and the integrals computed in each stage of each
+    step (see profiling.py). With the "closures" engine, FA and FT are composed lazily, so the cost of evaluating them is
+    recorded in the stages using them (e.g. "beta_R", and "step_data" where tildeFTapp and tildeFTnoapp are sampled).
+    :param skip_degenerate_branches: if True, the app (no-app) branch is not computed at the steps where papp vanishes
+    (equals 1), e.g. in homogeneous scenarios, since it does not contribute to the evolution (see degenerate_branches):
+    the results are the same, except that Rapp and FTapp_infty (Rnoapp and FTnoapp_infty) are NaN, and tildeFTapp
+    (tildeFTnoapp) vanishes. It is off by default, so that all the fields of the StepData objects are defined.
+    :return: An iterator over the StepData objects.
     """
+    if engine == "grid":
+        yield from iter_time_evolution_on_grid(
+            scenario=scenario,
+            real_range=real_range,
+            n_iterations=n_iterations,
+            verbose=verbose,
+            initial_step_data=initial_step_data,
+            interpolation=interpolation,
+            quadrature=quadrature or "trapezoid",
+            diagnostics=diagnostics,
+            diagnostics_sink=diagnostics_sink,
+            R_tolerance=R_tolerance,
+            tildeFT_tolerance=tildeFT_tolerance,
+            precomputed=precomputed,
+            profiler=profiler,
+            skip_degenerate_branches=skip_degenerate_branches,
+        )
+        return
+    if engine != "closures":
+        raise ValueError(f"Unknown engine {engine!r}, must be one of {ENGINES}.")
+    diagnostics = resolve_diagnostics_level(diagnostics, verbose, diagnostics_sink)
+    quadrature = quadrature or "quad"
+    if quadrature not in QUADRATURES:
+        raise ValueError(
+            f"Unknown quadrature {quadrature!r}, must be one of {QUADRATURES}."
+        )
+
+    precomputed = get_precomputed_epidemic_data(
+        scenario.beta0_gs, real_range, precomputed
+    )
     tau_max = real_range.x_max
+    # The composite quadrature rules use the points of non-uniform ranges, and the step of uniform ones
+    if isinstance(real_range, NonUniformRange):
+        step, integration_range = None, real_range
+    else:
+        step, integration_range = real_range.step, None
 
-    step_data_list: List[StepData] = []
+    previous_step_data = initial_step_data
+    stage = profiler.stage if profiler is not None else no_stage
 
-    for i in range(0, n_iterations):
+    for i in itertools.count() if n_iterations is None else range(n_iterations):
         gs = range(scenario.n_severities)  # Values of severity G
 
         # Compute FAs components
-        FAsapp_ti_gs = [lambda tau, g=g: scenario.ssapp[g] * FS(tau) for g in gs]
-        FAsnoapp_ti_gs = [lambda tau, g=g: scenario.ssnoapp[g] * FS(tau) for g in gs]
-
-        # Compute FA components
-        if i == 0:
-            t_i = scenario.t_0
-            FAapp_ti_gs = FAsapp_ti_gs
-            FAnoapp_ti_gs = FAsnoapp_ti_gs
-        else:
-            previous_step_data = step_data_list[i - 1]
-            t_i = previous_step_data.t + previous_step_data.EtauC
-            FAapp_ti_gs, FAnoapp_ti_gs = compute_FA_from_FAs_and_previous_step_data(
-                FAsapp_ti_gs=FAsapp_ti_gs,
-                FAsnoapp_ti_gs=FAsnoapp_ti_gs,
-                tildepapp_tim1=previous_step_data.tildepapp,
-                tildeFTapp_tim1=previous_step_data.tildeFTapp,
-                tildeFTnoapp_tim1=previous_step_data.tildeFTnoapp,
-                EtauC_tim1=previous_step_data.EtauC,
-                scapp=scenario.scapp,
-                scnoapp=scenario.scnoapp,
+        with stage("FA", i):
+            FAsapp_ti_gs, FAsnoapp_ti_gs = compute_FAs_from_FS(
+                ssapp=scenario.ssapp, ssnoapp=scenario.ssnoapp, FS=precomputed.FS
+            )
+
+            # Compute FA components
+            if previous_step_data is None:
+                t_i = scenario.t_0
+                FAapp_ti_gs = FAsapp_ti_gs
+                FAnoapp_ti_gs = FAsnoapp_ti_gs
+            else:
+                t_i = previous_step_data.t + previous_step_data.EtauC
+                FAapp_ti_gs, FAnoapp_ti_gs = compute_FA_from_FAs_and_previous_step_data(
+                    FAsapp_ti_gs=FAsapp_ti_gs,
+                    FAsnoapp_ti_gs=FAsnoapp_ti_gs,
+                    tildepapp_tim1=previous_step_data.tildepapp,
+                    tildeFTapp_tim1=previous_step_data.tildeFTapp,
+                    tildeFTnoapp_tim1=previous_step_data.tildeFTnoapp,
+                    EtauC_tim1=previous_step_data.EtauC,
+                    scapp=scenario.scapp,
+                    scnoapp=scenario.scnoapp,
+                )
+
+            papp_ti = scenario.papp(t_i)
+            skip_app, skip_noapp = (
+                degenerate_branches(papp_ti)
+                if skip_degenerate_branches
+                else (False, False)
             )
 
         # Compute FT components
-        FTapp_ti_gs, FTnoapp_ti_gs = compute_FT_from_FA_and_DeltaAT(
-            FAapp_ti_gs=FAapp_ti_gs,
-            FAnoapp_ti_gs=FAnoapp_ti_gs,
-            p_DeltaATapp=scenario.p_DeltaATapp,
-            p_DeltaATnoapp=scenario.p_DeltaATnoapp,
-        )
+        with stage("FT", i):
+            FTapp_ti_gs, FTnoapp_ti_gs = compute_FT_from_FA_and_DeltaAT(
+                FAapp_ti_gs=None if skip_app else FAapp_ti_gs,
+                FAnoapp_ti_gs=None if skip_noapp else FAnoapp_ti_gs,
+                p_DeltaATapp=scenario.p_DeltaATapp,
+                p_DeltaATnoapp=scenario.p_DeltaATnoapp,
+                real_range=real_range,
+            )
 
         # Compute beta, R components
-
-        beta0_ti_gs = [lambda tau, g=g: scenario.beta0_gs[g](t_i, tau) for g in gs]
-        (
-            rapp_ti_gs,
-            rnoapp_ti_gs,
-            Rapp_ti_gs,
-            Rnoapp_ti_gs,
-        ) = compute_beta_and_R_components_from_FT(
-            FTapp_ti_gs=FTapp_ti_gs,
-            FTnoapp_ti_gs=FTnoapp_ti_gs,
-            beta0_ti_gs=beta0_ti_gs,
-            xi=scenario.xi,
-            tau_max=tau_max,
-        )
+        with stage("beta_R", i):
+            beta0_ti_gs = precomputed.beta0_ti_gs(t_i)
+            (
+                rapp_ti_gs,
+                rnoapp_ti_gs,
+                Rapp_ti_gs,
+                Rnoapp_ti_gs,
+            ) = compute_beta_and_R_components_from_FT(
+                FTapp_ti_gs=FTapp_ti_gs,
+                FTnoapp_ti_gs=FTnoapp_ti_gs,
+                beta0_ti_gs=beta0_ti_gs,
+                xi=scenario.xi,
+                tau_max=tau_max,
+                quadrature=quadrature,
+                step=step,
+                real_range=integration_range,
+            )
 
         # Compute aggregate beta (needed for EtauC), and R
-        betaapp_ti = lambda tau: sum(scenario.p_gs[g] * rapp_ti_gs[g](tau) for g in gs)
-        betanoapp_ti = lambda tau: sum(
-            scenario.p_gs[g] * rnoapp_ti_gs[g](tau) for g in gs
-        )
-        beta_ti = lambda tau: scenario.papp(t_i) * betaapp_ti(tau) + (
-            1 - scenario.papp(t_i)
-        ) * betanoapp_ti(tau)
-
-        Rapp_ti = sum(scenario.p_gs[g] * Rapp_ti_gs[g] for g in gs)
-        Rnoapp_ti = sum(scenario.p_gs[g] * Rnoapp_ti_gs[g] for g in gs)
-        R_ti_gs = [
-            scenario.papp(t_i) * Rapp_ti_gs[g]
-            + (1 - scenario.papp(t_i)) * Rnoapp_ti_gs[g]
-            for g in gs
-        ]
-        R_ti = scenario.papp(t_i) * Rapp_ti + (1 - scenario.papp(t_i)) * Rnoapp_ti
-
-        # Compute source-based probabilities and distributions
-        EtauC_ti = integrate(f=lambda tau: tau * beta_ti(tau) / R_ti, a=0, b=tau_max)
-        tildepapp_ti = scenario.papp(t_i) * Rapp_ti / R_ti
-        tildep_ti_gs = [scenario.p_gs[g] * R_ti_gs[g] / R_ti for g in gs]
-        tildeFTapp_ti = lambda tau: sum(
-            tildep_ti_gs[g] * FTapp_ti_gs[g](tau) for g in gs
-        )
-        tildeFTnoapp_ti = lambda tau: sum(
-            tildep_ti_gs[g] * FTnoapp_ti_gs[g](tau) for g in gs
-        )
+        with stage("EtauC", i):
+            betaapp_ti = lambda tau: sum(
+                scenario.p_gs[g] * rapp_ti_gs[g](tau) for g in gs
+            )
+            betanoapp_ti = lambda tau: sum(
+                scenario.p_gs[g] * rnoapp_ti_gs[g](tau) for g in gs
+            )
+            if skip_app:
+                beta_ti = betanoapp_ti
+            elif skip_noapp:
+                beta_ti = betaapp_ti
+            else:
+                beta_ti = lambda tau: papp_ti * betaapp_ti(tau) + (
+                    1 - papp_ti
+                ) * betanoapp_ti(tau)
 
-        # Limits and Recap
-        step_recap = f"step {i}, t_i={round2(t_i)}\n"
+            Rapp_ti = sum(scenario.p_gs[g] * Rapp_ti_gs[g] for g in gs)
+            Rnoapp_ti = sum(scenario.p_gs[g] * Rnoapp_ti_gs[g] for g in gs)
+            R_ti_gs = [
+                combine_branches(papp_ti, Rapp_ti_gs[g], Rnoapp_ti_gs[g]) for g in gs
+            ]
+            R_ti = combine_branches(papp_ti, Rapp_ti, Rnoapp_ti)
 
-        if i != 0:
-            FAsapp_ti_gs_infty = [FAsapp_ti_gs[g](tau_max) for g in gs]
-            FAsnoapp_ti_gs_infty = [FAsnoapp_ti_gs[g](tau_max) for g in gs]
-            FAsapp_ti_infty = sum(scenario.p_gs[g] * FAsapp_ti_gs_infty[g] for g in gs)
-            FAsnoapp_ti_infty = sum(
-                scenario.p_gs[g] * FAsnoapp_ti_gs_infty[g] for g in gs
+            # Compute source-based probabilities and distributions
+            EtauC_ti = integrate(
+                f=lambda tau: tau * beta_ti(tau) / R_ti,
+                a=0,
+                b=tau_max,
+                quadrature=quadrature,
+                step=step,
+                real_range=integration_range,
             )
-            FAs_ti_infty = (
-                scenario.papp(t_i) * FAsapp_ti_infty
-                + (1 - scenario.papp(t_i)) * FAsnoapp_ti_infty
+            tildepapp_ti = 0.0 if skip_app else papp_ti * Rapp_ti / R_ti
+            tildep_ti_gs = [scenario.p_gs[g] * R_ti_gs[g] / R_ti for g in gs]
+            # The tildeFT of a skipped branch has vanishing weight in the next step
+            vanishing_values = [0.0] * len(real_range.x_values)
+            tildeFTapp_ti = (
+                vanishing_values
+                if skip_app
+                else lambda tau: sum(tildep_ti_gs[g] * FTapp_ti_gs[g](tau) for g in gs)
+            )
+            tildeFTnoapp_ti = (
+                vanishing_values
+                if skip_noapp
+                else lambda tau: sum(
+                    tildep_ti_gs[g] * FTnoapp_ti_gs[g](tau) for g in gs
+                )
             )
 
-            FAs_recap = (
-                f" FAsapp_ti_gs(∞)={round2_list(FAsapp_ti_gs_infty)}\n"
-                f" FAsnoapp_ti_gs(∞)={round2_list(FAsnoapp_ti_gs_infty)}\n"
-                f" FAsapp_ti(∞)={round2(FAsapp_ti_infty)}\n"
-                f" FAsnoapp_ti(∞)={round2(FAsnoapp_ti_infty)}\n"
-                f" FAs_ti(∞)={round2(FAs_ti_infty)}\n"
+        # Limits
+        with stage("limits", i):
+            _, _, FTapp_ti_infty, FTnoapp_ti_infty, FT_ti_infty = compute_limits(
+                Fapp_ti_gs=FTapp_ti_gs,
+                Fnoapp_ti_gs=FTnoapp_ti_gs,
+                p_gs=scenario.p_gs,
+                papp_ti=papp_ti,
+                tau_max=tau_max,
             )
-        else:
-            FAs_recap = ""
-
-        FAapp_ti_gs_infty = [FAapp_ti_gs[g](tau_max) for g in gs]
-        FAnoapp_ti_gs_infty = [FAnoapp_ti_gs[g](tau_max) for g in gs]
-        FAapp_ti_infty = sum(scenario.p_gs[g] * FAapp_ti_gs_infty[g] for g in gs)
-        FAnoapp_ti_infty = sum(scenario.p_gs[g] * FAnoapp_ti_gs_infty[g] for g in gs)
-        FA_ti_infty = (
-            scenario.papp(t_i) * FAapp_ti_infty
-            + (1 - scenario.papp(t_i)) * FAnoapp_ti_infty
-        )
 
-        FA_recap = (
-            f" FAapp_ti_gs(∞)={round2_list(FAapp_ti_gs_infty)}\n"
-            f" FAnoapp_ti_gs(∞)={round2_list(FAnoapp_ti_gs_infty)}\n"
-            f" FAapp_ti(∞)={round2(FAapp_ti_infty)}\n"
-            f" FAnoapp_ti(∞)={round2(FAnoapp_ti_infty)}\n"
-            f" FA_ti(∞)={round2(FA_ti_infty)}\n"
-        )
+        with stage("step_data", i):
+            current_step_data = StepData(
+                real_range=real_range,
+                t=t_i,
+                papp=papp_ti,
+                tildepapp=tildepapp_ti,
+                tildepgs=tildep_ti_gs,
+                EtauC=EtauC_ti,
+                FT_infty=FT_ti_infty,
+                FTapp_infty=FTapp_ti_infty,
+                FTnoapp_infty=FTnoapp_ti_infty,
+                tildeFTapp=tildeFTapp_ti,
+                tildeFTnoapp=tildeFTnoapp_ti,
+                R=R_ti,
+                Rapp=Rapp_ti,
+                Rnoapp=Rnoapp_ti,
+                interpolation=interpolation,
+            )
 
-        FTapp_ti_gs_infty = [FTapp_ti_gs[g](tau_max) for g in gs]
-        FTnoapp_ti_gs_infty = [FTnoapp_ti_gs[g](tau_max) for g in gs]
-        FTapp_ti_infty = sum(scenario.p_gs[g] * FTapp_ti_gs_infty[g] for g in gs)
-        FTnoapp_ti_infty = sum(scenario.p_gs[g] * FTnoapp_ti_gs_infty[g] for g in gs)
-        FT_ti_infty = (
-            scenario.papp(t_i) * FTapp_ti_infty
-            + (1 - scenario.papp(t_i)) * FTnoapp_ti_infty
-        )
+        with stage("diagnostics", i):
+            step_diagnostics = compute_step_diagnostics(
+                diagnostics=diagnostics,
+                i=i,
+                t_i=t_i,
+                scenario=scenario,
+                tau_max=tau_max,
+                FAsapp_ti_gs=FAsapp_ti_gs,
+                FAsnoapp_ti_gs=FAsnoapp_ti_gs,
+                FAapp_ti_gs=FAapp_ti_gs,
+                FAnoapp_ti_gs=FAnoapp_ti_gs,
+                FTapp_ti_gs=FTapp_ti_gs,
+                FTnoapp_ti_gs=FTnoapp_ti_gs,
+                Rapp_ti_gs=Rapp_ti_gs,
+                Rnoapp_ti_gs=Rnoapp_ti_gs,
+                Rapp_ti=Rapp_ti,
+                Rnoapp_ti=Rnoapp_ti,
+                R_ti_gs=R_ti_gs,
+                R_ti=R_ti,
+                tildepapp_ti=tildepapp_ti,
+                tildep_ti_gs=tildep_ti_gs,
+                EtauC_ti=EtauC_ti,
+                FT_ti_infty=FT_ti_infty,
+            )
+        if step_diagnostics is not None:
+            if diagnostics_sink is not None:
+                diagnostics_sink(step_diagnostics)
+            if verbose:
+                print(format_step_diagnostics(step_diagnostics))
 
-        FT_recap = (
-            f" FTapp_ti_gs(∞)={round2_list(FTapp_ti_gs_infty)}\n"
-            f" FTnoapp_ti_gs(∞)={round2_list(FTnoapp_ti_gs_infty)}\n"
-            f" FTapp_ti(∞)={round2(FTapp_ti_infty)}\n"
-            f" FTnoapp_ti(∞)={round2(FTnoapp_ti_infty)}\n"
-            f" FT_ti(∞)={round2(FT_ti_infty)}\n"
-        )
+        yield current_step_data
 
-        R_recap = (
-            f" Rapp_ti_gs={round2_list(Rapp_ti_gs)}\n"
-            f" Rnoapp_ti_gs={round2_list(Rnoapp_ti_gs)}\n"
-            f" Rapp_ti={round2(Rapp_ti)}\n"
-            f" Rnoapp_ti={round2(Rnoapp_ti)}\n"
-            f" R_ti_gs={round2_list(R_ti_gs)}\n"
-            f" R_ti={round2(R_ti)}\n"
-        )
+        if has_converged(
+            previous_step_data=previous_step_data,
+            step_data=current_step_data,
+            R_tolerance=R_tolerance,
+            tildeFT_tolerance=tildeFT_tolerance,
+        ):
+            return
+        previous_step_data = current_step_data
 
-        other_recap = (
-            f" papp_ti={round2(scenario.papp(t_i))}\n"
-            f" tildepapp_ti={round2(tildepapp_ti)}\n"
-            f" p_gs={round2_list(scenario.p_gs)}\n"
-            f" tildep_ti_gs={round2_list(tildep_ti_gs)}\n"
-            f" E(tauC_ti)={round2(EtauC_ti)} \n"
-        )
 
-        current_step_data = StepData(
+def compute_time_evolution(
+    scenario: Scenario,
+    real_range: Range,
+    n_iterations: int = 6,
+    verbose: bool = True,
+    initial_step_data: Optional[StepData] = None,
+    engine: str = "closures",
+    interpolation: str = "floor",
+    quadrature: Optional[str] = None,
+    diagnostics: Optional[str] = None,
+    diagnostics_sink: Optional[Callable[[Dict[str, Any]], None]] = None,
+    R_tolerance: Optional[float] = None,
+    tildeFT_tolerance: Optional[float] = None,
+    precomputed: Optional[PrecomputedEpidemicData] = None,
+    profiler: Optional[Profiler] = None,
+    skip_degenerate_branches: bool = False,
+) -> List[StepData]:
+    """
+    Given a Scenario, computes n_iterations steps of the algorithm, filling each time a StepData object and
+    (if verbose=True) printing the relevant quantities computed.
+    The parameters are the ones of iter_time_evolution.
+    :return: The list of StepData objects.
+    """
+    return list(
+        iter_time_evolution(
+            scenario=scenario,
             real_range=real_range,
-            t=t_i,
-            papp=scenario.papp(t_i),
-            tildepapp=tildepapp_ti,
-            tildepgs=tildep_ti_gs,
-            EtauC=EtauC_ti,
-            FT_infty=FT_ti_infty,
-            FTapp_infty=FTapp_ti_infty,
-            FTnoapp_infty=FTnoapp_ti_infty,
-            tildeFTapp=tildeFTapp_ti,
-            tildeFTnoapp=tildeFTnoapp_ti,
-            R=R_ti,
-            Rapp=Rapp_ti,
-            Rnoapp=Rnoapp_ti,
+            n_iterations=n_iterations,
+            verbose=verbose,
+            initial_step_data=initial_step_data,
+            engine=engine,
+            interpolation=interpolation,
+            quadrature=quadrature,
+            diagnostics=diagnostics,
+            diagnostics_sink=diagnostics_sink,
+            R_tolerance=R_tolerance,
+            tildeFT_tolerance=tildeFT_tolerance,
+            precomputed=precomputed,
+            profiler=profiler,
+            skip_degenerate_branches=skip_degenerate_branches,
         )
-
-        step_data_list.append(current_step_data)
-
-        if verbose:
-            print(step_recap + FAs_recap + FA_recap + FT_recap + R_recap + other_recap)
-
-    return step_data_list
+    )
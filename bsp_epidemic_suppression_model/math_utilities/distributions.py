@@ -1,33 +1,138 @@
 """
 Here we collect some PDFs and CDFs used in the computations.
+They are implemented in closed form, and accept either a float or an array of floats: floats are computed with the
+math module, which is much faster than NumPy or scipy.stats on single numbers, and arrays with NumPy and scipy.special
+ufuncs.
+The function tabulate samples them over a RealRange (or a NonUniformRange) once, and caches the result.
 """
+import math
+import numbers
+from functools import lru_cache
+from typing import Callable, Tuple
+
 import numpy as np
-from scipy.stats import gamma, norm
+from scipy.special import erfc, gammainc, xlogy
+
+from bsp_epidemic_suppression_model.math_utilities.functions_utils import Range
+
+
+def _is_scalar(x) -> bool:
+    """
+    Whether x is a single real number, including the NumPy scalars (e.g. np.int64 or np.float32).
+    """
+    return isinstance(x, numbers.Real)
 
 
 def gamma_pdf(x: float, alpha: float, beta: float) -> float:
     """
-    PDF of gamma distribution.
+    PDF of gamma distribution with shape alpha and rate beta.
     """
-    return gamma.pdf(x, a=alpha, scale=1 / beta)
+    log_normalization = alpha * math.log(beta) - math.lgamma(alpha)
+    if _is_scalar(x):
+        x = float(x)
+        if x < 0:
+            return 0.0
+        if x == 0:
+            return 0.0 if alpha > 1 else beta if alpha == 1 else math.inf
+        return math.exp((alpha - 1) * math.log(x) - beta * x + log_normalization)
+    x = np.asarray(x, dtype=float)
+    non_negative_x = np.maximum(x, 0)
+    return np.where(
+        x >= 0,
+        np.exp(
+            xlogy(alpha - 1, non_negative_x) - beta * non_negative_x + log_normalization
+        ),
+        0.0,
+    )
 
 
 def gamma_cdf(x: float, alpha: float, beta: float) -> float:
     """
-    CDF of gamma distribution.
+    CDF of gamma distribution with shape alpha and rate beta.
     """
-    return gamma.cdf(x, a=alpha, scale=1 / beta)
+    if _is_scalar(x):
+        return float(gammainc(alpha, beta * max(float(x), 0)))
+    return gammainc(alpha, beta * np.maximum(np.asarray(x, dtype=float), 0))
 
 
 def lognormal_cdf(x: float, mu: float, sigma: float) -> float:
     """
-    CDF of log-normal distribution.
+    CDF of log-normal distribution. It vanishes for x <= 0.
+    """
+    if _is_scalar(x):
+        x = float(x)
+        if x <= 0:
+            return 0.0
+        return 0.5 * math.erfc((mu - math.log(x)) / (sigma * math.sqrt(2)))
+    x = np.asarray(x, dtype=float)
+    positive = x > 0
+    log_x = np.log(np.where(positive, x, 1))
+    return np.where(positive, 0.5 * erfc((mu - log_x) / (sigma * math.sqrt(2))), 0.0)
+
+
+def lognormal_pdf(x: float, mu: float, sigma: float) -> float:
+    """
+    PDF of log-normal distribution. It vanishes for x <= 0.
     """
-    return norm.cdf((np.log(x) - mu) / sigma)
+    if _is_scalar(x):
+        x = float(x)
+        if x <= 0:
+            return 0.0
+        z = (math.log(x) - mu) / sigma
+        return math.exp(-0.5 * z * z) / (x * sigma * math.sqrt(2 * math.pi))
+    x = np.asarray(x, dtype=float)
+    positive = x > 0
+    positive_x = np.where(positive, x, 1)
+    z = (np.log(positive_x) - mu) / sigma
+    return np.where(
+        positive,
+        np.exp(-0.5 * z * z) / (positive_x * sigma * math.sqrt(2 * math.pi)),
+        0.0,
+    )
 
 
 def weibull_pdf(x: float, k: float, lambda_: float) -> float:
     """
     PDF of Weibull distribution with shape k and scale lambda_.
     """
-    return k / lambda_ * (x / lambda_) ** (k - 1) * np.exp(-((x / lambda_) ** k))
+    if _is_scalar(x):
+        x = float(x)
+        if x < 0:
+            return 0.0
+        if x == 0:
+            return 0.0 if k > 1 else 1 / lambda_ if k == 1 else math.inf
+        return k / lambda_ * (x / lambda_) ** (k - 1) * math.exp(-((x / lambda_) ** k))
+    x = np.asarray(x, dtype=float)
+    non_negative_x = np.maximum(x, 0)
+    with np.errstate(divide="ignore"):
+        return np.where(
+            x >= 0,
+            k
+            / lambda_
+            * (non_negative_x / lambda_) ** (k - 1)
+            * np.exp(-((non_negative_x / lambda_) ** k)),
+            0.0,
+        )
+
+
+@lru_cache(maxsize=256)
+def _tabulate(
+    kernel: Callable, parameters: Tuple[float, ...], real_range: Range
+) -> np.ndarray:
+    x_values = real_range.x_values
+    values = np.ascontiguousarray(
+        np.broadcast_to(kernel(x_values, *parameters), x_values.shape), dtype=float
+    )
+    values.setflags(write=False)
+    return values
+
+
+def tabulate(
+    kernel: Callable, parameters: Tuple[float, ...], real_range: Range
+) -> np.ndarray:
+    """
+    Samples kernel(x, *parameters) (e.g. lognormal_cdf(x, mu, sigma)) at the points of real_range. The samples are
+    cached, keyed by kernel, parameters and range, so they are computed once and shared, e.g. across the steps of a time
+    evolution and across scenarios: the returned array is read-only.
+    """
+    return _tabulate(kernel, tuple(parameters), real_range)
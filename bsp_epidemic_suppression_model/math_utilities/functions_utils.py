@@ -1,9 +1,20 @@
-from dataclasses import dataclass
+import bisect
+import math
+import warnings
+from dataclasses import dataclass, field
+from functools import lru_cache
 
-from typing import List, Union, Callable
+from typing import List, Optional, Tuple, Union, Callable
 
+import numpy as np
+from scipy import fft as sci_fft
 from scipy import integrate as sci_integrate
 
+from bsp_epidemic_suppression_model.math_utilities.profiling import (
+    is_profiling,
+    record_integral,
+)
+
 
 @dataclass
 class DeltaMeasure:
@@ -21,34 +32,187 @@ ProbabilityCumulativeFunction = Callable[[float], float]
 ImproperProbabilityCumulativeFunction = Callable[[float], float]
 
 
-@dataclass
+INTERPOLATIONS = ("floor", "linear")
+
+# Quadrature rules available to integrate. The ones in GRID_QUADRATURES work on samples over a RealRange, and are also
+# available to integrate_values.
+QUADRATURES = ("quad", "trapezoid", "simpson", "gauss_legendre")
+GRID_QUADRATURES = ("trapezoid", "simpson")
+DEFAULT_GAUSS_LEGENDRE_NODES = 200
+
+
+@dataclass(frozen=True)
 class RealRange:
     """
-    Range in real numbers.
+    Range in real numbers, sampled at equally spaced points. It is immutable and hashable, so that it can be used as a
+    key of caches, and its points are computed once, as a read-only array.
     """
 
     x_min: float
     x_max: float
     step: float
+    x_values: np.ndarray = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        n_points = int((self.x_max - self.x_min) / self.step) + 1
+        x_values = self.x_min + np.arange(n_points) * self.step
+        x_values.setflags(write=False)
+        # The dataclass is frozen, so that it is hashable
+        object.__setattr__(self, "x_values", x_values)
+
+    def index_of(self, x):
+        """
+        Index of the closest point of the range at the left of x (a float or an array of floats), or of the first or
+        the last point if x is outside the range.
+        """
+        return _index_of(self, x)
+
+
+@dataclass(frozen=True)
+class NonUniformRange:
+    """
+    Range in real numbers sampled at increasing, not necessarily equally spaced nodes, e.g. finer where the functions
+    vary faster (see geometric_range and adaptive_range). It can be used instead of a RealRange by the functions of
+    this module (the composite quadrature rules, the interpolation and the convolution of samples) and by the engines.
+    Like RealRange, it is immutable and hashable.
+    """
+
+    nodes: Tuple[float, ...]
+    x_values: np.ndarray = field(init=False, repr=False, compare=False)
+    trapezoid_weights: np.ndarray = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        nodes = tuple(float(x) for x in self.nodes)
+        x_values = np.array(nodes)
+        if len(nodes) < 2 or np.any(np.diff(x_values) <= 0):
+            raise ValueError("The nodes must be at least two, and increasing.")
+        x_values.setflags(write=False)
+        steps = np.diff(x_values)
+        trapezoid_weights = np.zeros_like(x_values)
+        trapezoid_weights[:-1] += steps / 2
+        trapezoid_weights[1:] += steps / 2
+        trapezoid_weights.setflags(write=False)
+        object.__setattr__(self, "nodes", nodes)
+        object.__setattr__(self, "x_values", x_values)
+        object.__setattr__(self, "trapezoid_weights", trapezoid_weights)
+
+    @property
+    def x_min(self) -> float:
+        return self.nodes[0]
 
     @property
-    def x_values(self):
-        return [
-            self.x_min + n * self.step
-            for n in range(int((self.x_max - self.x_min) / self.step) + 1)
-        ]
+    def x_max(self) -> float:
+        return self.nodes[-1]
+
+    def index_of(self, x):
+        """
+        Index of the closest point of the range at the left of x (a float or an array of floats), or of the first or
+        the last point if x is outside the range.
+        """
+        return _index_of(self, x)
+
+
+# Data type for the ranges over which functions are sampled
+Range = Union[RealRange, NonUniformRange]
 
 
-def list_from_f(f: Callable[[float], float], real_range: RealRange) -> List[float]:
+def check_uniform_range(real_range: Range, context: str) -> None:
+    """
+    Raises a TypeError if real_range is not a RealRange, for the functionalities (named by context) that only support
+    equally spaced points, e.g. storing a range as its bounds and step.
+    """
+    if not isinstance(real_range, RealRange):
+        raise TypeError(
+            f"{context} only supports RealRanges, not {type(real_range).__name__}s."
+        )
+
+
+def geometric_range(
+    x_min: float, x_max: float, first_step: float, growth: float = 1.05
+) -> NonUniformRange:
+    """
+    Range whose steps grow geometrically from first_step, at the beginning of the range, by the factor growth, i.e.
+    fine at the beginning (e.g. around the onset of FS) and coarse in the tail. The last step is shortened to end at
+    x_max.
+    """
+    if first_step <= 0 or growth < 1:
+        raise ValueError("The first step must be positive, and the growth at least 1.")
+    nodes = [x_min]
+    step = first_step
+    while nodes[-1] + step < x_max:
+        nodes.append(nodes[-1] + step)
+        step *= growth
+    nodes.append(x_max)
+    return NonUniformRange(nodes=tuple(nodes))
+
+
+def adaptive_range(
+    fs: List[Callable[[float], float]],
+    x_min: float,
+    x_max: float,
+    tolerance: float = 1e-3,
+    initial_step: float = 1.0,
+    min_step: float = 1e-3,
+) -> NonUniformRange:
+    """
+    Range refined where the given functions need it: starting from the uniform range with initial_step, each interval
+    is bisected as long as the linear interpolation of any of the functions between its ends differs by more than
+    tolerance from their value in its midpoint, and it is longer than min_step.
+    """
+    nodes = RealRange(x_min, x_max, initial_step).x_values
+    if nodes[-1] < x_max:
+        nodes = np.append(nodes, x_max)
+
+    def samples(x):
+        return np.array([array_from_f(f, x) for f in fs])
+
+    values = samples(nodes)
+    while True:
+        midpoints = (nodes[:-1] + nodes[1:]) / 2
+        midpoint_values = samples(midpoints)
+        errors = np.max(
+            np.abs(midpoint_values - (values[:, :-1] + values[:, 1:]) / 2), axis=0
+        )
+        refine = (errors > tolerance) & (np.diff(nodes) > 2 * min_step)
+        if not np.any(refine):
+            return NonUniformRange(nodes=tuple(nodes))
+        order = np.argsort(np.concatenate([nodes, midpoints[refine]]), kind="stable")
+        nodes = np.concatenate([nodes, midpoints[refine]])[order]
+        values = np.concatenate([values, midpoint_values[:, refine]], axis=1)[:, order]
+
+
+def _positions(real_range: Range, x):
+    """
+    Positions of x (a float or an array of floats) relative to the points of real_range, i.e. the (fractional) indices
+    of the points, increasing linearly between consecutive ones.
+    """
+    if isinstance(real_range, RealRange):
+        return (x - real_range.x_min) / real_range.step
+    nodes = real_range.nodes
+    if isinstance(x, (int, float)):
+        i = min(max(bisect.bisect_right(nodes, x) - 1, 0), len(nodes) - 2)
+        return i + (x - nodes[i]) / (nodes[i + 1] - nodes[i])
+    x_values = real_range.x_values
+    i = np.clip(np.searchsorted(x_values, x, side="right") - 1, 0, len(nodes) - 2)
+    return i + (x - x_values[i]) / (x_values[i + 1] - x_values[i])
+
+
+def _index_of(real_range: Range, x):
+    n = len(real_range.x_values)
+    if isinstance(x, (int, float)):
+        return min(max(math.floor(_positions(real_range, x)), 0), n - 1)
+    positions = _positions(real_range, np.asarray(x, dtype=float))
+    return np.clip(np.floor(positions).astype(int), 0, n - 1)
+
+
+def list_from_f(f: Callable[[float], float], real_range: Range) -> List[float]:
     """
     Samples a function f over a given range into a list of values.
     """
-    return [f(x) for x in real_range.x_values]
+    return [f(x) for x in real_range.x_values.tolist()]
 
 
-def f_from_list(
-    f_values: List[float], real_range: RealRange
-) -> Callable[[float], float]:
+def f_from_list(f_values: List[float], real_range: Range) -> Callable[[float], float]:
     """
     Interpolates a list of samples over a range into a function.
     """
@@ -58,17 +222,94 @@ def f_from_list(
             return f_values[0]
         if x > real_range.x_max:
             return f_values[-1]
-        i = int((x - real_range.x_min) / real_range.step)
-        return f_values[i]
+        return f_values[real_range.index_of(x)]
 
     return f
 
 
+def evaluate_from_list(f_values, real_range: Range, x, interpolation: str = "floor"):
+    """
+    Vectorized version of f_from_list: evaluates the function interpolated from the samples f_values at x, which can be
+    a float or an array of floats. The samples can have leading (batch) axes, the last axis running over the range.
+    :param interpolation: "floor" to take the value at the closest point of the range at the left of x (like
+    f_from_list), or "linear" to interpolate linearly between the two closest points. In both cases, the function is
+    constant outside the range.
+    """
+    if interpolation not in INTERPOLATIONS:
+        raise ValueError(
+            f"Unknown interpolation {interpolation!r}, must be one of {INTERPOLATIONS}."
+        )
+    if isinstance(x, (int, float)) and np.ndim(f_values) == 1:
+        # Fast path for scalars, which are evaluated in tight loops by quad
+        n = len(f_values)
+        position = _positions(real_range, x)
+        if position <= 0:
+            return f_values[0]
+        if position >= n - 1:
+            return f_values[n - 1]
+        i = int(position)
+        if interpolation == "floor":
+            return f_values[i]
+        weight = position - i
+        return f_values[i] * (1 - weight) + f_values[i + 1] * weight
+
+    f_values = np.asarray(f_values)
+    x = np.asarray(x, dtype=float)
+    n = f_values.shape[-1]
+    position = _positions(real_range, x)
+    indices = np.clip(np.floor(position).astype(int), 0, n - 1)
+
+    def take(indices):
+        if f_values.ndim == 1 or x.ndim == 0:
+            return f_values[..., indices]
+        indices = np.broadcast_to(indices, f_values.shape[:-1] + indices.shape[-1:])
+        return np.take_along_axis(f_values, indices, axis=-1)
+
+    if interpolation == "floor":
+        return take(indices)
+    weights = np.clip(position - indices, 0, 1)
+    next_indices = np.minimum(indices + 1, n - 1)
+    return take(indices) * (1 - weights) + take(next_indices) * weights
+
+
+def evaluate_slope_from_list(f_values, real_range: Range, x):
+    """
+    Derivative of the function linearly interpolated from the samples f_values (see evaluate_from_list), evaluated at x
+    (a float or an array of floats): the slope of the segment between the two closest points of the range, or 0
+    outside the range, where the function is constant. The samples can have leading (batch) axes, the last axis
+    running over the range, and then x must be a float or a one-dimensional array.
+    """
+    f_values = np.asarray(f_values, dtype=float)
+    x_values = real_range.x_values
+    n = f_values.shape[-1]
+    position = _positions(real_range, np.asarray(x, dtype=float))
+    indices = np.clip(np.floor(position).astype(int), 0, n - 2)
+    slopes = (f_values[..., indices + 1] - f_values[..., indices]) / (
+        x_values[indices + 1] - x_values[indices]
+    )
+    return np.where((position >= 0) & (position <= n - 1), slopes, 0.0)
+
+
+def array_from_f(f: Callable, x: np.ndarray) -> np.ndarray:
+    """
+    Samples a function f at the points x into an array. The function is called once on the whole array if it supports
+    array arguments, otherwise it is evaluated point by point. In the former case, the values can have leading (batch)
+    axes.
+    """
+    try:
+        values = np.asarray(f(x), dtype=float)
+        return np.broadcast_to(
+            values, values.shape[: max(values.ndim - x.ndim, 0)] + x.shape
+        ).copy()
+    except (TypeError, ValueError):
+        return np.array([f(x_) for x_ in x.ravel()], dtype=float).reshape(x.shape)
+
+
 def round2(number: float) -> float:
     """
     Rounds a number to the second decimal.
     """
-    return round(number, 2)
+    return round(float(number), 2)
 
 
 def round2_list(l: List[float]) -> List[float]:
@@ -78,15 +319,247 @@ def round2_list(l: List[float]) -> List[float]:
     return [round2(number) for number in l]
 
 
-def convolve(f: Callable[[float], float], delta: DeltaMeasure):
+# Kernels with at most this number of non-vanishing samples are convolved directly, longer ones via FFT
+DIRECT_CONVOLUTION_MAX_LENGTH = 32
+
+
+def convolve(
+    f: Callable[[float], float],
+    delta: ImproperProbabilityDensity,
+    real_range: Optional[Range] = None,
+):
+    """
+    Computes the convolution of a function f and an improper density delta.
+    If delta is a DeltaMeasure, the result is the shifted and rescaled f. Otherwise, the convolution is computed on the
+    samples over real_range (see convolve_values), and the result linearly interpolates them.
+    """
+    if isinstance(delta, DeltaMeasure):
+        return lambda x: delta.height * f(x - delta.position)
+    if real_range is None:
+        raise ValueError(
+            "The convolution with a continuous density needs a real_range."
+        )
+    f_values = array_from_f(f, real_range.x_values)
+    convolution_values = convolve_values(f_values, delta, real_range)
+    return lambda x: evaluate_from_list(
+        convolution_values, real_range, x, interpolation="linear"
+    )
+
+
+def _kernel_weights(
+    density: Callable[[float], float], n: int, step: float
+) -> Tuple[np.ndarray, Optional[np.ndarray], int]:
+    """
+    Samples density at the n relative times 0, step, ..., (n - 1) * step, and returns the weights of the samples in the
+    discretized convolution (trimmed after the last non-vanishing one), their real FFT (or None if the kernel is short
+    enough to be convolved directly), and the length of the FFT.
+    """
+    s_values = step * np.arange(n)
+    weights = step * array_from_f(density, s_values)
+    weights[..., 0] *= 0.5  # Trapezoidal rule
+    batch_axes = tuple(range(weights.ndim - 1))
+    non_vanishing = np.flatnonzero(np.any(weights != 0, axis=batch_axes))
+    weights = weights[..., : non_vanishing[-1] + 1 if len(non_vanishing) else 1]
+    weights.setflags(write=False)  # They are cached
+    if weights.shape[-1] <= DIRECT_CONVOLUTION_MAX_LENGTH:
+        return weights, None, 0
+    n_fft = sci_fft.next_fast_len(n + weights.shape[-1] - 1, real=True)
+    weights_fft = np.fft.rfft(weights, n=n_fft, axis=-1)
+    weights_fft.setflags(write=False)
+    return weights, weights_fft, n_fft
+
+
+_cached_kernel_weights = lru_cache(maxsize=64)(_kernel_weights)
+
+
+def _non_uniform_kernel_weights(
+    density: Callable[[float], float], real_range: NonUniformRange
+) -> np.ndarray:
     """
-    Computes the convolution of a function f and a DeltaMeasure delta.
+    Samples density at the relative times s_j = x_j - x_min of the nodes x_j of real_range, and returns the weights of
+    the samples in the discretized convolution (with the trapezoidal rule).
     """
-    return lambda x: delta.height * f(x - delta.position)
+    s_values = real_range.x_values - real_range.x_min
+    weights = real_range.trapezoid_weights * array_from_f(density, s_values)
+    weights.setflags(write=False)  # They are cached
+    return weights
+
+
+_cached_non_uniform_kernel_weights = lru_cache(maxsize=64)(_non_uniform_kernel_weights)
 
 
-def integrate(f: Callable[[float], float], a: float, b: float) -> float:
+@lru_cache(maxsize=16)
+def _non_uniform_convolution_points(
+    real_range: NonUniformRange,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns the indices of the nodes at the left and at the right of the points x_i - s_j (see
+    _non_uniform_kernel_weights), and the weights of the latter in the linear interpolation, vanishing if x_i - s_j
+    is before the beginning of the range.
+    """
+    x_values = real_range.x_values
+    points = x_values[:, np.newaxis] - (x_values - real_range.x_min)[np.newaxis, :]
+    n = len(x_values)
+    positions = _positions(real_range, points)
+    indices = np.clip(np.floor(positions).astype(int), 0, n - 1)
+    next_indices = np.minimum(indices + 1, n - 1)
+    next_weights = np.clip(positions - indices, 0, 1)
+    weights = np.where(points >= real_range.x_min, 1 - next_weights, 0.0)
+    next_weights = np.where(points >= real_range.x_min, next_weights, 0.0)
+    return indices, next_indices, np.stack([weights, next_weights])
+
+
+def _convolve_values_non_uniform(
+    f_values: np.ndarray,
+    density: Callable[[float], float],
+    real_range: NonUniformRange,
+) -> np.ndarray:
+    """
+    Version of convolve_values for the non-uniform ranges: the integral over s is computed directly, with the
+    trapezoidal rule on the relative times s_j = x_j - x_min, and f is linearly interpolated at the points x_i - s_j.
+    """
+    try:
+        kernel_weights = _cached_non_uniform_kernel_weights(density, real_range)
+    except TypeError:  # Unhashable density
+        kernel_weights = _non_uniform_kernel_weights(density, real_range)
+    indices, next_indices, (weights, next_weights) = _non_uniform_convolution_points(
+        real_range
+    )
+    f_interpolated = (
+        f_values[..., indices] * weights + f_values[..., next_indices] * next_weights
+    )
+    return np.einsum("...ij,...j->...i", f_interpolated, kernel_weights)
+
+
+def convolve_values(
+    f_values, density: Callable[[float], float], real_range: Range
+) -> np.ndarray:
+    """
+    Computes the samples over real_range of the convolution of a function f, given its samples f_values, and an
+    improper density, i.e. of x -> int_0^∞ f(x - s) density(s) ds, assuming that f vanishes before the beginning of
+    the range (as for the CDFs of times after the infection, for ranges starting at 0).
+    The kernel is sampled over the same grid, and it is convolved directly if it is short, or via FFT otherwise: its
+    samples and transform are cached, so that they are computed once for all the steps of a time evolution (and the
+    scenarios sharing it), as long as density is hashable (e.g. a function, or a delay of a ScenarioSpec).
+    The samples of f and of the density can have leading (batch) axes, the last axis running over the range.
+    On a NonUniformRange, the convolution is computed directly, with a number of operations quadratic in the number of
+    points, which is small for such ranges.
+    """
+    f_values = np.asarray(f_values, dtype=float)
+    if isinstance(real_range, NonUniformRange):
+        return _convolve_values_non_uniform(f_values, density, real_range)
+    n = f_values.shape[-1]
+    try:
+        weights, weights_fft, n_fft = _cached_kernel_weights(
+            density, n, real_range.step
+        )
+    except TypeError:  # Unhashable density
+        weights, weights_fft, n_fft = _kernel_weights(density, n, real_range.step)
+
+    if weights_fft is None:
+        shape = np.broadcast(
+            np.empty(f_values.shape), np.empty(weights.shape[:-1] + (n,))
+        ).shape
+        convolution_values = np.zeros(shape)
+        for m in range(weights.shape[-1]):
+            convolution_values[..., m:] += (
+                weights[..., m : m + 1] * f_values[..., : n - m]
+            )
+        return convolution_values
+
+    return np.fft.irfft(
+        np.fft.rfft(f_values, n=n_fft, axis=-1) * weights_fft, n=n_fft, axis=-1
+    )[..., :n]
+
+
+@lru_cache(maxsize=None)
+def gauss_legendre_nodes_and_weights(n_nodes: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Nodes and weights of the Gauss-Legendre quadrature rule with n_nodes nodes on [-1, 1], computed once per n_nodes.
+    """
+    return np.polynomial.legendre.leggauss(n_nodes)
+
+
+def integrate(
+    f: Callable[[float], float],
+    a: float,
+    b: float,
+    quadrature: str = "quad",
+    step: Optional[float] = None,
+    n_nodes: int = DEFAULT_GAUSS_LEGENDRE_NODES,
+    real_range: Optional[Range] = None,
+) -> float:
     """
     Integral of a function f from a to b.
+    :param quadrature: the quadrature rule: "quad" for the adaptive quadrature of scipy, "trapezoid" or "simpson" for
+    the composite rules on the points of RealRange(a, b, step), or "gauss_legendre" for the Gauss-Legendre rule with
+    n_nodes nodes. Apart from "quad", f is sampled with array_from_f, i.e. called once on all the points if it supports
+    array arguments.
+    :param step: the step of the composite rules.
+    :param n_nodes: the number of nodes of the Gauss-Legendre rule.
+    :param real_range: if given, the range from a to b whose points are used by the composite rules instead of
+    RealRange(a, b, step), e.g. a NonUniformRange.
+    Within a stage profiled by a Profiler, the integral and its integrand evaluations are recorded (see profiling.py).
+    """
+    if quadrature == "quad":
+        if not is_profiling():
+            return sci_integrate.quad(f, a, b)[0]
+        value, _, info, *message = sci_integrate.quad(f, a, b, full_output=1)
+        if message:  # With full_output, quad returns its warning instead of emitting it
+            warnings.warn(message[0], sci_integrate.IntegrationWarning, stacklevel=2)
+        record_integral(n_evaluations=info["neval"], n_subdivisions=info["last"])
+        return value
+    if quadrature in GRID_QUADRATURES:
+        if real_range is None:
+            if step is None:
+                raise ValueError(f"The {quadrature} quadrature needs a step.")
+            real_range = RealRange(x_min=a, x_max=b, step=step)
+        elif (real_range.x_min, real_range.x_max) != (a, b):
+            raise ValueError(f"The range must go from {a} to {b}.")
+        f_values = array_from_f(f, real_range.x_values)
+        return float(integrate_values(f_values, real_range, quadrature=quadrature))
+    if quadrature == "gauss_legendre":
+        nodes, weights = gauss_legendre_nodes_and_weights(n_nodes)
+        half_length = (b - a) / 2
+        f_values = array_from_f(f, a + half_length * (nodes + 1))
+        record_integral(n_evaluations=f_values.size)
+        return float(half_length * np.dot(weights, f_values))
+    raise ValueError(
+        f"Unknown quadrature {quadrature!r}, must be one of {QUADRATURES}."
+    )
+
+
+def quadrature_error(
+    f: Callable[[float], float], a: float, b: float, quadrature: str, **kwargs
+) -> float:
+    """
+    Absolute difference between the integral of f from a to b computed with the given quadrature rule (see integrate)
+    and the one computed with the adaptive quadrature of scipy, taken as reference.
+    """
+    return abs(integrate(f, a, b, quadrature=quadrature, **kwargs) - integrate(f, a, b))
+
+
+def integrate_values(f_values, real_range: Range, quadrature: str = "trapezoid"):
+    """
+    Integral of a function sampled over a range, with the trapezoidal or the Simpson rule. The samples can have leading
+    (batch) axes, the last axis running over the range.
     """
-    return sci_integrate.quad(f, a, b)[0]
+    f_values = np.asarray(f_values)
+    record_integral(
+        n_evaluations=f_values.size,
+        n_integrals=int(np.prod(f_values.shape[:-1], dtype=int)),
+    )
+    if isinstance(real_range, NonUniformRange):
+        if quadrature == "trapezoid":
+            return f_values @ real_range.trapezoid_weights
+        if quadrature == "simpson":
+            return sci_integrate.simpson(f_values, x=real_range.x_values, axis=-1)
+    elif quadrature == "trapezoid":
+        return real_range.step * (
+            f_values.sum(axis=-1) - 0.5 * (f_values[..., 0] + f_values[..., -1])
+        )
+    if quadrature == "simpson":
+        return sci_integrate.simpson(f_values, dx=real_range.step, axis=-1)
+    raise ValueError(
+        f"Unknown quadrature {quadrature!r}, must be one of {GRID_QUADRATURES}."
+    )
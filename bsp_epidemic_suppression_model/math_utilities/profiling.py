@@ -0,0 +1,159 @@
+"""
+Instrumentation of the stages of a computation (e.g. the steps of compute_time_evolution), recording for each stage its
+wall time, and the number of integrals computed by integrate within it, with their integrand evaluations and the
+subdivisions of the interval made by the adaptive quadrature.
+A Profiler is passed to the computation, which wraps its stages in profiler.stage(name, step). Without profiler, the
+computation uses no_stage instead, which does nothing. The records can be exported as a list of dictionaries (report),
+aggregated by stage (summary), or as a trace in the Chrome trace event format (to_chrome_trace), that can be opened in
+chrome://tracing or https://ui.perfetto.dev.
+"""
+import contextlib
+import json
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List
+
+
+@dataclass
+class StageRecord:
+    """
+    Measurements of one execution of a stage.
+    """
+
+    stage: str
+    step: int
+    start: float  # Seconds since the creation of the profiler
+    duration: float = 0.0  # Seconds
+    n_integrals: int = 0
+    n_evaluations: int = 0  # Evaluations of the integrands
+    n_subdivisions: int = 0  # Subintervals used by the adaptive quadrature
+
+
+# Record of the stage being executed, to which integrate reports
+_current_record = ContextVar("current_record", default=None)
+
+_NULL_CONTEXT = contextlib.nullcontext()
+
+
+def no_stage(name: str, step: int):
+    """
+    Replacement of Profiler.stage when there is no profiler: it returns a context manager doing nothing.
+    """
+    return _NULL_CONTEXT
+
+
+def record_integral(
+    n_evaluations: int, n_subdivisions: int = 0, n_integrals: int = 1
+) -> None:
+    """
+    Adds an integral, with the given number of integrand evaluations and of subdivisions, to the stage being executed,
+    if any. Integrals computed together (e.g. over stacked samples) are added at once, as n_integrals.
+    """
+    record = _current_record.get()
+    if record is not None:
+        record.n_integrals += n_integrals
+        record.n_evaluations += n_evaluations
+        record.n_subdivisions += n_subdivisions
+
+
+def is_profiling() -> bool:
+    """
+    Whether a stage is being profiled.
+    """
+    return _current_record.get() is not None
+
+
+class Profiler:
+    """
+    Collects the StageRecords of the stages executed with it.
+    """
+
+    def __init__(self):
+        self.records: List[StageRecord] = []
+        self._start = time.perf_counter()
+
+    @contextlib.contextmanager
+    def stage(self, name: str, step: int):
+        """
+        Context manager measuring the stage name of the given step. Stages can be nested: the integrals are counted
+        in the innermost one.
+        """
+        record = StageRecord(
+            stage=name, step=step, start=time.perf_counter() - self._start
+        )
+        token = _current_record.set(record)
+        try:
+            yield record
+        finally:
+            record.duration = time.perf_counter() - self._start - record.start
+            _current_record.reset(token)
+            self.records.append(record)
+
+    def report(self) -> List[Dict[str, Any]]:
+        """
+        Returns the records of all the stages executed, in order of start.
+        """
+        return [
+            asdict(record) for record in sorted(self.records, key=lambda r: r.start)
+        ]
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns, for each stage, the number of its executions and the totals of its measurements over all the steps.
+        """
+        summary = {}
+        for record in self.report():
+            totals = summary.setdefault(
+                record["stage"],
+                {
+                    "n_executions": 0,
+                    "duration": 0.0,
+                    "n_integrals": 0,
+                    "n_evaluations": 0,
+                    "n_subdivisions": 0,
+                },
+            )
+            totals["n_executions"] += 1
+            for name in ("duration", "n_integrals", "n_evaluations", "n_subdivisions"):
+                totals[name] += record[name]
+        return summary
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """
+        Returns the records as a trace in the Chrome trace event format, with a complete event (with times in
+        microseconds) per record.
+        """
+        pid = os.getpid()
+        return {
+            "traceEvents": [
+                {
+                    "name": record["stage"],
+                    "cat": "step",
+                    "ph": "X",
+                    "ts": record["start"] * 1e6,
+                    "dur": record["duration"] * 1e6,
+                    "pid": pid,
+                    "tid": 0,
+                    "args": {
+                        name: record[name]
+                        for name in (
+                            "step",
+                            "n_integrals",
+                            "n_evaluations",
+                            "n_subdivisions",
+                        )
+                    },
+                }
+                for record in self.report()
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    def save_chrome_trace(self, path: str) -> None:
+        """
+        Saves the trace returned by to_chrome_trace as a JSON file.
+        """
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f)
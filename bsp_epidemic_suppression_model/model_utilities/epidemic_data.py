@@ -10,10 +10,15 @@ https://science.sciencemag.org/content/368/6491/eabb6936
 """
 from typing import Tuple, List, Callable
 
+import numpy as np
+
 from bsp_epidemic_suppression_model.math_utilities.distributions import (
     lognormal_cdf,
+    lognormal_pdf,
     weibull_pdf,
+    tabulate,
 )
+from bsp_epidemic_suppression_model.math_utilities.functions_utils import Range
 
 
 # Default effective reproduction number
@@ -42,11 +47,24 @@ incubation_sigma = 0.363
 
 def FS(tau: float) -> float:
     """
-    Cumulative distribution of the time of symptoms onset.
+    Cumulative distribution of the time of symptoms onset. Also accepts an array of times.
+    """
+    return lognormal_cdf(tau, incubation_mu, incubation_sigma)
+
+
+def fS(tau: float) -> float:
     """
-    if tau > 0:
-        return lognormal_cdf(tau, incubation_mu, incubation_sigma)
-    return 0
+    Density of the time of symptoms onset, i.e. the derivative of FS. Also accepts an array of times.
+    """
+    return lognormal_pdf(tau, incubation_mu, incubation_sigma)
+
+
+# Samples of FS over a range, computed once per range (see tabulate)
+
+
+def FS_values(real_range: Range) -> np.ndarray:
+    """Samples of FS over real_range."""
+    return tabulate(lognormal_cdf, (incubation_mu, incubation_sigma), real_range)
 
 
 # Data for the "two-components model" (asymptomatic and symptomatic individuals)
@@ -57,14 +75,13 @@ contribution_of_symptomatics_to_R0 = (
 )
 
 
-def make_scenario_parameters_for_asymptomatic_symptomatic_model(
-    rho0: Callable[[float], float] = rho0,
+def make_R0_components_for_asymptomatic_symptomatic_model(
     p_sym: float = p_sym,
     contribution_of_symptomatics_to_R0: float = contribution_of_symptomatics_to_R0,
-) -> Tuple[List[float], List[Callable[[float, float], float]]]:
+) -> Tuple[List[float], List[float]]:
     """
-    Returns the lists p_gs and β0_gs for the "two-components model" for the severity, namely for asymptomatic and
-    symptomatic individuals.
+    Returns the lists p_gs and R0_gs (the components of R0) for the "two-components model" for the severity, namely
+    for asymptomatic and symptomatic individuals.
     """
     p_asy = 1 - p_sym  # Fraction of infected individuals who are asymptomatic.
 
@@ -77,15 +94,33 @@ def make_scenario_parameters_for_asymptomatic_symptomatic_model(
 
     assert round(R0 - p_sym * R0_sym - p_asy * R0_asy, 7) == 0
 
-    def beta0_asy(tau: float):
-        """Default infectiousness for asymptomatic individuals."""
-        return R0_asy * rho0(tau)
+    return [p_asy, p_sym], [R0_asy, R0_sym]
 
-    def beta0_sym(tau: float):
-        """Default infectiousness for symptomatic individuals."""
-        return R0_sym * rho0(tau)
 
-    p_gs = [1 - p_sym, p_sym]
-    beta0_gs = [lambda t, tau: beta0_asy(tau), lambda t, tau: beta0_sym(tau)]
+def make_scenario_parameters_for_asymptomatic_symptomatic_model(
+    rho0: Callable[[float], float] = rho0,
+    p_sym: float = p_sym,
+    contribution_of_symptomatics_to_R0: float = contribution_of_symptomatics_to_R0,
+) -> Tuple[List[float], List[Callable[[float, float], float]]]:
+    """
+    Returns the lists p_gs and β0_gs for the "two-components model" for the severity, namely for asymptomatic and
+    symptomatic individuals.
+    """
+    p_gs, (R0_asy, R0_sym) = make_R0_components_for_asymptomatic_symptomatic_model(
+        p_sym=p_sym,
+        contribution_of_symptomatics_to_R0=contribution_of_symptomatics_to_R0,
+    )
+
+    # Imported here, since scenario_spec.py imports the data of this module
+    from bsp_epidemic_suppression_model.model_utilities.scenario_spec import (
+        InfectiousnessComponent,
+    )
+
+    # The default infectiousness for asymptomatic and symptomatic individuals, which does not depend on the absolute
+    # time t, so that the engines can sample it once (see precomputed_epidemic_data.py)
+    beta0_gs = [
+        InfectiousnessComponent(R0_component=R0_asy, profile=rho0),
+        InfectiousnessComponent(R0_component=R0_sym, profile=rho0),
+    ]
 
     return p_gs, beta0_gs
@@ -0,0 +1,211 @@
+"""
+Quantities that do not change from one step of the algorithm to the next, nor from one scenario to another sharing the
+same default infectiousness, computed once per range: the samples of FS (see epidemic_data.py) and, if
+they do not depend on the absolute time t, the samples of the components of the default infectiousness beta0_gs,
+together with their integrals (the components of R0) and first moments.
+The engines use them at every step instead of evaluating again FS and beta0_gs on the points of the range: see
+get_precomputed_epidemic_data, that computes them once per beta0_gs and range.
+Whether beta0_gs depend on t cannot be inferred from their samples at a few times, so they are only tabulated if they
+are known not to: if they are InfectiousnessComponents (e.g. compiled from a ScenarioSpec), or if the caller says so.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from bsp_epidemic_suppression_model.math_utilities.functions_utils import (
+    Range,
+    array_from_f,
+    integrate_values,
+)
+from bsp_epidemic_suppression_model.model_utilities.epidemic_data import FS, FS_values
+from bsp_epidemic_suppression_model.model_utilities.scenario_spec import (
+    InfectiousnessComponent,
+)
+
+
+def _is_range_points(tau, x_values: np.ndarray) -> bool:
+    return (
+        isinstance(tau, np.ndarray)
+        and tau.shape == x_values.shape
+        and np.array_equal(tau, x_values)
+    )
+
+
+def _tabulated(f: Callable, values: np.ndarray, x_values: np.ndarray) -> Callable:
+    """
+    Returns a function evaluating f, except on the whole array x_values, where it returns the samples values.
+    """
+
+    def f_tabulated(tau):
+        if _is_range_points(tau, x_values):
+            return values
+        return f(tau)
+
+    return f_tabulated
+
+
+def _sample_beta0_component(
+    beta0_component: Callable[[float, float], float], t: float, x_values: np.ndarray
+) -> np.ndarray:
+    return array_from_f(lambda tau: beta0_component(t, tau), x_values)
+
+
+@dataclass(frozen=True, eq=False)
+class PrecomputedEpidemicData:
+    """
+    Samples over real_range of the scenario-invariant functions of the model, and of the default infectiousness
+    beta0_gs they were computed for. The samples and the integrals of beta0_gs are None if beta0_gs depend on t: they
+    are then sampled again at each step.
+    """
+
+    real_range: Range
+    beta0_gs: Tuple[Callable[[float, float], float], ...]
+    x_values: np.ndarray
+    FS_values: np.ndarray
+    beta0_gs_values: Optional[Tuple[np.ndarray, ...]]
+    R0_gs: Optional[Tuple[float, ...]]  # Integrals of beta0_gs
+    beta0_gs_first_moments: Optional[Tuple[float, ...]]  # Integrals of tau*beta0_gs
+
+    @property
+    def time_dependent_beta0(self) -> bool:
+        return self.beta0_gs_values is None
+
+    def matches(
+        self, beta0_gs: Sequence[Callable[[float, float], float]], real_range: Range
+    ) -> bool:
+        """
+        Whether the data were precomputed for the given default infectiousness and range.
+        """
+        return tuple(beta0_gs) == self.beta0_gs and real_range == self.real_range
+
+    def FS(self, tau):
+        """
+        Evaluates FS, returning the tabulated samples when tau is the array of the points of the range.
+        """
+        if _is_range_points(tau, self.x_values):
+            return self.FS_values
+        return FS(tau)
+
+    def beta0_ti_gs(self, t_i: float) -> List[Callable[[float], float]]:
+        """
+        Returns the components of the default infectiousness at the absolute time t_i, as functions of tau that return
+        the tabulated samples when evaluated on the points of the range, if beta0_gs do not depend on t.
+        """
+        beta0_ti_gs = [
+            lambda tau, beta0_g=beta0_g: beta0_g(t_i, tau) for beta0_g in self.beta0_gs
+        ]
+        if self.time_dependent_beta0:
+            return beta0_ti_gs
+        return [
+            _tabulated(beta0_ti_g, beta0_g_values, self.x_values)
+            for beta0_ti_g, beta0_g_values in zip(beta0_ti_gs, self.beta0_gs_values)
+        ]
+
+    def beta0_ti_gs_values(self, t_i: float) -> List[np.ndarray]:
+        """
+        Returns the samples over the range of the components of the default infectiousness at the absolute time t_i:
+        the tabulated ones, unless beta0_gs depend on t.
+        """
+        if self.time_dependent_beta0:
+            return [
+                _sample_beta0_component(beta0_g, t_i, self.x_values)
+                for beta0_g in self.beta0_gs
+            ]
+        return list(self.beta0_gs_values)
+
+    def R0(self, p_gs: Sequence[float]) -> float:
+        """
+        Default reproduction number of a population with the given fractions of severities, i.e. the sum of the
+        components R0_gs weighted by p_gs.
+        """
+        if self.time_dependent_beta0:
+            raise ValueError("R0 depends on t, since beta0_gs do.")
+        return sum(p_g * R0_g for p_g, R0_g in zip(p_gs, self.R0_gs))
+
+    def mean_generation_time(self, p_gs: Sequence[float]) -> float:
+        """
+        Expected value of the contagion time tau^C in absence of isolation measures, for a population with the given
+        fractions of severities.
+        """
+        if self.time_dependent_beta0:
+            raise ValueError("The generation time depends on t, since beta0_gs do.")
+        return sum(
+            p_g * m_g for p_g, m_g in zip(p_gs, self.beta0_gs_first_moments)
+        ) / self.R0(p_gs)
+
+
+def precompute_epidemic_data(
+    beta0_gs: Sequence[Callable[[float, float], float]],
+    real_range: Range,
+    time_dependent_beta0: Optional[bool] = None,
+) -> PrecomputedEpidemicData:
+    """
+    Computes the samples over real_range of FS and, unless they depend on t, of beta0_gs, with the integrals and
+    first moments of the latter (with the trapezoidal rule).
+    :param beta0_gs: the components of the default infectiousness (t, tau) -> beta^0_{t,g}(tau), as in a Scenario.
+    :param real_range: the range over which the functions are sampled.
+    :param time_dependent_beta0: whether beta0_gs depend on t. By default, they are assumed not to only if they are
+    InfectiousnessComponents, whose values do not depend on t by construction: any other callable is sampled again at
+    each time.
+    """
+    x_values = real_range.x_values
+
+    if time_dependent_beta0 is None:
+        time_dependent_beta0 = not all(
+            isinstance(beta0_g, InfectiousnessComponent) for beta0_g in beta0_gs
+        )
+
+    beta0_gs_values = R0_gs = beta0_gs_first_moments = None
+    if not time_dependent_beta0:
+        beta0_gs_values = tuple(
+            _sample_beta0_component(beta0_g, 0.0, x_values) for beta0_g in beta0_gs
+        )
+        for beta0_g_values in beta0_gs_values:
+            beta0_g_values.setflags(write=False)  # They are shared by the steps
+        R0_gs = tuple(
+            float(integrate_values(beta0_g_values, real_range))
+            for beta0_g_values in beta0_gs_values
+        )
+        beta0_gs_first_moments = tuple(
+            float(integrate_values(x_values * beta0_g_values, real_range))
+            for beta0_g_values in beta0_gs_values
+        )
+
+    return PrecomputedEpidemicData(
+        real_range=real_range,
+        beta0_gs=tuple(beta0_gs),
+        x_values=x_values,
+        FS_values=FS_values(real_range),
+        beta0_gs_values=beta0_gs_values,
+        R0_gs=R0_gs,
+        beta0_gs_first_moments=beta0_gs_first_moments,
+    )
+
+
+# The ranges are hashable, so they are part of the key
+_cached_precompute_epidemic_data = lru_cache(maxsize=32)(precompute_epidemic_data)
+
+
+def get_precomputed_epidemic_data(
+    beta0_gs: Sequence[Callable[[float, float], float]],
+    real_range: Range,
+    precomputed: Optional[PrecomputedEpidemicData] = None,
+) -> PrecomputedEpidemicData:
+    """
+    Returns the data precomputed for beta0_gs and real_range: the given ones, that must match them, or the ones
+    computed by precompute_epidemic_data. The latter are cached, so that they are computed once for all the scenarios
+    sharing the same beta0_gs callables (e.g. the ones compiled from ScenarioSpecs with the same R0_gs and generation
+    time) and range.
+    """
+    if precomputed is not None:
+        if not precomputed.matches(beta0_gs, real_range):
+            raise ValueError(
+                "The precomputed epidemic data do not match the beta0_gs and the range of the computation."
+            )
+        return precomputed
+    try:
+        return _cached_precompute_epidemic_data(tuple(beta0_gs), real_range)
+    except TypeError:  # Unhashable beta0_gs
+        return precompute_epidemic_data(beta0_gs, real_range)
@@ -1,3 +1,4 @@
+import math
 from dataclasses import dataclass
 from typing import List, Callable
 
@@ -58,7 +59,7 @@ class Scenario:
         ):
             raise ScenarioError("The lists must have the same length.")
 
-        if sum(self.p_gs) != 1:
+        if not math.isclose(sum(self.p_gs), 1):  # Up to rounding, e.g. for many strata
             raise ScenarioError(
                 "The fractions of people infected with given severity must sum to 1."
             )
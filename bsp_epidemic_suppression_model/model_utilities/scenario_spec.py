@@ -0,0 +1,424 @@
+"""
+Declarative specification of a Scenario.
+A Scenario holds arbitrary callables (papp, beta0_gs), so it cannot be serialized, hashed, or sent to other processes.
+A ScenarioSpec describes the same data in terms of named parametric objects (adoption curves, infectiousness profiles,
+notification-to-test delays), that are frozen dataclasses: a spec is hashable and picklable, can be stored as (and
+loaded from) JSON or TOML, and compiles into a Scenario.
+Example of a spec, in JSON format:
+{
+    "p_gs": [0.4, 0.6],
+    "R0_gs": [0.125, 1.583],
+    "generation_time": {"type": "weibull", "k": 2.855, "lambda_": 5.611},
+    "t_0": 0,
+    "ssapp": [0, 0.8],
+    "ssnoapp": [0, 0.2],
+    "scapp": 0.8,
+    "scnoapp": 0.2,
+    "xi": 0.9,
+    "papp": {"type": "constant", "value": 0.6},
+    "DeltaATapp": {"type": "dirac", "position": 2},
+    "DeltaATnoapp": {"type": "dirac", "position": 4}
+}
+"""
+import hashlib
+import json
+from dataclasses import dataclass, asdict, fields
+from typing import Any, ClassVar, Dict, Tuple, Union
+
+import numpy as np
+
+from bsp_epidemic_suppression_model.math_utilities.distributions import (
+    gamma_pdf,
+    lognormal_pdf,
+    weibull_pdf,
+)
+from bsp_epidemic_suppression_model.math_utilities.functions_utils import (
+    DeltaMeasure,
+    ImproperProbabilityDensity,
+)
+from bsp_epidemic_suppression_model.model_utilities.epidemic_data import (
+    k,
+    lambda_,
+    p_sym,
+    contribution_of_symptomatics_to_R0,
+    make_R0_components_for_asymptomatic_symptomatic_model,
+)
+from bsp_epidemic_suppression_model.model_utilities.scenario import (
+    Scenario,
+    ScenarioError,
+)
+
+
+# Adoption curves: t -> papp(t)
+
+
+@dataclass(frozen=True)
+class ConstantAdoption:
+    """
+    Fraction of people with the app that does not depend on time.
+    """
+
+    type_name: ClassVar[str] = "constant"
+
+    value: float
+
+    def __call__(self, t: float) -> float:
+        return self.value
+
+
+@dataclass(frozen=True)
+class LinearAdoption:
+    """
+    Fraction of people with the app linearly increasing from 0 at t=0, until reaching papp_infty at t=t_saturation.
+    """
+
+    type_name: ClassVar[str] = "linear"
+
+    papp_infty: float
+    t_saturation: float
+
+    def __call__(self, t: float) -> float:
+        return self.papp_infty * min(max(t / self.t_saturation, 0), 1)
+
+
+@dataclass(frozen=True)
+class TabulatedAdoption:
+    """
+    Fraction of people with the app linearly interpolated between the given values at the given times, and constant
+    outside them.
+    """
+
+    type_name: ClassVar[str] = "tabulated"
+
+    times: Tuple[float, ...]
+    values: Tuple[float, ...]
+
+    def __call__(self, t: float) -> float:
+        return float(np.interp(t, self.times, self.values))
+
+
+# Infectiousness profiles, i.e. default generation time distributions: tau -> rho0(tau)
+
+
+@dataclass(frozen=True)
+class WeibullProfile:
+    """
+    Weibull distribution with shape k and scale lambda_.
+    """
+
+    type_name: ClassVar[str] = "weibull"
+
+    k: float
+    lambda_: float
+
+    def __call__(self, tau: float) -> float:
+        return weibull_pdf(tau, self.k, self.lambda_)
+
+
+@dataclass(frozen=True)
+class GammaProfile:
+    """
+    Gamma distribution with shape alpha and rate beta.
+    """
+
+    type_name: ClassVar[str] = "gamma"
+
+    alpha: float
+    beta: float
+
+    def __call__(self, tau: float) -> float:
+        return gamma_pdf(tau, self.alpha, self.beta)
+
+
+@dataclass(frozen=True)
+class TabulatedProfile:
+    """
+    Distribution linearly interpolated between the given values at the given times, and vanishing outside them.
+    """
+
+    type_name: ClassVar[str] = "tabulated"
+
+    taus: Tuple[float, ...]
+    values: Tuple[float, ...]
+
+    def __call__(self, tau: float) -> float:
+        return np.interp(tau, self.taus, self.values, left=0, right=0)
+
+
+# Notification-to-test delays Delta^{A -> T}
+
+
+@dataclass(frozen=True)
+class DiracDelay:
+    """
+    Deterministic delay: compiles into a DeltaMeasure.
+    """
+
+    type_name: ClassVar[str] = "dirac"
+
+    position: float
+    height: float = 1
+
+    def to_density(self) -> ImproperProbabilityDensity:
+        return DeltaMeasure(position=self.position, height=self.height)
+
+
+@dataclass(frozen=True)
+class GammaDelay:
+    """
+    Delay with gamma distribution with shape alpha and rate beta, rescaled by height: compiles into itself, as a
+    continuous density.
+    """
+
+    type_name: ClassVar[str] = "gamma"
+
+    alpha: float
+    beta: float
+    height: float = 1
+
+    def __call__(self, tau: float) -> float:
+        return self.height * gamma_pdf(tau, self.alpha, self.beta)
+
+    def to_density(self) -> ImproperProbabilityDensity:
+        return self
+
+
+@dataclass(frozen=True)
+class LognormalDelay:
+    """
+    Delay with log-normal distribution with parameters mu and sigma, rescaled by height: compiles into itself, as a
+    continuous density.
+    """
+
+    type_name: ClassVar[str] = "lognormal"
+
+    mu: float
+    sigma: float
+    height: float = 1
+
+    def __call__(self, tau: float) -> float:
+        return self.height * lognormal_pdf(tau, self.mu, self.sigma)
+
+    def to_density(self) -> ImproperProbabilityDensity:
+        return self
+
+
+AdoptionCurve = Union[ConstantAdoption, LinearAdoption, TabulatedAdoption]
+InfectiousnessProfile = Union[WeibullProfile, GammaProfile, TabulatedProfile]
+DelayDistribution = Union[DiracDelay, GammaDelay, LognormalDelay]
+
+_ADOPTION_CURVES = {
+    cls.type_name: cls for cls in (ConstantAdoption, LinearAdoption, TabulatedAdoption)
+}
+_INFECTIOUSNESS_PROFILES = {
+    cls.type_name: cls for cls in (WeibullProfile, GammaProfile, TabulatedProfile)
+}
+_DELAY_DISTRIBUTIONS = {
+    cls.type_name: cls for cls in (DiracDelay, GammaDelay, LognormalDelay)
+}
+
+
+@dataclass(frozen=True)
+class InfectiousnessComponent:
+    """
+    Component of the default infectiousness (t, tau) -> beta^0_{t,g}(tau) = R0_g * rho0(tau). This is what a
+    ScenarioSpec compiles into for each severity.
+    """
+
+    R0_component: float
+    profile: InfectiousnessProfile
+
+    def __call__(self, t: float, tau: float) -> float:
+        return self.R0_component * self.profile(tau)
+
+
+def _canonical(value):
+    """Converts recursively the integers in value to floats."""
+    if isinstance(value, dict):
+        return {k: _canonical(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_canonical(v) for v in value]
+    if isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+
+def _object_to_dict(obj) -> Dict[str, Any]:
+    return {
+        "type": obj.type_name,
+        **{
+            name: list(value) if isinstance(value, tuple) else value
+            for name, value in asdict(obj).items()
+        },
+    }
+
+
+def _object_from_dict(d: Dict[str, Any], types: Dict[str, type]):
+    d = dict(d)
+    type_name = d.pop("type")
+    if type_name not in types:
+        raise ScenarioError(
+            f"Unknown type {type_name!r}, must be one of {list(types)}."
+        )
+    return types[type_name](
+        **{
+            name: tuple(value) if isinstance(value, list) else value
+            for name, value in d.items()
+        }
+    )
+
+
+@dataclass(frozen=True)
+class ScenarioSpec:
+    """
+    Declarative, serializable and hashable counterpart of a Scenario. The lists of the Scenario are tuples here, and the
+    callables are parametric objects. The default infectiousness of each severity is R0_gs[g] * generation_time(tau).
+    """
+
+    # Data from the literature:
+    p_gs: Tuple[float, ...]  # Probabilities of having given severity
+    R0_gs: Tuple[float, ...]  # Components of R0, given severity
+    generation_time: InfectiousnessProfile  # Default generation time distribution
+
+    # Model parameters (see Scenario):
+    t_0: float
+    ssapp: Tuple[float, ...]
+    ssnoapp: Tuple[float, ...]
+    scapp: float
+    scnoapp: float
+    xi: float
+    papp: AdoptionCurve
+    DeltaATapp: DelayDistribution
+    DeltaATnoapp: DelayDistribution
+
+    def __post_init__(self):
+        for name in ("p_gs", "R0_gs", "ssapp", "ssnoapp"):
+            object.__setattr__(self, name, tuple(getattr(self, name)))
+
+    def to_scenario(self) -> Scenario:
+        """
+        Compiles the spec into a Scenario. The callables of the Scenario are picklable.
+        """
+        return Scenario(
+            p_gs=list(self.p_gs),
+            beta0_gs=[
+                InfectiousnessComponent(R0_component=R0_g, profile=self.generation_time)
+                for R0_g in self.R0_gs
+            ],
+            t_0=self.t_0,
+            ssapp=list(self.ssapp),
+            ssnoapp=list(self.ssnoapp),
+            scapp=self.scapp,
+            scnoapp=self.scnoapp,
+            xi=self.xi,
+            papp=self.papp,
+            p_DeltaATapp=self.DeltaATapp.to_density(),
+            p_DeltaATnoapp=self.DeltaATnoapp.to_density(),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns the spec as a dictionary of JSON-serializable values.
+        """
+        d = {}
+        for field in fields(self):
+            value = getattr(self, field.name)
+            if isinstance(value, tuple):
+                d[field.name] = list(value)
+            elif hasattr(value, "type_name"):
+                d[field.name] = _object_to_dict(value)
+            else:
+                d[field.name] = value
+        return d
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "ScenarioSpec":
+        """
+        Builds a spec from a dictionary, as returned by to_dict or loaded from a JSON or TOML file.
+        """
+        d = dict(d)
+        d["generation_time"] = _object_from_dict(
+            d["generation_time"], _INFECTIOUSNESS_PROFILES
+        )
+        d["papp"] = _object_from_dict(d["papp"], _ADOPTION_CURVES)
+        for name in ("DeltaATapp", "DeltaATnoapp"):
+            d[name] = _object_from_dict(d[name], _DELAY_DISTRIBUTIONS)
+        return cls(**d)
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), sort_keys=True)
+
+    @classmethod
+    def from_json(cls, s: str) -> "ScenarioSpec":
+        return cls.from_dict(json.loads(s))
+
+    def content_hash(self) -> str:
+        """
+        Returns a hash of the content of the spec, stable across processes and sessions (unlike hash()), that can be
+        used as a key to cache results. Integer and float values of the parameters are not distinguished.
+        """
+        canonical_json = json.dumps(_canonical(self.to_dict()), sort_keys=True)
+        return hashlib.sha256(canonical_json.encode()).hexdigest()
+
+
+def make_asymptomatic_symptomatic_scenario_spec(
+    t_0: float,
+    ssapp: Tuple[float, float],
+    ssnoapp: Tuple[float, float],
+    scapp: float,
+    scnoapp: float,
+    xi: float,
+    papp: AdoptionCurve,
+    DeltaATapp: DelayDistribution,
+    DeltaATnoapp: DelayDistribution,
+    p_sym: float = p_sym,
+    contribution_of_symptomatics_to_R0: float = contribution_of_symptomatics_to_R0,
+    generation_time: InfectiousnessProfile = WeibullProfile(k=k, lambda_=lambda_),
+) -> ScenarioSpec:
+    """
+    Returns the ScenarioSpec for the "two-components model" for the severity (asymptomatic and symptomatic
+    individuals), with the epidemic data of COVID-19 by default. See
+    make_scenario_parameters_for_asymptomatic_symptomatic_model.
+    """
+    p_gs, R0_gs = make_R0_components_for_asymptomatic_symptomatic_model(
+        p_sym=p_sym,
+        contribution_of_symptomatics_to_R0=contribution_of_symptomatics_to_R0,
+    )
+    return ScenarioSpec(
+        p_gs=p_gs,
+        R0_gs=R0_gs,
+        generation_time=generation_time,
+        t_0=t_0,
+        ssapp=ssapp,
+        ssnoapp=ssnoapp,
+        scapp=scapp,
+        scnoapp=scnoapp,
+        xi=xi,
+        papp=papp,
+        DeltaATapp=DeltaATapp,
+        DeltaATnoapp=DeltaATnoapp,
+    )
+
+
+def load_scenario_spec(path: str) -> ScenarioSpec:
+    """
+    Loads a ScenarioSpec from a JSON file, or from a TOML file if the extension of path is ".toml". Reading TOML files
+    needs Python >= 3.11, or the tomli package.
+    """
+    if path.endswith(".toml"):
+        try:
+            import tomllib
+        except ImportError:
+            import tomli as tomllib
+        with open(path, "rb") as f:
+            return ScenarioSpec.from_dict(tomllib.load(f))
+    with open(path) as f:
+        return ScenarioSpec.from_json(f.read())
+
+
+def save_scenario_spec(spec: ScenarioSpec, path: str) -> None:
+    """
+    Saves a ScenarioSpec to a JSON file.
+    """
+    with open(path, "w") as f:
+        json.dump(spec.to_dict(), f, indent=4)
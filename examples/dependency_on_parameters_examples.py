@@ -21,6 +21,10 @@ from bsp_epidemic_suppression_model.math_utilities.functions_utils import (
 from bsp_epidemic_suppression_model.algorithm.time_evolution_main_function import (
     compute_time_evolution,
 )
+from bsp_epidemic_suppression_model.algorithm.time_evolution_batch_function import (
+    compute_time_evolution_batch,
+)
+from bsp_epidemic_suppression_model.algorithm.stationary_step import compute_R_infinity
 
 import warnings
 
@@ -35,9 +39,8 @@ def dependency_on_testing_timeliness_homogeneous_model_example():
     """
     Example of several computations of the limit Eff_∞ in homogeneous scenarios (i.e. with no app usage)
     in which the time interval Δ^{A → T} varies from 0 to 10 days.
+    The scenarios do not depend on time, so the limit is computed directly as the stationary step of the algorithm.
     """
-    n_iterations = 8
-
     # gs = [asymptomatic, symptomatic]
     p_gs, beta0_gs = make_scenario_parameters_for_asymptomatic_symptomatic_model()
 
@@ -56,14 +59,9 @@ def dependency_on_testing_timeliness_homogeneous_model_example():
             p_DeltaAT=DeltaMeasure(position=DeltaAT),
         )
 
-        step_data_list = compute_time_evolution(
-            scenario=scenario,
-            real_range=RealRange(0, tau_max, integration_step),
-            n_iterations=n_iterations,
-            verbose=False,
+        Rinfty = compute_R_infinity(
+            scenario=scenario, real_range=RealRange(0, tau_max, integration_step),
         )
-
-        Rinfty = step_data_list[-1].R
         Effinfty = effectiveness_from_R(Rinfty)
         Effinfty_values_list.append(Effinfty)
 
@@ -120,6 +118,7 @@ def dependency_on_share_of_symptomatics_homogeneous_model_example():
             real_range=RealRange(0, tau_max, integration_step),
             n_iterations=n_iterations,
             verbose=False,
+            skip_degenerate_branches=True,
         )
 
         Rinfty = step_data_list[-1].R
@@ -184,6 +183,7 @@ def dependency_on_infectiousness_width_homogeneous_model_example():
             real_range=RealRange(0, tau_max, integration_step),
             n_iterations=n_iterations,
             verbose=False,
+            skip_degenerate_branches=True,
         )
 
         Rinfty = step_data_list[-1].R
@@ -282,10 +282,9 @@ def dependency_on_app_adoption_example():
     p_gs, beta0_gs = make_scenario_parameters_for_asymptomatic_symptomatic_model()
 
     papp_list = [0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0]
-    Effinfty_values_list = []
 
-    for papp in papp_list:
-        scenario = Scenario(
+    scenarios = [
+        Scenario(
             p_gs=p_gs,
             beta0_gs=beta0_gs,
             t_0=0,
@@ -294,21 +293,23 @@ def dependency_on_app_adoption_example():
             scapp=0.7,
             scnoapp=0.2,
             xi=0.9,
-            papp=lambda t: papp,
+            papp=lambda t, papp=papp: papp,
             p_DeltaATapp=DeltaMeasure(position=2),
             p_DeltaATnoapp=DeltaMeasure(position=4),
         )
+        for papp in papp_list
+    ]
+
+    # All the scenarios are evolved together
+    step_data_lists = compute_time_evolution_batch(
+        scenarios=scenarios,
+        real_range=RealRange(0, tau_max, integration_step),
+        n_iterations=n_iterations,
+    )
 
-        step_data_list = compute_time_evolution(
-            scenario=scenario,
-            real_range=RealRange(0, tau_max, integration_step),
-            n_iterations=n_iterations,
-            verbose=False,
-        )
-
-        Rinfty = step_data_list[-1].R
-        Effinfty = effectiveness_from_R(Rinfty)
-        Effinfty_values_list.append(Effinfty)
+    Effinfty_values_list = [
+        effectiveness_from_R(step_data_list[-1].R) for step_data_list in step_data_lists
+    ]
 
     fig = plt.figure(figsize=(10, 15))
 
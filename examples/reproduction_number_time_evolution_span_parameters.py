@@ -11,9 +11,10 @@ from bsp_epidemic_suppression_model.math_utilities.functions_utils import (
     RealRange,
 )
 from bsp_epidemic_suppression_model.algorithm.model_blocks import effectiveness_from_R
-from bsp_epidemic_suppression_model.algorithm.time_evolution_main_function import (
-    compute_time_evolution,
+from bsp_epidemic_suppression_model.algorithm.time_evolution_batch_function import (
+    compute_time_evolution_batch,
 )
+from bsp_epidemic_suppression_model.algorithm.parameter_sweep import run_parameter_sweep
 from bsp_epidemic_suppression_model.math_utilities.functions_utils import round2
 
 import warnings
@@ -45,34 +46,92 @@ def time_evolution_with_varying_parameters():
     xi_list = [0.7, 0.9]
     papp_list = [0.2, 0.5, 0.7, 0.9]
 
-    for ssapp in ssapp_list:
-        for scapp in scapp_list:
-            for xi in xi_list:
-                for papp in papp_list:
-                    scenario = Scenario(
-                        p_gs=p_gs,
-                        beta0_gs=beta0_gs,
-                        t_0=0,
-                        ssapp=[0, ssapp],
-                        ssnoapp=[0, ssnoapp],
-                        scapp=scapp,
-                        scnoapp=scnoapp,
-                        xi=xi,
-                        papp=lambda tau: papp,
-                        p_DeltaATapp=DeltaMeasure(position=DeltaATapp),
-                        p_DeltaATnoapp=DeltaMeasure(position=DeltaATnoapp),
-                    )
-
-                    step_data_list = compute_time_evolution(
-                        scenario=scenario,
-                        real_range=RealRange(0, tau_max, integration_step),
-                        n_iterations=n_iterations,
-                        verbose=False,
-                    )
-
-                    Rinfty = step_data_list[-1].R
-                    Effinfty = effectiveness_from_R(Rinfty)
-
-                    print(
-                        f" {ssapp} & {scapp} & {xi} & {papp} & {round2(Rinfty)} & {round2(Effinfty)} \\\ "
-                    )
+    parameters_list = [
+        (ssapp, scapp, xi, papp)
+        for ssapp in ssapp_list
+        for scapp in scapp_list
+        for xi in xi_list
+        for papp in papp_list
+    ]
+
+    scenarios = [
+        Scenario(
+            p_gs=p_gs,
+            beta0_gs=beta0_gs,
+            t_0=0,
+            ssapp=[0, ssapp],
+            ssnoapp=[0, ssnoapp],
+            scapp=scapp,
+            scnoapp=scnoapp,
+            xi=xi,
+            papp=lambda tau, papp=papp: papp,
+            p_DeltaATapp=DeltaMeasure(position=DeltaATapp),
+            p_DeltaATnoapp=DeltaMeasure(position=DeltaATnoapp),
+        )
+        for ssapp, scapp, xi, papp in parameters_list
+    ]
+
+    # All the scenarios are evolved together
+    step_data_lists = compute_time_evolution_batch(
+        scenarios=scenarios,
+        real_range=RealRange(0, tau_max, integration_step),
+        n_iterations=n_iterations,
+    )
+
+    for (ssapp, scapp, xi, papp), step_data_list in zip(
+        parameters_list, step_data_lists
+    ):
+        Rinfty = step_data_list[-1].R
+        Effinfty = effectiveness_from_R(Rinfty)
+
+        print(
+            f" {ssapp} & {scapp} & {xi} & {papp} & {round2(Rinfty)} & {round2(Effinfty)} \\\ "
+        )
+
+
+def make_varying_parameters_scenario(
+    ssapp: float, scapp: float, xi: float, papp: float
+) -> Scenario:
+    """
+    Scenario factory used by time_evolution_with_varying_parameters_in_parallel: it is defined at the top level of the
+    module so that it can be sent to the worker processes.
+    """
+    # gs = [asymptomatic, symptomatic]
+    p_gs, beta0_gs = make_scenario_parameters_for_asymptomatic_symptomatic_model()
+
+    return Scenario(
+        p_gs=p_gs,
+        beta0_gs=beta0_gs,
+        t_0=0,
+        ssapp=[0, ssapp],
+        ssnoapp=[0, 0.2],
+        scapp=scapp,
+        scnoapp=0.2,
+        xi=xi,
+        papp=lambda tau: papp,
+        p_DeltaATapp=DeltaMeasure(position=2),
+        p_DeltaATnoapp=DeltaMeasure(position=4),
+    )
+
+
+def time_evolution_with_varying_parameters_in_parallel():
+    """
+    Same as time_evolution_with_varying_parameters, but with the runs distributed over several processes.
+    """
+
+    for record in run_parameter_sweep(
+        parameter_grid={
+            "ssapp": [0.2, 0.5, 0.8],
+            "scapp": [0.5, 0.8],
+            "xi": [0.7, 0.9],
+            "papp": [0.2, 0.5, 0.7, 0.9],
+        },
+        scenario_factory=make_varying_parameters_scenario,
+        real_range=RealRange(0, 30, 0.1),
+        n_iterations=8,
+        chunk_size=4,
+    ):
+        print(
+            " & ".join(str(value) for value in record.params.values())
+            + f" & {round2(record.R_infty)} & {round2(record.Eff_infty)} \\\\ "
+        )
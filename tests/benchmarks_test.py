@@ -0,0 +1,43 @@
+import json
+
+from benchmarks.run_benchmarks import compare_results, main, run_benchmarks
+from benchmarks.suite import BENCHMARKS
+
+
+class TestBenchmarks:
+    def test_run_and_compare(self):
+        results = run_benchmarks(
+            pattern="^model_blocks|^integrate", repeat=1, number=1, verbose=False
+        )
+        assert set(results["timings"]) == {
+            name
+            for name in BENCHMARKS
+            if name.startswith("model_blocks") or name.startswith("integrate")
+        }
+
+        baseline = {
+            "timings": {
+                "integrate.trapezoid": {"seconds": 1e3},  # Much slower
+                "integrate.simpson": {"seconds": 1e-9},  # Much faster
+            }
+        }
+        comparisons = {
+            name: regressed
+            for name, _, _, _, regressed in compare_results(results, baseline, 1.25)
+        }
+        assert comparisons == {
+            "integrate.trapezoid": False,
+            "integrate.simpson": True,
+        }
+
+    def test_main_fails_on_slowdowns(self, tmp_path):
+        path = str(tmp_path / "baseline.json")
+        arguments = ["--filter", "integrate.gauss_legendre", "--repeat", "1"]
+        assert main(arguments + ["--save", path, "--min-duration", "0.01"]) == 0
+
+        with open(path) as f:
+            baseline = json.load(f)
+        baseline["timings"]["integrate.gauss_legendre"]["seconds"] /= 100
+        with open(path, "w") as f:
+            json.dump(baseline, f)
+        assert main(arguments + ["--compare", path, "--min-duration", "0.01"]) == 1
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from bsp_epidemic_suppression_model.model_utilities.scenario import Scenario
+from bsp_epidemic_suppression_model.algorithm.calendar_time_evolution import (
+    compute_calendar_time_evolution,
+)
+from bsp_epidemic_suppression_model.algorithm.stationary_step import compute_R_infinity
+from bsp_epidemic_suppression_model.algorithm.time_evolution_grid_function import (
+    compute_time_evolution_on_grid,
+)
+
+from tests.scenarios import REAL_RANGE, make_asymptomatic_symptomatic_scenario
+
+
+def _make_scenario(papp=0.6, ss: float = 1, sc: float = 1) -> Scenario:
+    return make_asymptomatic_symptomatic_scenario(
+        ssapp=(0, 0.5 * ss),
+        ssnoapp=(0, 0.2 * ss),
+        scapp=0.7 * sc,
+        scnoapp=0.2 * sc,
+        papp=papp,
+    )
+
+
+def test_renewal_equation_without_measures():
+    scenario = _make_scenario(ss=0, sc=0)
+    evolution = compute_calendar_time_evolution(scenario, REAL_RANGE, n_times=60)
+    assert evolution.R == pytest.approx(np.ones(60))
+    assert list(evolution.t) == list(range(60))
+
+    # The incidence follows the renewal equation with the default infectiousness
+    lags = np.arange(1, 30)
+    beta0_at_lags = sum(
+        p_g * beta0_g(0, lags) for p_g, beta0_g in zip(scenario.p_gs, scenario.beta0_gs)
+    )
+    incidence = [1.0]
+    for k in range(1, 60):
+        incidence.append(
+            sum(incidence[k - j] * beta0_at_lags[j - 1] for j in lags if j <= k)
+        )
+    np.testing.assert_allclose(evolution.incidence, incidence, rtol=1e-8)
+
+
+def test_cohorts_with_measures():
+    scenario = _make_scenario()
+    evolution = compute_calendar_time_evolution(scenario, REAL_RANGE, n_times=120)
+
+    # The first cohort has no sources, like the first step of the time evolution
+    (first_step_data,) = compute_time_evolution_on_grid(
+        scenario, REAL_RANGE, n_iterations=1, verbose=False, interpolation="linear"
+    )
+    assert evolution.R[0] == pytest.approx(first_step_data.R, abs=1e-12)
+    assert evolution.EtauC[0] == pytest.approx(first_step_data.EtauC, abs=1e-12)
+
+    # Contact tracing suppresses R further, up to a limit close to the one of the evolution by generations
+    assert np.all(np.diff(evolution.R[:10]) < 0)
+    assert evolution.R[-1] == pytest.approx(
+        compute_R_infinity(scenario, REAL_RANGE, interpolation="linear"), abs=2e-3
+    )
+    assert 0 < evolution.tildepapp[-1] < evolution.papp[-1] == 0.6
+
+
+def test_adoption_changing_within_a_generation():
+    papp = lambda t: 0.0 if t < 20 else 0.6
+    evolution = compute_calendar_time_evolution(
+        _make_scenario(papp=papp),
+        REAL_RANGE,
+        n_times=40,
+        imported_incidence=lambda t: 0.1,
+    )
+    # The cohorts infected after the app is introduced are suppressed immediately
+    assert evolution.R[20] < evolution.R[19] - 0.03
+    assert np.all(evolution.Rapp[:20] < evolution.Rnoapp[:20])
+    skipped_evolution = compute_calendar_time_evolution(
+        _make_scenario(papp=papp),
+        REAL_RANGE,
+        n_times=40,
+        imported_incidence=lambda t: 0.1,
+        skip_degenerate_branches=True,
+    )
+    assert np.all(np.isnan(skipped_evolution.Rapp[:20]))  # Skipped branch
+    assert np.array_equal(skipped_evolution.R, evolution.R)
+    assert evolution.incidence[0] == pytest.approx(1.1)
+    assert np.all(evolution.incidence > 0.1)
@@ -0,0 +1,88 @@
+import pytest
+
+from bsp_epidemic_suppression_model.model_utilities.scenario import (
+    Scenario,
+    ScenarioError,
+)
+from bsp_epidemic_suppression_model.math_utilities.functions_utils import DeltaMeasure
+from bsp_epidemic_suppression_model.algorithm.time_evolution_main_function import (
+    compute_time_evolution,
+)
+from bsp_epidemic_suppression_model.algorithm.time_evolution_batch_function import (
+    compute_time_evolution_batch,
+)
+from bsp_epidemic_suppression_model.algorithm.stationary_step import (
+    compute_stationary_step_data,
+    compute_R_infinity,
+)
+
+from tests.scenarios import REAL_RANGE, make_asymptomatic_symptomatic_scenario
+
+
+def make_scenario(papp) -> Scenario:
+    return make_asymptomatic_symptomatic_scenario(
+        ssapp=(0.2, 0.8), papp=papp, p_DeltaATapp=DeltaMeasure(position=0)
+    )
+
+
+class TestConvergence:
+    def test_early_stopping(self):
+        real_range = REAL_RANGE
+        scenarios = [make_scenario(lambda t: 0.2), make_scenario(lambda t: 1.0)]
+
+        for scenario in scenarios:
+            long_step_data_list = compute_time_evolution(
+                scenario, real_range, n_iterations=30, verbose=False, engine="grid"
+            )
+            for engine in ("closures", "grid"):
+                step_data_list = compute_time_evolution(
+                    scenario,
+                    real_range,
+                    n_iterations=30,
+                    verbose=False,
+                    engine=engine,
+                    quadrature="trapezoid",
+                    R_tolerance=1e-6,
+                    tildeFT_tolerance=1e-5,
+                )
+                assert len(step_data_list) < 20
+                assert abs(step_data_list[-1].R - step_data_list[-2].R) < 1e-6
+                assert abs(step_data_list[-1].R - long_step_data_list[-1].R) < 1e-5
+
+        # In a batch, each scenario stops when it converges
+        step_data_lists = compute_time_evolution_batch(
+            scenarios, real_range, n_iterations=30, R_tolerance=1e-6
+        )
+        for scenario, step_data_list in zip(scenarios, step_data_lists):
+            assert [step_data.R for step_data in step_data_list] == [
+                step_data.R
+                for step_data in compute_time_evolution(
+                    scenario,
+                    real_range,
+                    n_iterations=30,
+                    verbose=False,
+                    engine="grid",
+                    R_tolerance=1e-6,
+                )
+            ]
+        assert len(step_data_lists[0]) != len(step_data_lists[1])
+
+    def test_stationary_step(self):
+        real_range = REAL_RANGE
+
+        for papp in (0, 0.6, 1):
+            scenario = make_scenario(lambda t, papp=papp: papp)
+            step_data_list = compute_time_evolution(
+                scenario, real_range, n_iterations=30, verbose=False, engine="grid"
+            )
+            stationary_step_data = compute_stationary_step_data(scenario, real_range)
+            assert stationary_step_data.R == pytest.approx(step_data_list[-1].R)
+            assert stationary_step_data.EtauC == pytest.approx(step_data_list[-1].EtauC)
+            assert compute_R_infinity(scenario, real_range) == pytest.approx(
+                step_data_list[-1].R
+            )
+
+        with pytest.raises(ScenarioError):
+            compute_stationary_step_data(
+                make_scenario(lambda t: min(t / 20, 0.6)), real_range
+            )
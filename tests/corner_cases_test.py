@@ -1,17 +1,27 @@
+import math
+
+import numpy as np
+
 from bsp_epidemic_suppression_model.model_utilities.epidemic_data import (
     R0,
     beta0,
     make_scenario_parameters_for_asymptomatic_symptomatic_model,
 )
-from bsp_epidemic_suppression_model.model_utilities.scenario import Scenario
+from bsp_epidemic_suppression_model.model_utilities.scenario import (
+    Scenario,
+    make_homogeneous_scenario,
+)
 from bsp_epidemic_suppression_model.math_utilities.functions_utils import (
     DeltaMeasure,
     RealRange,
 )
+from bsp_epidemic_suppression_model.math_utilities.profiling import Profiler
 from bsp_epidemic_suppression_model.algorithm.time_evolution_main_function import (
     compute_time_evolution,
 )
 
+from tests.scenarios import REAL_RANGE, make_asymptomatic_symptomatic_scenario
+
 
 def check_equality_with_precision(x: float, y: float, decimal: int):
     return round(x - y, ndigits=decimal) == 0
@@ -93,6 +103,78 @@ class TestCornerCases:
             x=first_step_data.R, y=last_step_data.R, decimal=precision
         )
 
+    def test_degenerate_branches_are_skipped(self):
+        real_range = REAL_RANGE
+
+        # gs = [asymptomatic, symptomatic]
+        p_gs, beta0_gs = make_scenario_parameters_for_asymptomatic_symptomatic_model()
+
+        homogeneous_scenario = make_homogeneous_scenario(
+            p_gs=p_gs,
+            beta0_gs=beta0_gs,
+            t_0=0,
+            ss=[0, 0.5],
+            sc=0.7,
+            xi=0.9,
+            p_DeltaAT=DeltaMeasure(position=2),
+        )
+        everyone_with_app_scenario = make_asymptomatic_symptomatic_scenario(
+            ssapp=(0.1, 0.8), papp=1, p_DeltaATapp=DeltaMeasure(position=1)
+        )
+
+        for scenario, skipped_branch, active_branch in [
+            (homogeneous_scenario, "app", "noapp"),
+            (everyone_with_app_scenario, "noapp", "app"),
+        ]:
+            for engine in ("closures", "grid"):
+                profilers = [Profiler(), Profiler()]
+                full_step_data_list, step_data_list = [
+                    compute_time_evolution(
+                        scenario=scenario,
+                        real_range=real_range,
+                        n_iterations=4,
+                        verbose=False,
+                        engine=engine,
+                        profiler=profiler,
+                        skip_degenerate_branches=skip_degenerate_branches,
+                    )
+                    for skip_degenerate_branches, profiler in zip(
+                        (False, True), profilers
+                    )
+                ]
+
+                # The skipped branch does not change the results
+                for full_step_data, step_data in zip(
+                    full_step_data_list, step_data_list
+                ):
+                    for attribute in (
+                        "t",
+                        "R",
+                        "EtauC",
+                        "tildepapp",
+                        "FT_infty",
+                        f"R{active_branch}",
+                        f"FT{active_branch}_infty",
+                    ):
+                        assert getattr(step_data, attribute) == getattr(
+                            full_step_data, attribute
+                        )
+                    assert step_data.tildepgs == full_step_data.tildepgs
+                    assert np.array_equal(
+                        getattr(step_data, f"tildeFT{active_branch}_values"),
+                        getattr(full_step_data, f"tildeFT{active_branch}_values"),
+                    )
+                    assert math.isnan(getattr(step_data, f"R{skipped_branch}"))
+                    assert not np.any(
+                        getattr(step_data, f"tildeFT{skipped_branch}_values")
+                    )
+
+                # Half of the integrals giving R are computed
+                assert (
+                    2 * profilers[1].summary()["beta_R"]["n_integrals"]
+                    == profilers[0].summary()["beta_R"]["n_integrals"]
+                )
+
 
 if __name__ == "__main__":
 
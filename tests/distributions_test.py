@@ -0,0 +1,62 @@
+import numpy as np
+from scipy.stats import gamma, norm
+
+from bsp_epidemic_suppression_model.math_utilities.distributions import (
+    gamma_pdf,
+    gamma_cdf,
+    lognormal_cdf,
+    weibull_pdf,
+    tabulate,
+)
+from bsp_epidemic_suppression_model.math_utilities.functions_utils import RealRange
+from bsp_epidemic_suppression_model.model_utilities.epidemic_data import (
+    FS,
+    FS_values,
+)
+
+
+def test_kernels_agree_with_scipy():
+    xs = np.linspace(0.05, 30, 600)
+
+    assert np.allclose(gamma_pdf(xs, 2.5, 0.7), gamma.pdf(xs, a=2.5, scale=1 / 0.7))
+    assert np.allclose(gamma_cdf(xs, 2.5, 0.7), gamma.cdf(xs, a=2.5, scale=1 / 0.7))
+    assert np.allclose(
+        lognormal_cdf(xs, 1.644, 0.363), norm.cdf((np.log(xs) - 1.644) / 0.363)
+    )
+    weibull_values = (
+        2.855 / 5.611 * (xs / 5.611) ** 1.855 * np.exp(-((xs / 5.611) ** 2.855))
+    )
+    assert np.allclose(weibull_pdf(xs, 2.855, 5.611), weibull_values)
+
+    # Floats give the same results as arrays
+    for kernel, parameters in [
+        (gamma_pdf, (2.5, 0.7)),
+        (gamma_cdf, (2.5, 0.7)),
+        (lognormal_cdf, (1.644, 0.363)),
+        (weibull_pdf, (2.855, 5.611)),
+    ]:
+        assert np.allclose(
+            [kernel(float(x), *parameters) for x in xs], kernel(xs, *parameters)
+        )
+
+    # NumPy scalars give Python floats
+    for x in (np.int64(3), np.float32(3), np.float64(3)):
+        assert type(FS(x)) is float and FS(x) == FS(3.0)
+        assert type(weibull_pdf(x, 2.855, 5.611)) is float
+        assert type(gamma_cdf(x, 2.5, 0.7)) is float
+
+    # Outside the support
+    assert lognormal_cdf(0, 1.644, 0.363) == 0
+    assert np.array_equal(gamma_pdf(np.array([-1.0]), 2.5, 0.7), [0])
+    assert weibull_pdf(-1, 2.855, 5.611) == 0
+
+
+def test_tabulate():
+    real_range = RealRange(0, 30, 0.1)
+
+    values = FS_values(real_range)
+    assert np.allclose(values, [FS(tau) for tau in real_range.x_values])
+    # Computed once per range, and read-only
+    assert FS_values(RealRange(0, 30, 0.1)) is values
+    assert not values.flags.writeable
+    assert tabulate(lognormal_cdf, (1.644, 0.363), RealRange(0, 30, 0.2)) is not values
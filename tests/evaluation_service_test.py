@@ -0,0 +1,151 @@
+import asyncio
+import json
+
+import pytest
+
+from bsp_epidemic_suppression_model.math_utilities.functions_utils import RealRange
+from bsp_epidemic_suppression_model.model_utilities.scenario import ScenarioError
+from bsp_epidemic_suppression_model.model_utilities.scenario_spec import (
+    ConstantAdoption,
+    DiracDelay,
+    GammaDelay,
+    ScenarioSpec,
+    make_asymptomatic_symptomatic_scenario_spec,
+)
+from bsp_epidemic_suppression_model.algorithm.evaluation_service import (
+    EvaluationService,
+    serve_http,
+)
+from bsp_epidemic_suppression_model.algorithm.model_blocks import effectiveness_from_R
+from bsp_epidemic_suppression_model.algorithm.time_evolution_main_function import (
+    compute_time_evolution,
+)
+
+REAL_RANGE = RealRange(0, 30, 0.1)
+
+
+def make_spec(papp: float, continuous_delays: bool = False) -> ScenarioSpec:
+    return make_asymptomatic_symptomatic_scenario_spec(
+        t_0=0,
+        ssapp=(0, 0.8),
+        ssnoapp=(0, 0.2),
+        scapp=0.8,
+        scnoapp=0.2,
+        xi=0.9,
+        papp=ConstantAdoption(value=papp),
+        DeltaATapp=GammaDelay(alpha=4, beta=2) if continuous_delays else DiracDelay(2),
+        DeltaATnoapp=DiracDelay(position=4),
+    )
+
+
+def test_evaluate():
+    async def main():
+        async with EvaluationService(REAL_RANGE, n_iterations=4) as service:
+            evaluation = await service.evaluate(make_spec(0.6))
+            assert await service.evaluate(make_spec(0.6)) is evaluation
+            return evaluation, service.stats
+
+    evaluation, stats = asyncio.run(main())
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+    step_data_list = compute_time_evolution(
+        make_spec(0.6).to_scenario(),
+        REAL_RANGE,
+        n_iterations=4,
+        verbose=False,
+        engine="grid",
+    )
+    assert evaluation.R_infty == pytest.approx(step_data_list[-1].R, abs=1e-10)
+    assert evaluation.Eff_infty == effectiveness_from_R(evaluation.R_infty)
+    assert len(evaluation.steps) == 4
+
+
+def test_concurrent_queries_are_deduplicated_and_batched():
+    specs = [make_spec(0.2), make_spec(0.6), make_spec(0.2), make_spec(0.6, True)]
+
+    async def main():
+        async with EvaluationService(REAL_RANGE, n_iterations=3) as service:
+            evaluations = await asyncio.gather(
+                *(service.evaluate(spec) for spec in specs)
+            )
+            return evaluations, service.stats
+
+    evaluations, stats = asyncio.run(main())
+    assert evaluations[0] is evaluations[2]
+    assert len({evaluation.R_infty for evaluation in evaluations}) == 3
+    assert stats["misses"] == 3 and stats["deduplicated"] == 1
+    # The scenarios with continuous delays cannot be batched with the others
+    assert stats["n_batches"] == 2
+
+
+def test_invalid_spec_fails_only_its_query():
+    invalid_spec = ScenarioSpec.from_dict({**make_spec(0.6).to_dict(), "p_gs": [1, 1]})
+
+    async def main():
+        async with EvaluationService(REAL_RANGE, n_iterations=3) as service:
+            return await asyncio.gather(
+                service.evaluate(make_spec(0.6)),
+                service.evaluate(invalid_spec),
+                return_exceptions=True,
+            )
+
+    evaluation, error = asyncio.run(main())
+    assert evaluation.R_infty > 0
+    assert isinstance(error, ScenarioError)
+
+
+def test_http_server():
+    async def request(port: int, method: str, path: str, body: bytes = b""):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(
+            f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode()
+            + body
+        )
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        head, _, payload = response.partition(b"\r\n\r\n")
+        return int(head.split()[1]), json.loads(payload)
+
+    async def main():
+        async with EvaluationService(REAL_RANGE, n_iterations=3) as service:
+            server = await serve_http(service, port=0)
+            port = server.sockets[0].getsockname()[1]
+            responses = [
+                await request(
+                    port, "POST", "/evaluate", make_spec(0.6).to_json().encode()
+                ),
+                await request(port, "POST", "/evaluate", b"{}"),
+                await request(port, "GET", "/stats"),
+                await request(port, "GET", "/unknown"),
+            ]
+
+            async def failing_evaluate(spec):
+                raise RuntimeError("The engine failed.")
+
+            service.evaluate = failing_evaluate
+            responses.append(
+                await request(
+                    port, "POST", "/evaluate", make_spec(0.6).to_json().encode()
+                )
+            )
+            server.close()
+            await server.wait_closed()
+            return responses
+
+    (
+        (evaluate_status, evaluation),
+        (invalid_status, _),
+        (stats_status, stats),
+        (unknown_status, _),
+        (error_status, error),
+    ) = asyncio.run(main())
+    assert evaluate_status == 200
+    assert evaluation["spec_hash"] == make_spec(0.6).content_hash()
+    assert 0 < evaluation["Eff_infty"] < 1
+    assert invalid_status == 400
+    assert stats_status == 200 and stats["misses"] == 1
+    assert unknown_status == 404
+    # Unexpected errors of the evaluation are answered, and the connection is closed
+    assert error_status == 500
+    assert error["error"] == "RuntimeError: The engine failed."
@@ -0,0 +1,310 @@
+from bsp_epidemic_suppression_model.model_utilities.epidemic_data import (
+    make_scenario_parameters_for_asymptomatic_symptomatic_model,
+)
+from bsp_epidemic_suppression_model.model_utilities.scenario import Scenario
+from bsp_epidemic_suppression_model.math_utilities.functions_utils import (
+    DeltaMeasure,
+    RealRange,
+    geometric_range,
+)
+from bsp_epidemic_suppression_model.algorithm.time_evolution_main_function import (
+    compute_time_evolution,
+)
+from bsp_epidemic_suppression_model.algorithm.time_evolution_batch_function import (
+    compute_time_evolution_batch,
+)
+from bsp_epidemic_suppression_model.model_utilities.scenario_spec import (
+    GammaDelay,
+    LognormalDelay,
+)
+
+from tests.scenarios import REAL_RANGE, make_asymptomatic_symptomatic_scenario
+
+
+def check_equality_with_precision(x: float, y: float, decimal: int):
+    return round(x - y, ndigits=decimal) == 0
+
+
+class TestGridEngine:
+    def test_grid_engine_agrees_with_closures_engine(self):
+        scenario = make_asymptomatic_symptomatic_scenario()
+
+        step_data_lists = [
+            compute_time_evolution(
+                scenario=scenario,
+                real_range=REAL_RANGE,
+                n_iterations=3,
+                verbose=False,
+                engine=engine,
+            )
+            for engine in ("closures", "grid")
+        ]
+
+        precision = 2
+        for closures_step_data, grid_step_data in zip(*step_data_lists):
+            for attribute in ("t", "R", "Rapp", "Rnoapp", "tildepapp", "FT_infty"):
+                assert check_equality_with_precision(
+                    x=getattr(closures_step_data, attribute),
+                    y=getattr(grid_step_data, attribute),
+                    decimal=precision,
+                )
+            assert all(
+                check_equality_with_precision(x=x, y=y, decimal=precision)
+                for x, y in zip(
+                    closures_step_data.tildeFTapp_values,
+                    grid_step_data.tildeFTapp_values,
+                )
+            )
+
+    def test_grid_quadratures_agree_across_engines(self):
+        real_range = REAL_RANGE
+        scenario = make_asymptomatic_symptomatic_scenario()
+
+        # With the same composite rule on the same points, the engines compute the same integrals
+        for quadrature in ("trapezoid", "simpson"):
+            closures_step_data_list, grid_step_data_list = [
+                compute_time_evolution(
+                    scenario=scenario,
+                    real_range=real_range,
+                    n_iterations=3,
+                    verbose=False,
+                    engine=engine,
+                    quadrature=quadrature,
+                )
+                for engine in ("closures", "grid")
+            ]
+            for closures_step_data, grid_step_data in zip(
+                closures_step_data_list, grid_step_data_list
+            ):
+                for attribute in ("t", "R", "EtauC"):
+                    assert check_equality_with_precision(
+                        x=getattr(closures_step_data, attribute),
+                        y=getattr(grid_step_data, attribute),
+                        decimal=6,
+                    )
+
+    def test_batch_engine_agrees_with_grid_engine(self):
+        real_range = REAL_RANGE
+
+        scenarios = [
+            make_asymptomatic_symptomatic_scenario(
+                ssapp=(0, ssapp),
+                papp=papp,
+                p_DeltaATapp=DeltaMeasure(position=DeltaATapp),
+            )
+            for ssapp, papp, DeltaATapp in [(0.2, 0.0, 0), (0.8, 0.6, 1.5), (1, 1, 2)]
+        ]
+        # A scenario with different default infectiousness and severities
+        p_gs, beta0_gs = make_scenario_parameters_for_asymptomatic_symptomatic_model(
+            p_sym=0.5
+        )
+        scenarios.append(
+            Scenario(
+                p_gs=p_gs,
+                beta0_gs=beta0_gs,
+                t_0=3,
+                ssapp=[0.1, 0.5],
+                ssnoapp=[0, 0.5],
+                scapp=0.5,
+                scnoapp=0.4,
+                xi=0.7,
+                papp=lambda t: min(t / 20, 0.6),
+                p_DeltaATapp=DeltaMeasure(position=1),
+                p_DeltaATnoapp=DeltaMeasure(position=2, height=0.8),
+            )
+        )
+
+        step_data_lists = compute_time_evolution_batch(
+            scenarios=scenarios, real_range=real_range, n_iterations=4
+        )
+
+        for scenario, step_data_list in zip(scenarios, step_data_lists):
+            grid_step_data_list = compute_time_evolution(
+                scenario=scenario,
+                real_range=real_range,
+                n_iterations=4,
+                verbose=False,
+                engine="grid",
+            )
+            for batch_step_data, grid_step_data in zip(
+                step_data_list, grid_step_data_list
+            ):
+                for attribute in ("t", "R", "Rapp", "EtauC", "FT_infty"):
+                    assert check_equality_with_precision(
+                        x=getattr(batch_step_data, attribute),
+                        y=getattr(grid_step_data, attribute),
+                        decimal=10,
+                    )
+
+    def test_batch_engine_without_scenarios(self):
+        assert (
+            compute_time_evolution_batch(
+                scenarios=[], real_range=REAL_RANGE, n_iterations=4
+            )
+            == []
+        )
+
+    def test_continuous_notification_to_test_delays(self):
+        real_range = REAL_RANGE
+        scenarios = [
+            make_asymptomatic_symptomatic_scenario(
+                p_DeltaATapp=GammaDelay(alpha=4, beta=2),
+                p_DeltaATnoapp=LognormalDelay(mu=1.2, sigma=0.4),
+            ),
+            make_asymptomatic_symptomatic_scenario(
+                p_DeltaATapp=GammaDelay(alpha=2, beta=1, height=0.8),
+                p_DeltaATnoapp=GammaDelay(alpha=8, beta=2),
+            ),
+        ]
+        batch_step_data_lists = compute_time_evolution_batch(
+            scenarios=scenarios, real_range=real_range, n_iterations=3
+        )
+        for scenario, batch_step_data_list in zip(scenarios, batch_step_data_lists):
+            step_data_lists = [
+                compute_time_evolution(
+                    scenario=scenario,
+                    real_range=real_range,
+                    n_iterations=3,
+                    verbose=False,
+                    engine=engine,
+                    quadrature="trapezoid",
+                )
+                for engine in ("closures", "grid")
+            ] + [batch_step_data_list]
+            for step_data_tuple in zip(*step_data_lists):
+                for attribute in ("t", "R", "tildepapp", "FT_infty"):
+                    assert all(
+                        check_equality_with_precision(
+                            x=getattr(step_data_tuple[0], attribute),
+                            y=getattr(step_data, attribute),
+                            decimal=8,
+                        )
+                        for step_data in step_data_tuple[1:]
+                    )
+
+        # A concentrated delay gives almost the same results as a deterministic one
+        concentrated_step_data_list, deterministic_step_data_list = [
+            compute_time_evolution(
+                scenario=make_asymptomatic_symptomatic_scenario(
+                    p_DeltaATapp=p_DeltaATapp
+                ),
+                real_range=real_range,
+                n_iterations=3,
+                verbose=False,
+                engine="grid",
+            )
+            for p_DeltaATapp in (
+                GammaDelay(alpha=400, beta=200),
+                DeltaMeasure(position=2),
+            )
+        ]
+        for concentrated_step_data, deterministic_step_data in zip(
+            concentrated_step_data_list, deterministic_step_data_list
+        ):
+            assert check_equality_with_precision(
+                x=concentrated_step_data.R, y=deterministic_step_data.R, decimal=2
+            )
+
+    def test_non_uniform_range(self):
+        scenario = make_asymptomatic_symptomatic_scenario(
+            p_DeltaATapp=GammaDelay(alpha=4, beta=2),
+            p_DeltaATnoapp=GammaDelay(alpha=8, beta=2),
+        )
+        non_uniform_range = geometric_range(0, 30, first_step=0.05, growth=1.03)
+        reference_step_data_list = compute_time_evolution(
+            scenario=scenario,
+            real_range=RealRange(0, 30, 0.01),
+            n_iterations=3,
+            verbose=False,
+            engine="grid",
+            interpolation="linear",
+        )
+        step_data_lists = [
+            compute_time_evolution(
+                scenario=scenario,
+                real_range=non_uniform_range,
+                n_iterations=3,
+                verbose=False,
+                engine=engine,
+                interpolation="linear",
+                quadrature="trapezoid",
+            )
+            for engine in ("closures", "grid")
+        ] + compute_time_evolution_batch(
+            scenarios=[scenario],
+            real_range=non_uniform_range,
+            n_iterations=3,
+            interpolation="linear",
+        )
+        for step_data_list in step_data_lists:
+            for step_data, reference_step_data in zip(
+                step_data_list, reference_step_data_list
+            ):
+                # About 100 points give the accuracy of about 3000 equally spaced ones
+                assert check_equality_with_precision(
+                    x=step_data.R, y=reference_step_data.R, decimal=3
+                )
+                assert check_equality_with_precision(
+                    x=step_data.EtauC, y=reference_step_data.EtauC, decimal=2
+                )
+
+    def test_many_severities(self):
+        # 20 strata (e.g. age x severity), with growing components of R0 and probabilities
+        # of notification after symptoms
+        n_severities = 20
+        gs = range(n_severities)
+        # gs = [asymptomatic, symptomatic]
+        _, beta0_gs = make_scenario_parameters_for_asymptomatic_symptomatic_model()
+        beta0_asymptomatic = beta0_gs[0]
+        scenario = Scenario(
+            p_gs=[1 / n_severities for _ in gs],
+            beta0_gs=[
+                lambda t, tau, g=g: (g + 1) / 4 * beta0_asymptomatic(t, tau) for g in gs
+            ],
+            t_0=0,
+            ssapp=[0.8 * g / n_severities for g in gs],
+            ssnoapp=[0.2 * g / n_severities for g in gs],
+            scapp=0.8,
+            scnoapp=0.2,
+            xi=0.9,
+            papp=lambda t: 0.6,
+            p_DeltaATapp=GammaDelay(alpha=4, beta=2),
+            p_DeltaATnoapp=DeltaMeasure(position=4),
+        )
+        real_range = RealRange(0, 30, 0.1)
+
+        diagnostics_records = []
+        step_data_list = compute_time_evolution(
+            scenario=scenario,
+            real_range=real_range,
+            n_iterations=4,
+            verbose=False,
+            engine="grid",
+            diagnostics="full",
+            diagnostics_sink=diagnostics_records.append,
+        )
+        # The batch engine computes the components of each severity separately
+        (batch_step_data_list,) = compute_time_evolution_batch(
+            scenarios=[scenario], real_range=real_range, n_iterations=4
+        )
+
+        for step_data, batch_step_data in zip(step_data_list, batch_step_data_list):
+            for attribute in ("t", "R", "Rapp", "EtauC", "FT_infty", "tildepapp"):
+                assert check_equality_with_precision(
+                    x=getattr(step_data, attribute),
+                    y=getattr(batch_step_data, attribute),
+                    decimal=10,
+                )
+            assert len(step_data.tildepgs) == n_severities
+            for tildep_g, batch_tildep_g in zip(
+                step_data.tildepgs, batch_step_data.tildepgs
+            ):
+                assert check_equality_with_precision(
+                    x=tildep_g, y=batch_tildep_g, decimal=10
+                )
+        assert len(diagnostics_records) == 4
+        for record, step_data in zip(diagnostics_records, step_data_list):
+            assert len(record["FT_limits"]["app_gs"]) == n_severities
+            assert check_equality_with_precision(
+                x=record["FT_limits"]["total"], y=step_data.FT_infty, decimal=12
+            )
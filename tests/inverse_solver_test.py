@@ -0,0 +1,109 @@
+import pytest
+
+from bsp_epidemic_suppression_model.model_utilities.scenario import Scenario
+from bsp_epidemic_suppression_model.math_utilities.functions_utils import DeltaMeasure
+from bsp_epidemic_suppression_model.algorithm.inverse_solver import (
+    scenario_with_parameters,
+    solve_for_target,
+)
+from bsp_epidemic_suppression_model.algorithm.stationary_step import (
+    compute_stationary_step_data,
+)
+from bsp_epidemic_suppression_model.algorithm.time_evolution_grid_function import (
+    compute_time_evolution_on_grid,
+)
+
+from tests.scenarios import FINE_REAL_RANGE, make_asymptomatic_symptomatic_scenario
+
+
+def _make_scenario() -> Scenario:
+    return make_asymptomatic_symptomatic_scenario(ssapp=(0, 0.5), scapp=0.7, papp=0.3)
+
+
+def test_scenario_with_parameters():
+    scenario = _make_scenario()
+    changed_scenario = scenario_with_parameters(
+        scenario, {"ssapp[1]": 0.9, "ssnoapp[0]": 0.1, "papp": 0.5, "DeltaATapp": 1}
+    )
+    assert changed_scenario.ssapp == [0, 0.9]
+    assert changed_scenario.ssnoapp == [0.1, 0.2]
+    assert changed_scenario.papp(10) == 0.5
+    assert changed_scenario.p_DeltaATapp == DeltaMeasure(position=1)
+    assert changed_scenario.xi == scenario.xi
+    assert scenario.ssapp == [0, 0.5]  # The base scenario is not changed
+
+    with pytest.raises(ValueError):
+        scenario_with_parameters(scenario, {"ssapp[2]": 0.5})
+
+
+def test_warm_started_stationary_step():
+    scenario = _make_scenario()
+    warm_start = compute_stationary_step_data(
+        scenario_with_parameters(scenario, {"papp": 0.35}),
+        FINE_REAL_RANGE,
+        interpolation="linear",
+    )
+    step_data = compute_stationary_step_data(
+        scenario, FINE_REAL_RANGE, interpolation="linear", initial_step_data=warm_start
+    )
+    reference_step_data = compute_stationary_step_data(
+        scenario, FINE_REAL_RANGE, interpolation="linear"
+    )
+    assert step_data.R == pytest.approx(reference_step_data.R, abs=1e-8)
+
+
+def test_solve_for_app_adoption():
+    scenario = _make_scenario()
+    solution = solve_for_target(
+        scenario, "papp", bracket=(0, 1), real_range=FINE_REAL_RANGE, target_Eff=0.3
+    )
+    assert solution.parameters == ["papp"]
+    assert 0 < solution.value < 1
+    assert solution.Eff == pytest.approx(0.3, abs=1e-5)
+    assert solution.n_evaluations <= 12
+
+    # The solution is the one of the evolution with the found value
+    stationary_step_data = compute_stationary_step_data(
+        scenario_with_parameters(scenario, {"papp": solution.value}),
+        FINE_REAL_RANGE,
+        interpolation="linear",
+    )
+    assert stationary_step_data.R == pytest.approx(solution.R, abs=1e-8)
+
+
+def test_solve_for_parameters_set_together():
+    scenario = _make_scenario()
+    parameters = ["ssapp[1]", "ssnoapp[1]"]
+    solution = solve_for_target(
+        scenario,
+        parameters,
+        bracket=(0, 1),
+        real_range=FINE_REAL_RANGE,
+        target_R=0.9,
+        n_iterations=6,
+    )
+    values = {name: solution.value for name in parameters}
+    step_data_list = compute_time_evolution_on_grid(
+        scenario_with_parameters(scenario, values),
+        FINE_REAL_RANGE,
+        n_iterations=6,
+        verbose=False,
+        interpolation="linear",
+    )
+    assert step_data_list[-1].R == solution.R
+    assert solution.R == pytest.approx(0.9, abs=1e-5)
+
+
+def test_target_out_of_bracket():
+    with pytest.raises(ValueError):
+        solve_for_target(
+            _make_scenario(),
+            "papp",
+            bracket=(0, 1),
+            real_range=FINE_REAL_RANGE,
+            target_R=0.2,
+        )
+    with pytest.raises(ValueError):
+        solve_for_target(
+            _make_scenario(), "papp", bracket=(0, 1), real_range=FINE_REAL_RANGE
+        )
@@ -0,0 +1,128 @@
+import numpy as np
+import pytest
+
+from bsp_epidemic_suppression_model.model_utilities.scenario import Scenario
+from bsp_epidemic_suppression_model.model_utilities.scenario_spec import (
+    ConstantAdoption,
+    DiracDelay,
+    GammaDelay,
+    make_asymptomatic_symptomatic_scenario_spec,
+)
+from bsp_epidemic_suppression_model.math_utilities.functions_utils import DeltaMeasure
+from bsp_epidemic_suppression_model.algorithm.monte_carlo import (
+    simulate_branching_process,
+)
+from bsp_epidemic_suppression_model.algorithm.time_evolution_grid_function import (
+    compute_time_evolution_on_grid,
+)
+
+from tests.scenarios import FINE_REAL_RANGE, make_asymptomatic_symptomatic_scenario
+
+N_GENERATIONS = 4
+N_INDIVIDUALS = 200000
+
+
+def _make_scenario(sc: float = 1, continuous_delay: bool = False) -> Scenario:
+    return make_asymptomatic_symptomatic_scenario(
+        ssapp=(0.1, 0.8),
+        ssnoapp=(0.05, 0.2),
+        scapp=0.8 * sc,
+        scnoapp=0.2 * sc,
+        p_DeltaATapp=(
+            GammaDelay(alpha=4, beta=2) if continuous_delay else DeltaMeasure(2)
+        ),
+        p_DeltaATnoapp=DeltaMeasure(position=4, height=0.8),
+    )
+
+
+def _reference_step_data_list(scenario: Scenario):
+    return compute_time_evolution_on_grid(
+        scenario,
+        FINE_REAL_RANGE,
+        n_iterations=N_GENERATIONS,
+        verbose=False,
+        interpolation="linear",
+    )
+
+
+@pytest.mark.parametrize("continuous_delay", [False, True])
+def test_agreement_without_contact_tracing(continuous_delay):
+    # Without contact tracing the time evolution formulae are exact, up to the discretization
+    scenario = _make_scenario(sc=0, continuous_delay=continuous_delay)
+    generations = simulate_branching_process(
+        scenario, FINE_REAL_RANGE, N_GENERATIONS, N_INDIVIDUALS, seed=0
+    )
+    for generation, step_data in zip(generations, _reference_step_data_list(scenario)):
+        assert generation.n_individuals == N_INDIVIDUALS
+        assert generation.R_low < generation.R < generation.R_high
+        assert generation.R == pytest.approx(step_data.R, abs=4 * generation.R_stderr)
+        assert generation.Rapp == pytest.approx(step_data.Rapp, abs=0.01)
+        assert generation.tildepapp == pytest.approx(step_data.tildepapp, abs=0.01)
+        assert generation.FT_infty == pytest.approx(step_data.FT_infty, abs=0.01)
+        assert generation.EtauC == pytest.approx(step_data.EtauC, abs=0.02)
+        assert generation.t == pytest.approx(step_data.t, abs=0.1)
+
+
+def test_bias_of_the_mean_field_contact_tracing():
+    scenario = _make_scenario()
+    generations = simulate_branching_process(
+        scenario, FINE_REAL_RANGE, N_GENERATIONS, N_INDIVIDUALS, seed=0
+    )
+    step_data_list = _reference_step_data_list(scenario)
+    # The first generation has no sources
+    assert generations[0].R == pytest.approx(
+        step_data_list[0].R, abs=4 * generations[0].R_stderr
+    )
+    # The time evolution formulae neglect that the sources tested earlier infect fewer recipients, and before their
+    # test, overestimating the suppression due to contact tracing
+    for generation, step_data in zip(generations[1:], step_data_list[1:]):
+        assert step_data.R < generation.R_low
+        assert generation.R - step_data.R < 0.06
+
+
+def test_batches_over_processes():
+    scenario = make_asymptomatic_symptomatic_scenario_spec(
+        t_0=0,
+        ssapp=(0.2, 0.8),
+        ssnoapp=(0.1, 0.2),
+        scapp=0.8,
+        scnoapp=0.2,
+        xi=0.9,
+        papp=ConstantAdoption(0.6),
+        DeltaATapp=DiracDelay(2),
+        DeltaATnoapp=DiracDelay(4),
+    ).to_scenario()
+    generations = simulate_branching_process(
+        scenario, FINE_REAL_RANGE, 3, 30000, seed=1, batch_size=10000
+    )
+    # The results depend only on the seed, not on the number of processes
+    assert (
+        simulate_branching_process(
+            scenario, FINE_REAL_RANGE, 3, 30000, seed=1, batch_size=10000, max_workers=2
+        )
+        == generations
+    )
+    assert (
+        simulate_branching_process(scenario, FINE_REAL_RANGE, 3, 30000, seed=2)
+        != generations
+    )
+    assert np.all(np.diff([generation.R for generation in generations]) < 0)
+
+    with pytest.raises(ValueError):  # A scenario with lambdas cannot be pickled
+        simulate_branching_process(
+            _make_scenario(), FINE_REAL_RANGE, 3, 20, batch_size=10, max_workers=2
+        )
+
+
+@pytest.mark.parametrize(
+    "n_generations, n_individuals, batch_size", [(0, 20, 10), (3, 0, 10), (3, 20, 0)]
+)
+def test_invalid_sizes(n_generations, n_individuals, batch_size):
+    with pytest.raises(ValueError):
+        simulate_branching_process(
+            _make_scenario(),
+            FINE_REAL_RANGE,
+            n_generations,
+            n_individuals,
+            batch_size=batch_size,
+        )
@@ -0,0 +1,108 @@
+import os
+
+import pytest
+
+from bsp_epidemic_suppression_model.model_utilities.scenario import Scenario
+from bsp_epidemic_suppression_model.algorithm.time_evolution_main_function import (
+    compute_time_evolution,
+)
+from bsp_epidemic_suppression_model.algorithm.parameter_sweep import (
+    make_parameter_combinations,
+    run_parameter_sweep,
+)
+
+from tests.scenarios import REAL_RANGE, make_asymptomatic_symptomatic_scenario
+
+
+def make_scenario(ssapp: float, papp: float) -> Scenario:
+    return make_asymptomatic_symptomatic_scenario(ssapp=(0, ssapp), papp=papp)
+
+
+class TestParameterSweep:
+    def test_parameter_combinations_order(self):
+        assert make_parameter_combinations({"a": [1, 2], "b": [3, 4]}) == [
+            {"a": 1, "b": 3},
+            {"a": 1, "b": 4},
+            {"a": 2, "b": 3},
+            {"a": 2, "b": 4},
+        ]
+
+    def test_sweep_over_processes(self):
+        real_range = REAL_RANGE
+        parameter_grid = {"ssapp": [0.2, 0.8], "papp": [0.1, 0.5, 0.9]}
+
+        records = list(
+            run_parameter_sweep(
+                parameter_grid=parameter_grid,
+                scenario_factory=make_scenario,
+                real_range=real_range,
+                n_iterations=3,
+                max_workers=2,
+                chunk_size=2,
+            )
+        )
+
+        assert [record.params for record in records] == make_parameter_combinations(
+            parameter_grid
+        )
+        for record in records:
+            step_data_list = compute_time_evolution(
+                scenario=make_scenario(**record.params),
+                real_range=real_range,
+                n_iterations=3,
+                verbose=False,
+                engine="grid",
+            )
+            assert record.R_infty == step_data_list[-1].R
+            assert [step["R"] for step in record.steps] == [
+                step_data.R for step_data in step_data_list
+            ]
+
+    def test_batch_chunks(self):
+        records = run_parameter_sweep(
+            parameter_grid={"ssapp": [0.2, 0.8], "papp": [0.1, 0.5, 0.9]},
+            scenario_factory=make_scenario,
+            real_range=REAL_RANGE,
+            n_iterations=3,
+            engine="batch",
+            max_workers=1,
+            chunk_size=4,
+        )
+        assert len(list(records)) == 6
+
+    def test_arguments_checked_when_called(self, tmp_path):
+        arguments = dict(
+            parameter_grid={"ssapp": [0.2], "papp": [0.5]},
+            real_range=REAL_RANGE,
+            n_iterations=3,
+            max_workers=1,
+        )
+        # The errors are raised before iterating over the records
+        with pytest.raises(ValueError):
+            run_parameter_sweep(
+                scenario_factory=make_scenario, engine="bogus", **arguments
+            )
+        with pytest.raises(ValueError):
+            run_parameter_sweep(
+                scenario_factory=lambda ssapp, papp: make_scenario(ssapp, papp),
+                **arguments,
+            )
+
+        # The results store is created before iterating
+        directory = str(tmp_path / "results")
+        records = run_parameter_sweep(
+            scenario_factory=make_scenario, results_directory=directory, **arguments
+        )
+        assert os.path.isdir(directory)
+        assert len(list(records)) == 1
+
+        # An empty grid has no records, nor a results store
+        arguments["parameter_grid"] = {"ssapp": [], "papp": [0.5]}
+        records = run_parameter_sweep(scenario_factory=make_scenario, **arguments)
+        assert list(records) == []
+        with pytest.raises(ValueError):
+            run_parameter_sweep(
+                scenario_factory=make_scenario,
+                results_directory=str(tmp_path / "empty"),
+                **arguments,
+            )
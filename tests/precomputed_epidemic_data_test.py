@@ -0,0 +1,153 @@
+import numpy as np
+import pytest
+
+from bsp_epidemic_suppression_model.math_utilities.functions_utils import RealRange
+from bsp_epidemic_suppression_model.model_utilities.epidemic_data import (
+    FS,
+    rho0,
+    make_scenario_parameters_for_asymptomatic_symptomatic_model,
+)
+from bsp_epidemic_suppression_model.model_utilities.precomputed_epidemic_data import (
+    get_precomputed_epidemic_data,
+    precompute_epidemic_data,
+)
+from bsp_epidemic_suppression_model.model_utilities.scenario_spec import (
+    ConstantAdoption,
+    DiracDelay,
+    make_asymptomatic_symptomatic_scenario_spec,
+)
+from bsp_epidemic_suppression_model.algorithm.time_evolution_main_function import (
+    compute_time_evolution,
+)
+from bsp_epidemic_suppression_model.algorithm.time_evolution_batch_function import (
+    compute_time_evolution_batch,
+)
+
+from tests.scenarios import REAL_RANGE, make_asymptomatic_symptomatic_scenario
+
+
+def test_precomputed_epidemic_data():
+    real_range = RealRange(0, 30, 0.1)
+    x_values = np.asarray(real_range.x_values)
+    p_gs, beta0_gs = make_scenario_parameters_for_asymptomatic_symptomatic_model()
+
+    precomputed = precompute_epidemic_data(beta0_gs, real_range)
+    assert not precomputed.time_dependent_beta0
+    assert np.array_equal(precomputed.FS(x_values), FS(x_values))
+    assert precomputed.FS(2.5) == FS(2.5)
+    assert abs(precomputed.R0(p_gs) - 1) < 1e-3  # R0 is normalized to 1
+    assert abs(precomputed.mean_generation_time(p_gs) - 5) < 1e-2
+    for beta0_g, beta0_ti_g in zip(beta0_gs, precomputed.beta0_ti_gs(t_i=7)):
+        assert np.array_equal(beta0_ti_g(x_values), beta0_g(7, x_values))
+        assert beta0_ti_g(2.5) == beta0_g(7, 2.5)
+
+    # Infectiousness depending on the absolute time is detected, and sampled at each time
+    growing_beta0_gs = [lambda t, tau: (1 + t / 100) * rho0(tau)] * 2
+    precomputed = precompute_epidemic_data(growing_beta0_gs, real_range)
+    assert precomputed.time_dependent_beta0
+    assert np.allclose(precomputed.beta0_ti_gs_values(t_i=50)[0], 1.5 * rho0(x_values))
+    with pytest.raises(ValueError):
+        precomputed.R0(p_gs)
+
+    # Any callable other than an InfectiousnessComponent is assumed to depend on t, unless the caller says otherwise
+    lambda_beta0_gs = [lambda t, tau: rho0(tau)]
+    assert precompute_epidemic_data(lambda_beta0_gs, real_range).time_dependent_beta0
+    assert not precompute_epidemic_data(
+        lambda_beta0_gs, real_range, time_dependent_beta0=False
+    ).time_dependent_beta0
+
+    # The data are computed once for all the scenarios compiled from equivalent specs
+    spec = make_asymptomatic_symptomatic_scenario_spec(
+        t_0=0,
+        ssapp=(0, 0.8),
+        ssnoapp=(0, 0.2),
+        scapp=0.8,
+        scnoapp=0.2,
+        xi=0.9,
+        papp=ConstantAdoption(value=0.6),
+        DeltaATapp=DiracDelay(position=2),
+        DeltaATnoapp=DiracDelay(position=4),
+    )
+    assert get_precomputed_epidemic_data(
+        spec.to_scenario().beta0_gs, real_range
+    ) is get_precomputed_epidemic_data(spec.to_scenario().beta0_gs, real_range)
+    with pytest.raises(ValueError):
+        get_precomputed_epidemic_data(beta0_gs, RealRange(0, 20, 0.1), precomputed)
+
+
+@pytest.mark.parametrize("engine", ["closures", "grid", "batch"])
+def test_precomputed_epidemic_data_give_the_same_results(engine):
+    real_range = REAL_RANGE
+    scenario = make_asymptomatic_symptomatic_scenario(
+        ssapp=(0.2, 0.8), ssnoapp=(0.1, 0.2)
+    )
+
+    def compute():
+        if engine == "batch":
+            (step_data_list,) = compute_time_evolution_batch(
+                [scenario], real_range, n_iterations=4
+            )
+            return step_data_list
+        return compute_time_evolution(
+            scenario,
+            real_range,
+            n_iterations=4,
+            verbose=False,
+            engine=engine,
+            quadrature="trapezoid",
+        )
+
+    # Treating beta0_gs as time-dependent samples them again at each step
+    per_step_data = precompute_epidemic_data(
+        scenario.beta0_gs, real_range, time_dependent_beta0=True
+    )
+    reference_step_data_list = compute_time_evolution(
+        scenario,
+        real_range,
+        n_iterations=4,
+        verbose=False,
+        engine="grid" if engine == "batch" else engine,
+        quadrature="trapezoid",
+        precomputed=per_step_data,
+    )
+    step_data_list = compute()
+    assert [step_data.R for step_data in step_data_list] == pytest.approx(
+        [step_data.R for step_data in reference_step_data_list], abs=1e-12
+    )
+
+
+@pytest.mark.parametrize("engine", ["grid", "batch"])
+def test_infectiousness_changing_within_a_time_window(engine):
+    real_range = REAL_RANGE
+    _, beta0_gs = make_scenario_parameters_for_asymptomatic_symptomatic_model()
+    # The infectiousness is halved for 20 < t < 50, a window containing none of the times 0, 1, 10, 100, 1000
+    scenario = make_asymptomatic_symptomatic_scenario(
+        ssapp=(0.2, 0.8),
+        ssnoapp=(0.1, 0.2),
+        beta0_gs=[
+            lambda t, tau, beta0_g=beta0_g: (0.5 if 20 < t < 50 else 1)
+            * beta0_g(t, tau)
+            for beta0_g in beta0_gs
+        ],
+    )
+    if engine == "batch":
+        (step_data_list,) = compute_time_evolution_batch(
+            [scenario], real_range, n_iterations=8
+        )
+    else:
+        step_data_list = compute_time_evolution(
+            scenario, real_range, n_iterations=8, verbose=False, engine=engine
+        )
+    reference_step_data_list = compute_time_evolution(
+        scenario,
+        real_range,
+        n_iterations=8,
+        verbose=False,
+        engine="closures",
+        quadrature="trapezoid",
+    )
+    assert [step_data.R for step_data in step_data_list] == pytest.approx(
+        [step_data.R for step_data in reference_step_data_list], abs=1e-9
+    )
+    assert any(20 < step_data.t < 50 for step_data in step_data_list)
+    assert step_data_list[-1].R < 0.6
@@ -0,0 +1,92 @@
+import json
+
+import numpy as np
+import pytest
+from scipy.integrate import IntegrationWarning
+
+from bsp_epidemic_suppression_model.math_utilities.functions_utils import integrate
+from bsp_epidemic_suppression_model.math_utilities.profiling import (
+    Profiler,
+    is_profiling,
+)
+from bsp_epidemic_suppression_model.algorithm.time_evolution_main_function import (
+    compute_time_evolution,
+)
+
+from tests.scenarios import REAL_RANGE, make_asymptomatic_symptomatic_scenario
+
+STAGES = ["FA", "FT", "beta_R", "EtauC", "limits", "step_data", "diagnostics"]
+
+
+def test_profiler_stages():
+    profiler = Profiler()
+    with profiler.stage("outer", 0):
+        assert is_profiling()
+        integrate(lambda tau: tau, 0, 1)
+        integrate(lambda tau: tau, 0, 1, quadrature="trapezoid", step=0.1)
+    assert not is_profiling()
+    integrate(lambda tau: tau, 0, 1)  # Not recorded
+
+    (record,) = profiler.records
+    assert record.stage == "outer" and record.step == 0
+    assert record.duration > 0
+    assert record.n_integrals == 2
+    assert record.n_evaluations == 21 + 11  # quad evaluates 21 points per interval
+    assert record.n_subdivisions == 1
+
+
+def test_profiler_keeps_integration_warnings():
+    # An integrand that the adaptive quadrature cannot integrate within its subdivisions
+    f = lambda tau: np.sin(1 / tau) if tau > 0 else 0.0
+    with pytest.warns(IntegrationWarning):
+        value = integrate(f, 0, 1)
+    with pytest.warns(IntegrationWarning):
+        with Profiler().stage("outer", 0):
+            profiled_value = integrate(f, 0, 1)
+    assert profiled_value == value
+
+
+@pytest.mark.parametrize("engine", ["closures", "grid"])
+def test_profiled_time_evolution(engine, tmp_path):
+    scenario = make_asymptomatic_symptomatic_scenario()
+    profiler = Profiler()
+    step_data_list = compute_time_evolution(
+        scenario,
+        REAL_RANGE,
+        n_iterations=3,
+        verbose=False,
+        engine=engine,
+        profiler=profiler,
+    )
+
+    # The profiler does not change the results
+    reference_step_data_list = compute_time_evolution(
+        scenario, REAL_RANGE, n_iterations=3, verbose=False, engine=engine
+    )
+    assert [step_data.R for step_data in step_data_list] == [
+        step_data.R for step_data in reference_step_data_list
+    ]
+
+    report = profiler.report()
+    assert [(record["stage"], record["step"]) for record in report] == [
+        (stage, step) for step in range(3) for stage in STAGES
+    ]
+    summary = profiler.summary()
+    assert list(summary) == STAGES
+    assert all(totals["n_executions"] == 3 for totals in summary.values())
+    assert summary["beta_R"]["n_integrals"] == 3 * 2 * scenario.n_severities
+    assert summary["EtauC"]["n_integrals"] == 3
+    if engine == "closures":
+        # The adaptive quadrature subdivides the interval
+        assert summary["beta_R"]["n_subdivisions"] > summary["beta_R"]["n_integrals"]
+    else:
+        assert summary["beta_R"]["n_subdivisions"] == 0
+
+    path = tmp_path / "trace.json"
+    profiler.save_chrome_trace(str(path))
+    with open(path) as f:
+        trace = json.load(f)
+    events = trace["traceEvents"]
+    assert len(events) == len(report)
+    assert all(event["ph"] == "X" and event["dur"] >= 0 for event in events)
+    assert events[0]["name"] == "FA" and events[0]["args"]["step"] == 0
@@ -0,0 +1,102 @@
+import os
+
+import numpy as np
+import pytest
+
+from bsp_epidemic_suppression_model.math_utilities.functions_utils import (
+    RealRange,
+    geometric_range,
+)
+from bsp_epidemic_suppression_model.algorithm.time_evolution_main_function import (
+    compute_time_evolution,
+)
+from bsp_epidemic_suppression_model.algorithm.parameter_sweep import (
+    make_parameter_combinations,
+    run_parameter_sweep,
+)
+from bsp_epidemic_suppression_model.algorithm.results_store import ResultsStore
+
+from tests.parameter_sweep_test import make_scenario
+
+
+class TestResultsStore:
+    def test_sweep_writes_to_store(self, tmp_path):
+        real_range = RealRange(0, 30, 0.1)
+        parameter_grid = {"ssapp": [0.2, 0.8], "papp": [0.1, 0.5, 0.9]}
+        directory = str(tmp_path / "results")
+
+        records = list(
+            run_parameter_sweep(
+                parameter_grid=parameter_grid,
+                scenario_factory=make_scenario,
+                real_range=real_range,
+                n_iterations=3,
+                max_workers=2,
+                chunk_size=2,
+                results_directory=directory,
+                store_grids=True,
+            )
+        )
+
+        results_store = ResultsStore(directory)
+        assert list(results_store.written_runs()) == list(range(6))
+        R = results_store.column("R")
+        assert isinstance(R, np.memmap) and R.shape == (6, 3)
+        assert list(R[:, -1]) == [record.R_infty for record in records]
+
+        for run_index, params in enumerate(make_parameter_combinations(parameter_grid)):
+            assert results_store.params(run_index) == params
+        step_data_list = compute_time_evolution(
+            scenario=make_scenario(**results_store.params(4)),
+            real_range=real_range,
+            n_iterations=3,
+            verbose=False,
+            engine="grid",
+        )
+        for step_data, stored_step_data in zip(
+            step_data_list, results_store.read_run(4)
+        ):
+            assert stored_step_data.summary() == step_data.summary()
+            assert stored_step_data.tildepgs == step_data.tildepgs
+            assert np.array_equal(
+                stored_step_data.tildeFTapp_values, step_data.tildeFTapp_values
+            )
+
+        with pytest.raises(ValueError):
+            results_store.write_run(0, step_data_list)
+        with pytest.raises(FileExistsError):
+            ResultsStore.create(
+                directory, n_runs=1, n_steps=1, n_severities=2, real_range=real_range
+            )
+
+    def test_partial_runs(self, tmp_path):
+        real_range = RealRange(0, 30, 0.1)
+        results_store = ResultsStore.create(
+            str(tmp_path), n_runs=3, n_steps=4, n_severities=2, real_range=real_range
+        )
+        step_data_list = compute_time_evolution(
+            scenario=make_scenario(ssapp=0.5, papp=0.5),
+            real_range=real_range,
+            n_iterations=2,
+            verbose=False,
+            engine="grid",
+        )
+        results_store.write_run(1, step_data_list)
+
+        assert list(results_store.written_runs()) == [1]
+        EtauC = ResultsStore(str(tmp_path)).column("EtauC")
+        assert np.isnan(EtauC[0]).all() and np.isnan(EtauC[1, 2:]).all()
+        assert list(EtauC[1, :2]) == [step_data.EtauC for step_data in step_data_list]
+        with pytest.raises(ValueError):
+            results_store.read_run(1)  # The grids are not stored
+
+    def test_non_uniform_range(self, tmp_path):
+        with pytest.raises(TypeError, match="RealRange"):
+            ResultsStore.create(
+                str(tmp_path),
+                n_runs=3,
+                n_steps=4,
+                n_severities=2,
+                real_range=geometric_range(0, 30, 0.05),
+            )
+        assert not os.path.exists(str(tmp_path / "manifest.json"))
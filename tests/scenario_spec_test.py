@@ -0,0 +1,106 @@
+import pickle
+
+from bsp_epidemic_suppression_model.model_utilities.scenario_spec import (
+    ScenarioSpec,
+    ConstantAdoption,
+    LinearAdoption,
+    TabulatedProfile,
+    DiracDelay,
+    GammaDelay,
+    make_asymptomatic_symptomatic_scenario_spec,
+    load_scenario_spec,
+    save_scenario_spec,
+)
+from bsp_epidemic_suppression_model.algorithm.time_evolution_main_function import (
+    compute_time_evolution,
+)
+
+from tests.scenarios import REAL_RANGE, make_asymptomatic_symptomatic_scenario
+
+
+def make_spec(**changes) -> ScenarioSpec:
+    parameters = dict(
+        t_0=0,
+        ssapp=[0, 0.8],
+        ssnoapp=[0, 0.2],
+        scapp=0.8,
+        scnoapp=0.2,
+        xi=0.9,
+        papp=ConstantAdoption(0.6),
+        DeltaATapp=DiracDelay(position=2),
+        DeltaATnoapp=DiracDelay(position=4),
+    )
+    parameters.update(changes)
+    return make_asymptomatic_symptomatic_scenario_spec(**parameters)
+
+
+class TestScenarioSpec:
+    def test_serialization_round_trip(self, tmp_path):
+        spec = make_spec(
+            papp=LinearAdoption(papp_infty=0.6, t_saturation=30),
+            generation_time=TabulatedProfile(taus=(0, 5, 10), values=(0, 0.2, 0)),
+            DeltaATnoapp=GammaDelay(alpha=4, beta=1, height=0.9),
+        )
+
+        assert ScenarioSpec.from_dict(spec.to_dict()) == spec
+        assert ScenarioSpec.from_json(spec.to_json()) == spec
+        assert pickle.loads(pickle.dumps(spec)) == spec
+
+        path = str(tmp_path / "spec.json")
+        save_scenario_spec(spec, path)
+        assert load_scenario_spec(path) == spec
+
+    def test_load_toml(self, tmp_path):
+        R0_gs = make_spec().R0_gs
+        path = tmp_path / "spec.toml"
+        path.write_text(
+            "\n".join(
+                [
+                    "p_gs = [0.4, 0.6]",
+                    f"R0_gs = [{R0_gs[0]!r}, {R0_gs[1]!r}]",
+                    "t_0 = 0",
+                    "ssapp = [0, 0.8]",
+                    "ssnoapp = [0, 0.2]",
+                    "scapp = 0.8",
+                    "scnoapp = 0.2",
+                    "xi = 0.9",
+                    'generation_time = {type = "weibull", k = 2.855, lambda_ = 5.611}',
+                    'papp = {type = "constant", value = 0.6}',
+                    'DeltaATapp = {type = "dirac", position = 2}',
+                    'DeltaATnoapp = {type = "dirac", position = 4}',
+                ]
+            )
+        )
+        spec = load_scenario_spec(str(path))
+
+        assert spec.content_hash() == make_spec().content_hash()
+
+    def test_content_hash(self):
+        assert make_spec().content_hash() == make_spec().content_hash()
+        assert hash(make_spec()) == hash(make_spec())
+        assert make_spec(ssapp=[0, 0.8]).content_hash() == (
+            make_spec(ssapp=[0.0, 0.8]).content_hash()
+        )
+        assert make_spec().content_hash() != make_spec(xi=0.8).content_hash()
+
+    def test_compiled_scenario(self):
+        spec_scenario = make_spec().to_scenario()
+
+        # The compiled scenario can be pickled
+        pickle.loads(pickle.dumps(spec_scenario))
+
+        scenario = make_asymptomatic_symptomatic_scenario()
+
+        step_data_lists = [
+            compute_time_evolution(
+                scenario=s,
+                real_range=REAL_RANGE,
+                n_iterations=3,
+                verbose=False,
+                engine="grid",
+            )
+            for s in (spec_scenario, scenario)
+        ]
+        assert [step_data.R for step_data in step_data_lists[0]] == [
+            step_data.R for step_data in step_data_lists[1]
+        ]
@@ -0,0 +1,50 @@
+"""
+Scenarios shared by the tests: the "two-components model" for the severity (asymptomatic and symptomatic individuals),
+with the parameters that the tests vary given as keyword arguments.
+"""
+from typing import Callable, Optional, Sequence, Union
+
+from bsp_epidemic_suppression_model.model_utilities.epidemic_data import (
+    make_scenario_parameters_for_asymptomatic_symptomatic_model,
+)
+from bsp_epidemic_suppression_model.model_utilities.scenario import Scenario
+from bsp_epidemic_suppression_model.math_utilities.functions_utils import (
+    DeltaMeasure,
+    ImproperProbabilityDensity,
+    RealRange,
+)
+
+REAL_RANGE = RealRange(0, 30, 0.1)
+FINE_REAL_RANGE = RealRange(0, 30, 0.05)
+
+
+def make_asymptomatic_symptomatic_scenario(
+    ssapp: Sequence[float] = (0, 0.8),
+    ssnoapp: Sequence[float] = (0, 0.2),
+    scapp: float = 0.8,
+    scnoapp: float = 0.2,
+    xi: float = 0.9,
+    papp: Union[float, Callable[[float], float]] = 0.6,
+    p_DeltaATapp: ImproperProbabilityDensity = DeltaMeasure(position=2),
+    p_DeltaATnoapp: ImproperProbabilityDensity = DeltaMeasure(position=4),
+    beta0_gs: Optional[Sequence[Callable[[float, float], float]]] = None,
+) -> Scenario:
+    """
+    Returns the Scenario of the "two-components model" with the given parameters. papp can be a constant, and beta0_gs
+    are the default ones unless given.
+    """
+    # gs = [asymptomatic, symptomatic]
+    p_gs, default_beta0 = make_scenario_parameters_for_asymptomatic_symptomatic_model()
+    return Scenario(
+        p_gs=p_gs,
+        beta0_gs=default_beta0 if beta0_gs is None else list(beta0_gs),
+        t_0=0,
+        ssapp=list(ssapp),
+        ssnoapp=list(ssnoapp),
+        scapp=scapp,
+        scnoapp=scnoapp,
+        xi=xi,
+        papp=papp if callable(papp) else (lambda t: papp),
+        p_DeltaATapp=p_DeltaATapp,
+        p_DeltaATnoapp=p_DeltaATnoapp,
+    )
@@ -0,0 +1,123 @@
+import dataclasses
+
+import numpy as np
+import pytest
+
+from bsp_epidemic_suppression_model.model_utilities.epidemic_data import R0
+from bsp_epidemic_suppression_model.model_utilities.scenario import Scenario
+from bsp_epidemic_suppression_model.model_utilities.scenario_spec import GammaDelay
+from bsp_epidemic_suppression_model.math_utilities.functions_utils import DeltaMeasure
+from bsp_epidemic_suppression_model.algorithm.sensitivities import (
+    compute_time_evolution_sensitivities,
+    sensitivity_parameters,
+)
+from bsp_epidemic_suppression_model.algorithm.time_evolution_grid_function import (
+    compute_time_evolution_on_grid,
+)
+
+from tests.scenarios import FINE_REAL_RANGE, make_asymptomatic_symptomatic_scenario
+
+N_ITERATIONS = 4
+
+
+def _make_scenario(continuous_delay: bool = False) -> Scenario:
+    return make_asymptomatic_symptomatic_scenario(
+        ssapp=(0.1, 0.8),
+        ssnoapp=(0.05, 0.2),
+        papp=lambda t: min(0.3 + 0.05 * t, 0.9),
+        p_DeltaATapp=(
+            GammaDelay(alpha=4, beta=2) if continuous_delay else DeltaMeasure(2)
+        ),
+    )
+
+
+def _perturbed_scenario(scenario: Scenario, parameter: str, h: float) -> Scenario:
+    if parameter.startswith("ss"):
+        name, g = parameter[:-3], int(parameter[-2])
+        values = list(getattr(scenario, name))
+        values[g] += h
+        return dataclasses.replace(scenario, **{name: values})
+    if parameter == "papp":
+        return dataclasses.replace(scenario, papp=lambda t: scenario.papp(t) + h)
+    if parameter.startswith("DeltaAT"):
+        name = "p_" + parameter
+        position = getattr(scenario, name).position + h
+        return dataclasses.replace(scenario, **{name: DeltaMeasure(position)})
+    value = getattr(scenario, parameter) + h
+    return dataclasses.replace(scenario, **{parameter: value})
+
+
+@pytest.mark.parametrize("continuous_delay", [False, True])
+def test_sensitivities_match_finite_differences(continuous_delay):
+    scenario = _make_scenario(continuous_delay)
+    sensitivities = compute_time_evolution_sensitivities(
+        scenario, FINE_REAL_RANGE, n_iterations=N_ITERATIONS
+    )
+    assert sensitivities.parameters == sensitivity_parameters(scenario)
+    assert ("DeltaATapp" in sensitivities.parameters) != continuous_delay
+    assert sensitivities.R_jacobian.shape == (
+        N_ITERATIONS,
+        len(sensitivities.parameters),
+    )
+
+    # The values are the ones of the grid engine with linear interpolation
+    step_data_list = compute_time_evolution_on_grid(
+        scenario,
+        FINE_REAL_RANGE,
+        n_iterations=N_ITERATIONS,
+        verbose=False,
+        interpolation="linear",
+    )
+    for step_data, reference_step_data in zip(
+        sensitivities.step_data_list, step_data_list
+    ):
+        assert step_data.summary() == pytest.approx(
+            reference_step_data.summary(), abs=1e-12
+        )
+
+    h = 1e-6
+    for k, parameter in enumerate(sensitivities.parameters):
+        R_plus, R_minus = (
+            np.array(
+                [
+                    step_data.R
+                    for step_data in compute_time_evolution_on_grid(
+                        _perturbed_scenario(scenario, parameter, sign * h),
+                        FINE_REAL_RANGE,
+                        n_iterations=N_ITERATIONS,
+                        verbose=False,
+                        interpolation="linear",
+                    )
+                ]
+            )
+            for sign in (1, -1)
+        )
+        np.testing.assert_allclose(
+            sensitivities.R_jacobian[:, k], (R_plus - R_minus) / (2 * h), atol=1e-8
+        )
+
+
+def test_selected_parameters():
+    scenario = _make_scenario()
+    sensitivities = compute_time_evolution_sensitivities(
+        scenario, FINE_REAL_RANGE, n_iterations=N_ITERATIONS
+    )
+    selected_sensitivities = compute_time_evolution_sensitivities(
+        scenario, FINE_REAL_RANGE, n_iterations=N_ITERATIONS, parameters=["xi", "papp"]
+    )
+    columns = [sensitivities.parameters.index(name) for name in ("xi", "papp")]
+    np.testing.assert_allclose(
+        selected_sensitivities.R_jacobian,
+        sensitivities.R_jacobian[:, columns],
+        rtol=1e-12,
+    )
+    np.testing.assert_array_equal(
+        selected_sensitivities.Eff_jacobian, -selected_sensitivities.R_jacobian / R0
+    )
+    # Increasing the adoption of the app is the most effective lever
+    assert sensitivities.ranked_parameters()[0][0] == "papp"
+
+    with pytest.raises(ValueError):
+        compute_time_evolution_sensitivities(
+            scenario, FINE_REAL_RANGE, n_iterations=1, parameters=["beta0"]
+        )
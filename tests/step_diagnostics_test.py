@@ -0,0 +1,61 @@
+import pytest
+
+from bsp_epidemic_suppression_model.algorithm.time_evolution_main_function import (
+    compute_time_evolution,
+)
+from bsp_epidemic_suppression_model.algorithm.step_diagnostics import (
+    format_step_diagnostics,
+)
+
+from tests.scenarios import REAL_RANGE, make_asymptomatic_symptomatic_scenario
+
+
+class TestStepDiagnostics:
+    def test_diagnostics_levels(self, capsys):
+        scenario = make_asymptomatic_symptomatic_scenario()
+
+        for engine in ("closures", "grid"):
+            records = {}
+            for diagnostics in ("none", "summary", "full"):
+                records[diagnostics] = []
+                step_data_list = compute_time_evolution(
+                    scenario=scenario,
+                    real_range=REAL_RANGE,
+                    n_iterations=2,
+                    verbose=False,
+                    engine=engine,
+                    quadrature="trapezoid",
+                    diagnostics=diagnostics,
+                    diagnostics_sink=records[diagnostics].append,
+                )
+
+            assert records["none"] == []
+            for summary_record, full_record, step_data in zip(
+                records["summary"], records["full"], step_data_list
+            ):
+                assert "FT_limits" not in summary_record
+                assert "FT_limits" in full_record
+                assert summary_record.items() <= full_record.items()
+                assert summary_record["R"] == step_data.R
+                assert full_record["FT_limits"]["total"] == pytest.approx(
+                    step_data.FT_infty
+                )
+            assert "FAs_limits" not in records["full"][0]
+            assert "FAs_limits" in records["full"][1]
+            assert capsys.readouterr().out == ""
+
+        # By default, verbose=True prints the full diagnostics
+        compute_time_evolution(
+            scenario=scenario, real_range=REAL_RANGE, n_iterations=2, engine="grid"
+        )
+        assert capsys.readouterr().out == "".join(
+            format_step_diagnostics(record) + "\n" for record in records["full"]
+        )
+
+        with pytest.raises(ValueError):
+            compute_time_evolution(
+                scenario=scenario,
+                real_range=REAL_RANGE,
+                engine="grid",
+                diagnostics="all",
+            )
@@ -0,0 +1,56 @@
+import csv
+import itertools
+
+from bsp_epidemic_suppression_model.algorithm.time_evolution_main_function import (
+    compute_time_evolution,
+    iter_time_evolution,
+)
+from bsp_epidemic_suppression_model.algorithm.step_data_sinks import (
+    CSVStepDataWriter,
+    consume_time_evolution,
+)
+
+from tests.scenarios import REAL_RANGE, make_asymptomatic_symptomatic_scenario
+
+
+class TestStreaming:
+    def test_iter_time_evolution(self, tmp_path):
+        real_range = REAL_RANGE
+        scenario = make_asymptomatic_symptomatic_scenario(
+            papp=lambda t: min(t / 20, 0.6)
+        )
+
+        for engine in ("closures", "grid"):
+            step_data_list = compute_time_evolution(
+                scenario,
+                real_range,
+                n_iterations=4,
+                verbose=False,
+                engine=engine,
+                quadrature="trapezoid",
+            )
+            # Without n_iterations, the steps are computed as long as they are consumed
+            step_data_iterator = iter_time_evolution(
+                scenario, real_range, engine=engine, quadrature="trapezoid"
+            )
+            assert [
+                step_data.R for step_data in itertools.islice(step_data_iterator, 4)
+            ] == [step_data.R for step_data in step_data_list]
+
+        path = tmp_path / "steps.csv"
+        with CSVStepDataWriter(str(path), fields=("t", "R", "tildepgs")) as writer:
+            collected_step_data_list = []
+            last_step_data = consume_time_evolution(
+                iter_time_evolution(
+                    scenario, real_range, n_iterations=4, engine="grid"
+                ),
+                sinks=[writer, collected_step_data_list.append],
+            )
+        assert last_step_data is collected_step_data_list[-1]
+
+        with open(path) as f:
+            rows = list(csv.DictReader(f))
+        assert list(rows[0]) == ["t", "R", "tildepgs_0", "tildepgs_1"]
+        assert [float(row["R"]) for row in rows] == [
+            step_data.R for step_data in collected_step_data_list
+        ]
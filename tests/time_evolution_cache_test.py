@@ -0,0 +1,94 @@
+import os
+import time
+
+import pytest
+
+from bsp_epidemic_suppression_model.model_utilities.scenario_spec import (
+    ConstantAdoption,
+    DiracDelay,
+    make_asymptomatic_symptomatic_scenario_spec,
+)
+from bsp_epidemic_suppression_model.math_utilities.functions_utils import (
+    RealRange,
+    geometric_range,
+)
+from bsp_epidemic_suppression_model.algorithm.time_evolution_main_function import (
+    compute_time_evolution,
+)
+from bsp_epidemic_suppression_model.algorithm.time_evolution_cache import (
+    TimeEvolutionCache,
+)
+
+
+def make_spec(xi: float = 0.9):
+    return make_asymptomatic_symptomatic_scenario_spec(
+        t_0=0,
+        ssapp=[0, 0.8],
+        ssnoapp=[0, 0.2],
+        scapp=0.8,
+        scnoapp=0.2,
+        xi=xi,
+        papp=ConstantAdoption(0.6),
+        DeltaATapp=DiracDelay(position=2),
+        DeltaATnoapp=DiracDelay(position=4),
+    )
+
+
+class TestTimeEvolutionCache:
+    def test_hits_and_resumes(self, tmp_path):
+        cache = TimeEvolutionCache(directory=str(tmp_path))
+        real_range = RealRange(0, 30, 0.1)
+        spec = make_spec()
+
+        step_data_list = cache.compute_time_evolution(spec, real_range, n_iterations=3)
+        assert cache.stats == {"hits": 0, "resumes": 0, "misses": 1}
+
+        cached_step_data_list = cache.compute_time_evolution(
+            spec, real_range, n_iterations=2
+        )
+        assert cache.stats == {"hits": 1, "resumes": 0, "misses": 1}
+        assert [step_data.summary() for step_data in cached_step_data_list] == [
+            step_data.summary() for step_data in step_data_list[:2]
+        ]
+
+        # Resumed from the 3 cached steps, it must give the same as a full evolution
+        resumed_step_data_list = cache.compute_time_evolution(
+            spec, real_range, n_iterations=5
+        )
+        assert cache.stats == {"hits": 1, "resumes": 1, "misses": 1}
+        full_step_data_list = compute_time_evolution(
+            spec.to_scenario(), real_range, n_iterations=5, verbose=False, engine="grid"
+        )
+        assert [step_data.summary() for step_data in resumed_step_data_list] == [
+            step_data.summary() for step_data in full_step_data_list
+        ]
+
+        # A new cache on the same directory sees the stored entries
+        other_cache = TimeEvolutionCache(directory=str(tmp_path))
+        other_cache.compute_time_evolution(spec, real_range, n_iterations=5)
+        assert other_cache.stats == {"hits": 1, "resumes": 0, "misses": 0}
+
+    def test_lru_eviction(self, tmp_path):
+        cache = TimeEvolutionCache(directory=str(tmp_path), max_entries=2)
+        real_range = RealRange(0, 30, 0.1)
+
+        for xi in (0.5, 0.6, 0.7):
+            cache.compute_time_evolution(make_spec(xi), real_range, n_iterations=1)
+            # Makes sure that the modification times are distinct
+            time.sleep(0.01)
+            if xi == 0.6:
+                # Uses the first entry, so that the second is the least recently used
+                cache.compute_time_evolution(make_spec(0.5), real_range, n_iterations=1)
+                time.sleep(0.01)
+
+        assert len(os.listdir(str(tmp_path))) == 2
+        assert cache.load(cache.key(make_spec(0.6), real_range, "grid")) is None
+        assert cache.load(cache.key(make_spec(0.5), real_range, "grid")) is not None
+
+    def test_non_uniform_range(self, tmp_path):
+        cache = TimeEvolutionCache(directory=str(tmp_path))
+        with pytest.raises(TypeError, match="RealRange"):
+            cache.compute_time_evolution(
+                make_spec(), geometric_range(0, 30, 0.05), n_iterations=1
+            )
+        assert os.listdir(str(tmp_path)) == []
@@ -1,8 +1,23 @@
+import numpy as np
+import pytest
+
 from bsp_epidemic_suppression_model.math_utilities.functions_utils import (
+    NonUniformRange,
     RealRange,
+    adaptive_range,
+    geometric_range,
     list_from_f,
     f_from_list,
+    evaluate_from_list,
+    array_from_f,
+    integrate,
+    integrate_values,
+    quadrature_error,
+    convolve,
+    convolve_values,
+    DeltaMeasure,
 )
+from bsp_epidemic_suppression_model.algorithm.step_data import StepData
 
 
 def test_functions_to_lists():
@@ -24,3 +39,225 @@ def test_functions_to_lists():
             for i in range(len(lf))
         ]
     )
+
+
+def test_evaluate_from_list():
+    real_range = RealRange(0, 2, 0.5)
+
+    lf = list_from_f(lambda x: x * x, real_range)
+    fl = f_from_list(lf, real_range)
+
+    xs = np.array([-1, 0, 0.3, 0.5, 0.99, 1.7, 2, 3])
+    assert list(evaluate_from_list(lf, real_range, xs)) == [fl(x) for x in xs]
+    assert evaluate_from_list(lf, real_range, 0.7) == fl(0.7)
+
+    # Leading batch axes
+    batch_values = np.array([lf, [2 * v for v in lf]])
+    assert np.array_equal(
+        evaluate_from_list(batch_values, real_range, xs),
+        np.array([[fl(x) for x in xs], [2 * fl(x) for x in xs]]),
+    )
+
+
+def test_linear_interpolation():
+    real_range = RealRange(0, 2, 0.5)
+
+    lf = list_from_f(lambda x: 2 * x + 1, real_range)
+
+    xs = np.array([-1, 0, 0.3, 0.5, 0.99, 1.7, 2, 3])
+    linear_values = evaluate_from_list(lf, real_range, xs, interpolation="linear")
+    assert np.allclose(linear_values, [1, 1, 1.6, 2, 2.98, 4.4, 5, 5])
+    assert np.allclose(
+        [evaluate_from_list(lf, real_range, x, interpolation="linear") for x in xs],
+        linear_values,
+    )
+
+    with pytest.raises(ValueError):
+        evaluate_from_list(lf, real_range, xs, interpolation="cubic")
+
+
+def test_step_data_evaluators():
+    real_range = RealRange(0, 2, 0.5)
+
+    step_data = StepData(
+        real_range=real_range,
+        t=0,
+        papp=0.5,
+        tildepapp=0.5,
+        tildepgs=[0.5, 0.5],
+        EtauC=1,
+        FT_infty=0.5,
+        FTapp_infty=0.5,
+        FTnoapp_infty=0.5,
+        tildeFTapp=lambda tau: tau / 4,
+        tildeFTnoapp=[0, 0.1, 0.2, 0.3, 0.4],
+        R=1,
+        Rapp=1,
+        Rnoapp=1,
+        interpolation="linear",
+    )
+    assert step_data.tildeFTapp_values.dtype == np.float64
+    assert step_data.tildeFTnoapp_values.flags["C_CONTIGUOUS"]
+
+    taus = np.array([0, 0.25, 1.9])
+    assert np.allclose(step_data.tildeFTapp(taus), taus / 4)
+    assert np.allclose(step_data.tildeFTnoapp(taus), [0, 0.05, 0.38])
+    assert step_data.tildeFTnoapp(0.25) == step_data.tildeFTnoapp(taus)[1]
+
+
+def test_convolve():
+    real_range = RealRange(0, 20, 0.05)
+    f = lambda x: np.where(np.asarray(x) > 0, 1 - np.exp(-np.asarray(x)), 0)
+    density = lambda s: 0.5 * np.exp(-0.5 * np.asarray(s))  # Exponential, with rate 0.5
+
+    # Exact convolution: 1 - 2 e^{-x/2} + e^{-x}
+    convolution = convolve(f, density, real_range)
+    xs = np.array([0.5, 2, 7.3, 19])
+    assert np.allclose(
+        convolution(xs), 1 - 2 * np.exp(-xs / 2) + np.exp(-xs), atol=1e-3
+    )
+
+    # Short kernels are convolved directly, with the same result as via FFT
+    short_density = lambda s: np.where(np.asarray(s) < 1, 1.0, 0.0)
+    f_values = np.array(list_from_f(f, real_range))
+    direct_values = convolve_values(f_values, short_density, real_range)
+    fft_values = np.fft.irfft(
+        np.fft.rfft(f_values, 1024) * np.fft.rfft([0.025] + [0.05] * 19, 1024)
+    )[: len(f_values)]
+    assert np.allclose(direct_values, fft_values)
+
+    # Leading batch axes, in the samples and in the density
+    batch_values = convolve_values(
+        np.array([f_values, 2 * f_values]),
+        lambda s: np.array([density(s), 2 * density(s)]),
+        real_range,
+    )
+    assert np.allclose(batch_values[1], 4 * batch_values[0])
+
+    assert convolve(f, DeltaMeasure(position=1, height=0.5))(3) == 0.5 * f(2)
+
+
+def test_array_from_f():
+    xs = np.array([0.0, 1.0, 2.0])
+
+    assert np.array_equal(array_from_f(lambda x: x * x, xs), xs * xs)
+    assert np.array_equal(array_from_f(lambda x: 3, xs), np.array([3, 3, 3]))
+    # Functions not accepting arrays are evaluated point by point
+    assert np.array_equal(array_from_f(lambda x: 1 if x >= 1 else 0, xs), [0, 1, 1])
+
+
+def test_integrate_values():
+    real_range = RealRange(0, 2, 0.01)
+
+    values = np.array(list_from_f(lambda x: x * x, real_range))
+
+    assert (
+        round(
+            integrate_values(values, real_range) - integrate(lambda x: x * x, 0, 2), 3
+        )
+        == 0
+    )
+    # Simpson's rule is exact on polynomials of degree 3
+    assert np.isclose(integrate_values(values, real_range, "simpson"), 8 / 3)
+    assert np.allclose(
+        integrate_values(np.array([values, 2 * values]), real_range, "simpson"),
+        [8 / 3, 16 / 3],
+    )
+
+
+def test_quadratures():
+    f = lambda x: np.exp(-x) * x
+    exact_integral = 1 - 6 * np.exp(-5)
+
+    assert np.isclose(integrate(f, 0, 5), exact_integral)
+    assert np.isclose(integrate(f, 0, 5, quadrature="gauss_legendre"), exact_integral)
+    for quadrature in ("trapezoid", "simpson"):
+        assert quadrature_error(f, 0, 5, quadrature, step=0.01) < 1e-4
+
+    # Functions not accepting arrays are sampled point by point
+    assert np.isclose(
+        integrate(lambda x: 1 if x < 1 else 0, 0, 2, quadrature="simpson", step=0.1),
+        1,
+        atol=0.1,
+    )
+
+    with pytest.raises(ValueError):
+        integrate(f, 0, 5, quadrature="trapezoid")
+    with pytest.raises(ValueError):
+        integrate(f, 0, 5, quadrature="romberg")
+
+
+def test_non_uniform_ranges():
+    real_range = NonUniformRange(nodes=(0, 0.5, 1, 2, 4))
+    f_values = list_from_f(lambda x: x * x, real_range)
+    assert f_values == [0, 0.25, 1, 4, 16]
+    assert f_from_list(f_values, real_range)(3) == 4
+    assert f_from_list(f_values, real_range)(5) == 16
+    assert evaluate_from_list(f_values, real_range, 3, "linear") == 10
+    assert np.allclose(
+        evaluate_from_list(f_values, real_range, np.array([-1, 0.75, 3]), "linear"),
+        [0, 0.625, 10],
+    )
+    assert np.isclose(integrate_values(f_values, real_range), 22.875)
+    assert np.isclose(
+        integrate(lambda x: x * x, 0, 4, "trapezoid", real_range=real_range), 22.875
+    )
+    with pytest.raises(ValueError):
+        NonUniformRange(nodes=(0, 1, 1))
+
+    # Fine at the beginning, coarse in the tail
+    geometric = geometric_range(0, 30, first_step=0.05, growth=1.05)
+    steps = np.diff(geometric.x_values)
+    assert geometric.x_max == 30 and steps[0] == 0.05 and steps[-2] > 1
+    # Refined where the function varies faster
+    f = lambda x: np.exp(-((np.asarray(x) - 5) ** 2))
+    adaptive = adaptive_range([f], 0, 30, tolerance=1e-4)
+    assert np.all(np.diff(adaptive.x_values) > 0)
+    assert np.sum(np.abs(adaptive.x_values - 5) < 2) > np.sum(adaptive.x_values > 20)
+    for non_uniform_range in (geometric, adaptive):
+        x_values = np.asarray(non_uniform_range.x_values)
+        assert np.isclose(
+            integrate_values(f(x_values), non_uniform_range, "simpson"),
+            np.sqrt(np.pi),
+            atol=1e-3,
+        )
+
+    # Convolution, with batch axes (see test_convolve)
+    g = lambda x: np.where(np.asarray(x) > 0, 1 - np.exp(-np.asarray(x)), 0)
+    density = lambda s: 0.5 * np.exp(-0.5 * np.asarray(s))
+    convolution = convolve(g, density, geometric)
+    xs = np.array([0.5, 2, 7.3, 19])
+    assert np.allclose(
+        convolution(xs), 1 - 2 * np.exp(-xs / 2) + np.exp(-xs), atol=2e-3
+    )
+    g_values = np.array(list_from_f(g, geometric))
+    batch_values = convolve_values(
+        np.array([g_values, 2 * g_values]),
+        lambda s: np.array([density(s), 2 * density(s)]),
+        geometric,
+    )
+    assert np.allclose(batch_values[1], 4 * batch_values[0])
+
+
+def test_real_range():
+    real_range = RealRange(0, 3, 0.5)
+    assert np.array_equal(real_range.x_values, [0, 0.5, 1, 1.5, 2, 2.5, 3])
+    assert real_range.x_values is real_range.x_values  # Computed once
+    with pytest.raises(ValueError):
+        real_range.x_values[0] = 1  # Read-only
+    with pytest.raises(AttributeError):
+        real_range.step = 1  # Immutable
+
+    # Hashable, so that it can be used as a key of caches
+    assert real_range == RealRange(0.0, 3.0, 0.5)
+    assert len({real_range, RealRange(0.0, 3.0, 0.5), RealRange(0, 3, 0.25)}) == 2
+
+    assert real_range.index_of(1.2) == 2
+    assert real_range.index_of(-1) == 0 and real_range.index_of(7) == 6
+    assert np.array_equal(
+        real_range.index_of(np.array([0.1, 1.5, 2.9, 4])), [0, 3, 5, 6]
+    )
+    assert np.array_equal(
+        NonUniformRange(nodes=(0, 0.5, 1, 2, 4)).index_of(np.array([0.7, 3, 5])),
+        [1, 3, 4],
+    )